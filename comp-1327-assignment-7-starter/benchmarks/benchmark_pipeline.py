@@ -0,0 +1,172 @@
+"""Module that benchmarks the InputHandler -> DataProcessor -> OutputHandler
+pipeline in each of its processing modes
+
+Every scenario runs in a fresh process so its peak RSS is measured on its
+own. Example:
+    python -m benchmarks.benchmark_pipeline --rows 1000000 --accounts 50000 --json output/benchmark.json
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1.0.0"
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from benchmarks.data_generator import TransactionGenerator
+from data_processor.data_processor import DataProcessor
+from data_processor.parallel import ParallelProcessor
+from data_processor.transaction_batch import TransactionBatch
+from input_handler.input_handler import InputHandler
+from metrics.pipeline_metrics import peak_rss_mb
+from output_handler.output_handler import OutputHandler
+
+SCENARIOS = ["serial", "streaming", "fused", "columnar", "mmap", "parallel"]
+
+
+def run_scenario(scenario: str, file_path: str, output_directory: str) -> dict:
+    """Run one processing mode end to end and time each of its stages.
+
+    Args:
+        scenario (str): One of SCENARIOS.
+        file_path (str): The input file.
+        output_directory (str): Where the three output CSV files are written.
+
+    Returns:
+        dict: The scenario name, per-stage seconds, total seconds, rows processed,
+        rows per second and peak RSS in MiB.
+
+    Raises:
+        ValueError: If the scenario is unknown.
+    """
+    # Logging is switched off so only the pipeline itself is measured
+    previous_disable_level = logging.root.manager.disable
+    logging.disable(logging.CRITICAL)
+    try:
+        return _run_stages(scenario, file_path, output_directory)
+    finally:
+        logging.disable(previous_disable_level)
+
+
+def _run_stages(scenario: str, file_path: str, output_directory: str) -> dict:
+    """Run and time the stages of one scenario, see run_scenario."""
+    stages = {}
+    input_handler = InputHandler(file_path)
+    data_processor = DataProcessor([])
+
+    def timed(stage: str, function, *args):
+        """Run a function, adding its duration to stages."""
+        start = time.perf_counter()
+        result = function(*args)
+        stages[stage] = stages.get(stage, 0) + time.perf_counter() - start
+        return result
+
+    if scenario == "serial":
+        transactions = timed("read", input_handler.read_input_data)
+        results = timed("process", DataProcessor(transactions).process_data)
+    elif scenario == "streaming":
+        results = timed("read+process", data_processor.process_transactions, input_handler.iter_input_data())
+    elif scenario == "fused":
+        results = timed("read+process", data_processor.process_fused, input_handler.iter_raw_input_data())
+    elif scenario == "columnar":
+        batch = timed("read", TransactionBatch.from_file, file_path)
+        results = timed("process", data_processor.process_batch, batch)
+    elif scenario == "mmap":
+        results = timed("read+process", data_processor.process_scanned, input_handler.get_mmap_scanner())
+    elif scenario == "parallel":
+        results = timed("read+process", ParallelProcessor(file_path).process_data, data_processor)
+    else:
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+    output_handler = OutputHandler(results["account_summaries"],
+                                   results["suspicious_transactions"],
+                                   results["transaction_statistics"])
+    timed("write", output_handler.write_all_to_csv,
+          os.path.join(output_directory, f"{scenario}_account_summaries.csv"),
+          os.path.join(output_directory, f"{scenario}_suspicious_transactions.csv"),
+          os.path.join(output_directory, f"{scenario}_transaction_statistics.csv"))
+
+    rows = sum(statistic["transaction_count"] for statistic in results["transaction_statistics"].values())
+    total = sum(stages.values())
+    return {
+        "scenario": scenario,
+        "stages": stages,
+        "total_seconds": total,
+        "rows": rows,
+        "rows_per_second": rows / total if total else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_benchmark(file_path: str, scenarios: list, output_directory: str) -> list:
+    """Run each scenario in its own fresh process.
+
+    Args:
+        file_path (str): The input file.
+        scenarios (list): The scenario names to run, in order.
+        output_directory (str): Where the output CSV files are written.
+
+    Returns:
+        list: The result dictionary of each scenario (see run_scenario).
+    """
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for scenario in scenarios:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results.append(pool.submit(run_scenario, scenario, file_path, output_directory).result())
+    return results
+
+
+def format_report(results: list) -> str:
+    """Format benchmark results as a text table.
+
+    Args:
+        results (list): The result dictionaries returned by run_benchmark.
+
+    Returns:
+        str: One line per scenario.
+    """
+    lines = [f"{'scenario':<10} {'rows/s':>12} {'total s':>9} {'peak MiB':>9}  stages"]
+    for result in results:
+        stages = ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in result["stages"].items())
+        peak = "n/a" if result["peak_rss_mb"] is None else f"{result['peak_rss_mb']:.1f}"
+        lines.append(f"{result['scenario']:<10} {result['rows_per_second']:>12,.0f} "
+                     f"{result['total_seconds']:>9.3f} {peak:>9}  {stages}")
+    return "\n".join(lines)
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse the command line options of the benchmark.
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the transaction pipeline on synthetic data.")
+    parser.add_argument("--input", help="benchmark an existing file instead of generating one")
+    parser.add_argument("--rows", type=int, default=200000, help="number of generated transactions")
+    parser.add_argument("--accounts", type=int, default=10000, help="number of generated accounts")
+    parser.add_argument("--suspicious-ratio", type=float, default=0.01, help="fraction of suspicious rows")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON to PATH")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = arguments.input
+        if input_path is None:
+            input_path = os.path.join(directory, "synthetic.csv")
+            generator = TransactionGenerator(accounts=arguments.accounts,
+                                             suspicious_ratio=arguments.suspicious_ratio)
+            generator.write(input_path, arguments.rows)
+        benchmark_results = run_benchmark(input_path, arguments.scenarios, directory)
+
+    print(format_report(benchmark_results))
+    if arguments.json:
+        with open(arguments.json, "w") as json_file:
+            json.dump(benchmark_results, json_file, indent=2)
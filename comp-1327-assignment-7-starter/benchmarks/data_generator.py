@@ -0,0 +1,155 @@
+"""Module that generates synthetic transaction files for benchmarking the
+InputHandler -> DataProcessor -> OutputHandler pipeline
+
+Example:
+    python -m benchmarks.data_generator output/synthetic.csv --rows 1000000 --accounts 50000
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1.0.0"
+
+import argparse
+import csv
+import json
+import random
+from datetime import date, timedelta
+from typing import Iterator
+from data_processor.data_processor import DataProcessor
+
+# Column names of the generated rows, the same as input/input_data.csv
+FIELDNAMES = ["Transaction ID", "Account number", "Date", "Transaction type",
+              "Amount", "Currency", "Description"]
+
+DEFAULT_TYPE_WEIGHTS = {"deposit": 0.5, "withdrawal": 0.35, "transfer": 0.15}
+DEFAULT_CURRENCY_WEIGHTS = {"CAD": 0.8, "USD": 0.15, "EUR": 0.05}
+
+DESCRIPTIONS = {
+    "deposit": ["Salary", "Refund", "Car Sale", "Gift"],
+    "withdrawal": ["Groceries", "Rent", "Utilities", "Restaurant"],
+    "transfer": ["Transfer to Savings", "Transfer to Checking"],
+}
+
+
+class TransactionGenerator:
+    """Generate reproducible synthetic transactions.
+
+    Rows are suspicious (amount over DataProcessor.LARGE_TRANSACTION_THRESHOLD
+    or an uncommon currency) with probability suspicious_ratio, and not
+    suspicious otherwise, so the suspicious share of a file is controlled.
+    """
+
+    def __init__(self, accounts: int = 1000, type_weights: dict = None,
+                 currency_weights: dict = None, suspicious_ratio: float = 0.01,
+                 start_date: date = date(2023, 3, 1), days: int = 30, seed: int = 0):
+        """Initialize the generator.
+
+        Args:
+            accounts (int): The number of distinct account numbers.
+            type_weights (dict): Transaction type -> relative frequency.
+            currency_weights (dict): Relative frequency of the (common) currencies of non-suspicious rows.
+            suspicious_ratio (float): The fraction of rows that are suspicious.
+            start_date (date): The date of the first day.
+            days (int): The number of distinct days the dates are spread over.
+            seed (int): The random seed, the same seed always generates the same rows.
+        """
+        self.__accounts = accounts
+        self.__type_weights = type_weights or DEFAULT_TYPE_WEIGHTS
+        self.__currency_weights = currency_weights or DEFAULT_CURRENCY_WEIGHTS
+        self.__suspicious_ratio = suspicious_ratio
+        self.__dates = [(start_date + timedelta(days=offset)).isoformat() for offset in range(days)]
+        self.__seed = seed
+
+    def generate(self, rows: int) -> Iterator[dict]:
+        """Yield synthetic transactions with string values, like csv.DictReader.
+
+        Args:
+            rows (int): The number of transactions to generate.
+
+        Yields:
+            dict: A transaction keyed by FIELDNAMES.
+        """
+        generator = random.Random(self.__seed)
+        threshold = DataProcessor.LARGE_TRANSACTION_THRESHOLD
+        uncommon_currencies = sorted(DataProcessor.UNCOMMON_CURRENCIES)
+        transaction_types = list(self.__type_weights)
+        type_weights = list(self.__type_weights.values())
+        currencies = list(self.__currency_weights)
+        currency_weights = list(self.__currency_weights.values())
+        first_account = 1001
+
+        for transaction_id in range(1, rows + 1):
+            transaction_type = generator.choices(transaction_types, type_weights)[0]
+            currency = generator.choices(currencies, currency_weights)[0]
+            amount = round(generator.uniform(1, threshold), 2)
+
+            if generator.random() < self.__suspicious_ratio:
+                # Half of the suspicious rows are large, the other half use an uncommon currency
+                if generator.random() < 0.5:
+                    amount = round(generator.uniform(threshold + 1, threshold * 5), 2)
+                else:
+                    currency = generator.choice(uncommon_currencies)
+
+            yield {
+                "Transaction ID": str(transaction_id),
+                "Account number": str(first_account + generator.randrange(self.__accounts)),
+                "Date": generator.choice(self.__dates),
+                "Transaction type": transaction_type,
+                "Amount": f"{amount:.2f}",
+                "Currency": currency,
+                "Description": generator.choice(DESCRIPTIONS.get(transaction_type, ["Other"])),
+            }
+
+    def write(self, file_path: str, rows: int) -> None:
+        """Write synthetic transactions to a file.
+
+        The format is chosen from the extension: .json writes a JSON array,
+        .jsonl/.ndjson one object per line, anything else CSV.
+
+        Args:
+            file_path (str): The path of the file to write.
+            rows (int): The number of transactions to write.
+        """
+        file_format = file_path.split(".")[-1]
+        with open(file_path, "w", newline="") as output_file:
+            if file_format == "json":
+                output_file.write("[\n")
+                for index, transaction in enumerate(self.generate(rows)):
+                    output_file.write((",\n" if index else "") + json.dumps(transaction))
+                output_file.write("\n]\n")
+            elif file_format in ("jsonl", "ndjson"):
+                for transaction in self.generate(rows):
+                    output_file.write(json.dumps(transaction) + "\n")
+            else:
+                writer = csv.DictWriter(output_file, fieldnames=FIELDNAMES, lineterminator="\n")
+                writer.writeheader()
+                writer.writerows(self.generate(rows))
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse the command line options of the generator.
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description="Generate a synthetic transaction file.")
+    parser.add_argument("file_path", help="the file to write (.csv, .json, .jsonl or .ndjson)")
+    parser.add_argument("--rows", type=int, default=100000, help="number of transactions")
+    parser.add_argument("--accounts", type=int, default=1000, help="number of distinct accounts")
+    parser.add_argument("--suspicious-ratio", type=float, default=0.01, help="fraction of suspicious rows")
+    parser.add_argument("--types", type=json.loads, default=None,
+                        help='transaction type weights as JSON, e.g. \'{"deposit": 2, "withdrawal": 1}\'')
+    parser.add_argument("--currencies", type=json.loads, default=None,
+                        help='currency weights as JSON, e.g. \'{"CAD": 9, "USD": 1}\'')
+    parser.add_argument("--days", type=int, default=30, help="number of distinct dates")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    TransactionGenerator(accounts=arguments.accounts,
+                         type_weights=arguments.types,
+                         currency_weights=arguments.currencies,
+                         suspicious_ratio=arguments.suspicious_ratio,
+                         days=arguments.days,
+                         seed=arguments.seed).write(arguments.file_path, arguments.rows)
@@ -0,0 +1,296 @@
+"""
+Includes the AccountSummaries and TransactionStatistics classes, mergeable versions of the aggregates returned by
+DataProcessor.process_data that can be combined across runs, machines or days and stored in a compact binary format
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import os
+import struct
+from typing import Iterable
+from transaction.amounts import parse_minor_units, to_decimal
+
+#type tag and length prefix of the key (account number or transaction type) of every saved entry
+_KEY_HEADER = struct.Struct("<cH")
+
+#type tag of a saved key -> the type it is decoded to, JSON input gives int account numbers
+_KEY_TYPES = {b"s": str, b"i": int}
+_KEY_TAGS = {key_type: tag for tag, key_type in _KEY_TYPES.items()}
+
+#number of entries of a saved aggregate
+_ENTRY_COUNT = struct.Struct("<I")
+
+#decimal places of the minor units the amounts of a saved aggregate are in, _FLOAT_AMOUNTS if they are floats
+_AMOUNT_DIGITS = struct.Struct("<B")
+_FLOAT_AMOUNTS = 255
+
+
+class _MergeableAggregate:
+    """
+    base class of the aggregates: a dictionary of key -> dictionary of numeric fields, merged by adding the fields
+    of the entries with the same key. the dictionary is wrapped, not copied, so an aggregate can update the
+    dictionaries held by a DataProcessor in place. merging is associative and commutative (apart from float
+    rounding in the last digits), so partial results can be reduced in any tree shape
+    """
+
+    #first bytes of the binary format, set by the subclasses
+    MAGIC = b""
+
+    #the numeric fields of an entry, the ones holding amounts and the structs packing them with float amounts
+    #and with integer minor unit amounts, set by the subclasses
+    FIELDS = ()
+    AMOUNT_FIELDS = ()
+    VALUES = struct.Struct("")
+    FIXED_VALUES = struct.Struct("")
+
+    def __init__(self, entries: dict = None):
+        """
+        initializes the aggregate around a dictionary in the format DataProcessor.process_data returns
+
+        Args:
+            entries (dict): the entries, used as is (default: None, an empty dictionary)
+
+        Returns: None
+
+        Raises: None
+        """
+        self.entries = {} if entries is None else entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.entries == other.entries
+
+    def _new_entry(self, key: str) -> dict:
+        """
+        creates the entry of a key that has no transactions yet
+
+        Args:
+            key (str): the account number or transaction type
+
+        Returns:
+            dict: the empty entry
+
+        Raises: None
+        """
+        return dict.fromkeys(self.FIELDS, 0)
+
+    def update(self, other) -> "_MergeableAggregate":
+        """
+        merges another aggregate into this one in place, keys only in other are added after the existing ones in
+            other's order
+
+        Args:
+            other: an aggregate of the same type, or a dictionary in the same format
+
+        Returns:
+            _MergeableAggregate: this aggregate
+
+        Raises: None
+        """
+        entries = self.entries
+        fields = self.FIELDS
+        for key, other_entry in getattr(other, "entries", other).items():
+            entry = entries.get(key)
+            if entry is None:
+                entries[key] = dict(other_entry)
+            else:
+                for field in fields:
+                    entry[field] += other_entry[field]
+        return self
+
+    def merge(self, other) -> "_MergeableAggregate":
+        """
+        merges two aggregates into a new one, neither is changed
+
+        Args:
+            other: an aggregate of the same type, or a dictionary in the same format
+
+        Returns:
+            _MergeableAggregate: the merged aggregate
+
+        Raises: None
+        """
+        return self.copy().update(other)
+
+    def copy(self) -> "_MergeableAggregate":
+        """
+        copies the aggregate and every one of its entries
+
+        Args: None
+
+        Returns:
+            _MergeableAggregate: the copy
+
+        Raises: None
+        """
+        return type(self)({key: dict(entry) for key, entry in self.entries.items()})
+
+    @classmethod
+    def merge_all(cls, aggregates: Iterable) -> "_MergeableAggregate":
+        """
+        reduces many aggregates pairwise, as a balanced tree, the way partial results from many nodes are combined
+
+        Args:
+            aggregates (Iterable): aggregates of this type or dictionaries in the same format, in input order
+
+        Returns:
+            _MergeableAggregate: the merged aggregate, empty if there were none
+
+        Raises: None
+        """
+        level = [aggregate if isinstance(aggregate, cls) else cls(aggregate) for aggregate in aggregates]
+        if not level:
+            return cls()
+        while len(level) > 1:
+            level = [level[index].merge(level[index + 1]) if index + 1 < len(level) else level[index]
+                     for index in range(0, len(level), 2)]
+        return level[0].copy()
+
+    def to_bytes(self, amount_digits: int = None) -> bytes:
+        """
+        serializes the aggregate: MAGIC, the number of entries, the decimal places of the amounts, then for each
+            entry its key as UTF-8 text with a 1 byte type tag (str or int) and a 2 byte length prefix, followed by
+            its packed numeric fields, all little endian
+
+        Args:
+            amount_digits (int): if given, the amounts (Decimal, as DataProcessor returns them in fixed-point mode)
+                are saved exactly as 8 byte integers of minor units with this many decimal places instead of as
+                doubles (default: None)
+
+        Returns:
+            bytes: the serialized aggregate
+
+        Raises:
+            struct.error: if a key is longer than 65535 bytes or an amount does not fit in 8 bytes
+            TypeError: if a key is neither a str nor an int
+            ValueError: if an amount is not a number or amount_digits is not between 0 and 254
+        """
+        key_header = _KEY_HEADER.pack
+        fields = self.FIELDS
+        pack_values = self.VALUES.pack
+        amount_fields = ()
+        if amount_digits is not None:
+            if not 0 <= amount_digits < _FLOAT_AMOUNTS:
+                raise ValueError(f"Invalid amount digits: {amount_digits}")
+            pack_values = self.FIXED_VALUES.pack
+            amount_fields = self.AMOUNT_FIELDS
+        parts = [self.MAGIC, _ENTRY_COUNT.pack(len(self.entries)),
+                 _AMOUNT_DIGITS.pack(_FLOAT_AMOUNTS if amount_digits is None else amount_digits)]
+        for key, entry in self.entries.items():
+            tag = _KEY_TAGS.get(type(key))
+            if tag is None:
+                raise TypeError(f"Cannot serialize a key of type {type(key).__name__}: {key!r}")
+            encoded_key = str(key).encode("utf-8")
+            parts.append(key_header(tag, len(encoded_key)))
+            parts.append(encoded_key)
+            parts.append(pack_values(*(parse_minor_units(entry[field], amount_digits) if field in amount_fields
+                                       else entry[field] for field in fields)))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "_MergeableAggregate":
+        """
+        deserializes an aggregate written by to_bytes
+
+        Args:
+            data (bytes): the serialized aggregate
+
+        Returns:
+            _MergeableAggregate: the aggregate, with Decimal amounts if they were saved as minor units
+
+        Raises:
+            ValueError: if the data is not a serialized aggregate of this type or is truncated
+        """
+        if data[:len(cls.MAGIC)] != cls.MAGIC:
+            raise ValueError(f"Not a serialized {cls.__name__}")
+        aggregate = cls()
+        try:
+            offset = len(cls.MAGIC)
+            (count,) = _ENTRY_COUNT.unpack_from(data, offset)
+            offset += _ENTRY_COUNT.size
+            (amount_digits,) = _AMOUNT_DIGITS.unpack_from(data, offset)
+            offset += _AMOUNT_DIGITS.size
+            values_struct = cls.VALUES if amount_digits == _FLOAT_AMOUNTS else cls.FIXED_VALUES
+            amount_fields = cls.AMOUNT_FIELDS if amount_digits != _FLOAT_AMOUNTS else ()
+            for _ in range(count):
+                tag, length = _KEY_HEADER.unpack_from(data, offset)
+                offset += _KEY_HEADER.size
+                key_type = _KEY_TYPES.get(tag)
+                if key_type is None:
+                    raise ValueError(f"Invalid key type in {cls.__name__}")
+                key = key_type(bytes(data[offset:offset + length]).decode("utf-8"))
+                offset += length
+                values = values_struct.unpack_from(data, offset)
+                offset += values_struct.size
+                entry = aggregate._new_entry(key)
+                entry.update((field, to_decimal(value, amount_digits) if field in amount_fields else value)
+                             for field, value in zip(cls.FIELDS, values))
+                aggregate.entries[key] = entry
+        except struct.error as error:
+            raise ValueError(f"Truncated {cls.__name__}") from error
+        return aggregate
+
+    def save(self, file_path: str, amount_digits: int = None) -> None:
+        """
+        writes the aggregate to a file (e.g. a daily rollup) with to_bytes, atomically
+
+        Args:
+            file_path (str): the path of the file to write
+            amount_digits (int): see to_bytes (default: None)
+
+        Returns: None
+
+        Raises: None
+        """
+        temporary_path = file_path + ".tmp"
+        with open(temporary_path, "wb") as output_file:
+            output_file.write(self.to_bytes(amount_digits))
+        os.replace(temporary_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> "_MergeableAggregate":
+        """
+        reads an aggregate written by save
+
+        Args:
+            file_path (str): the path of the file to read
+
+        Returns:
+            _MergeableAggregate: the aggregate
+
+        Raises:
+            FileNotFoundError: if the file does not exist
+            ValueError: if the file is not a saved aggregate of this type
+        """
+        with open(file_path, "rb") as input_file:
+            return cls.from_bytes(input_file.read())
+
+
+class AccountSummaries(_MergeableAggregate):
+    """
+    the account summaries (account number -> account_number, balance, total_deposits and total_withdrawals)
+    """
+
+    MAGIC = b"ACCTSUM3"
+    FIELDS = ("balance", "total_deposits", "total_withdrawals")
+    AMOUNT_FIELDS = FIELDS
+    VALUES = struct.Struct("<3d")
+    FIXED_VALUES = struct.Struct("<3q")
+
+    def _new_entry(self, key: str) -> dict:
+        return {"account_number": key, "balance": 0, "total_deposits": 0, "total_withdrawals": 0}
+
+
+class TransactionStatistics(_MergeableAggregate):
+    """
+    the transaction statistics (transaction type -> total_amount and transaction_count)
+    """
+
+    MAGIC = b"TXSTATS3"
+    FIELDS = ("total_amount", "transaction_count")
+    AMOUNT_FIELDS = ("total_amount",)
+    VALUES = struct.Struct("<dQ")
+    FIXED_VALUES = struct.Struct("<qQ")
@@ -0,0 +1,249 @@
+"""
+Includes the CheckpointStore class, which saves the DataProcessor's aggregates and how far into an append-only
+input file they go, so a rerun only has to process the rows added since
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import hashlib
+import json
+import os
+from decimal import Decimal
+from os import path
+from data_processor.data_processor import DataProcessor
+from data_processor.sketches import TransactionSketches
+from data_processor.time_buckets import TimeBucketedStatistics
+from input_handler.input_handler import InputHandler
+from transaction.transaction import Transaction
+
+class CheckpointStore:
+    """
+    persists a checkpoint (aggregates, byte offset and last Transaction ID consumed) for one CSV input file
+    as a JSON file, and resumes processing from it
+    """
+
+    #bumped whenever the saved format changes, checkpoints with another version are ignored
+    FORMAT_VERSION = 1
+
+    #how many bytes before the saved offset are hashed to detect a rewritten (not appended to) input file
+    FINGERPRINT_SIZE = 4096
+
+    #how many bytes are read at a time while looking back for the end of the last complete line
+    LINE_SEARCH_SIZE = 65536
+
+    def __init__(self, checkpoint_path: str):
+        """
+        initializes the class with the path of the checkpoint file
+
+        Args:
+            checkpoint_path (str): where the checkpoint is saved, it is created on the first save
+
+        Returns: None
+
+        Raises: None
+        """
+        self.__checkpoint_path = checkpoint_path
+
+    @property
+    def checkpoint_path(self) -> str:
+        """
+        accessor for the checkpoint file path
+
+        Args: None
+
+        Returns:
+            str: the path of the checkpoint file
+
+        Raises: None
+        """
+        return self.__checkpoint_path
+
+    def load(self) -> dict:
+        """
+        reads the saved checkpoint
+
+        Args: None
+
+        Returns:
+            dict: the checkpoint state, or None if there is no checkpoint or it was saved in another format
+
+        Raises: None
+        """
+        if not path.isfile(self.__checkpoint_path):
+            return None
+        with open(self.__checkpoint_path, "r") as checkpoint_file:
+            state = json.load(checkpoint_file)
+        return state if state.get("version") == self.FORMAT_VERSION else None
+
+    def save(self, state: dict) -> None:
+        """
+        writes the checkpoint, replacing the old one atomically so a crash never leaves a half written file
+
+        Args:
+            state (dict): the checkpoint state (see process_new_rows)
+
+        Returns: None
+
+        Raises: None
+        """
+        temporary_path = self.__checkpoint_path + ".tmp"
+        with open(temporary_path, "w") as checkpoint_file:
+            json.dump(dict(state, version = self.FORMAT_VERSION), checkpoint_file, default = _to_json)
+        os.replace(temporary_path, self.__checkpoint_path)
+
+    def clear(self) -> None:
+        """
+        deletes the checkpoint so the next run starts from the beginning of the file
+
+        Args: None
+
+        Returns: None
+
+        Raises: None
+        """
+        if path.isfile(self.__checkpoint_path):
+            os.remove(self.__checkpoint_path)
+
+    def process_new_rows(self, file_path: str, data_processor: DataProcessor) -> dict:
+        """
+        restores the saved aggregates into data_processor, processes only the rows appended to the CSV file
+            since the checkpoint with the fused pipeline, then saves the new checkpoint. only complete lines
+            (ending in a newline) are processed, so a row the writer is still appending is left for the next run.
+            if the file was rewritten instead of appended to (it is shorter, or the bytes before the offset
+            changed) the checkpoint is ignored and the whole file is processed. the same happens with rules that
+            depend on the order of the transactions (velocity rules): their per account state is not saved, so
+            resuming would restart their windows and daily counts part way through the file
+
+        Args:
+            file_path (str): the path of the append-only CSV input file
+            data_processor (DataProcessor): the processor to restore and fill, normally a new, empty one
+
+        Returns:
+            dict: the aggregates covering the whole file, in the same format as DataProcessor.process_data
+
+        Raises:
+            FileNotFoundError: if the input file does not exist
+            ValueError: if the input file is not a CSV file
+        """
+        input_handler = InputHandler(file_path)
+        if input_handler.get_file_format() != "csv":
+            raise ValueError(f"Checkpoints only support CSV files: {file_path}")
+
+        #the range of the file after the header, captured before reading so rows appended meanwhile wait for the next run
+        body_ranges = input_handler.get_csv_byte_ranges(1)
+        body_start, file_size = body_ranges[0] if body_ranges else (path.getsize(file_path),) * 2
+
+        state = self.load()
+        start = body_start
+        last_transaction_id = None
+        if state is not None and data_processor.rules.is_order_dependent:
+            data_processor.logger.warning("Velocity rules can't resume from a checkpoint, processing the whole file %s",
+                                          file_path)
+        elif state is not None and self.__is_valid_for(state, file_path, file_size, data_processor):
+            data_processor.merge_results(state["results"], log_suspicious = False)
+            start = max(state["offset"], body_start)
+            last_transaction_id = state["last_transaction_id"]
+            data_processor.logger.info("Resuming %s from byte %d", file_path, start)
+        elif state is not None:
+            data_processor.logger.warning("Checkpoint does not match %s, processing the whole file", file_path)
+
+        def remember_last_id(rows):
+            """Pass the rows through, keeping the ID of the last one."""
+            nonlocal last_transaction_id
+            for row in rows:
+                last_transaction_id = row.get("Transaction ID", last_transaction_id)
+                yield row
+
+        #stops after the last complete line, a partial last line is read again once it is complete
+        end = self.__last_line_end(file_path, start, file_size)
+        results = data_processor.process_fused(remember_last_id(input_handler.iter_raw_csv_range(start, end)))
+
+        self.save({
+            "file_path": path.abspath(file_path),
+            "offset": end,
+            "fingerprint": self.__fingerprint(file_path, end),
+            "last_transaction_id": last_transaction_id,
+            "amount_digits": data_processor.amount_digits,
+            "fx_rates": None if data_processor.fx_rates is None else data_processor.fx_rates.to_dict(),
+            "results": results
+        })
+        return results
+
+    def __is_valid_for(self, state: dict, file_path: str, file_size: int, data_processor: DataProcessor) -> bool:
+        """
+        checks that a checkpoint was saved for this file, with data_processor's amount type, FX rates, sketches
+            and time buckets, and that the file has only been appended to since
+
+        Args:
+            state (dict): the loaded checkpoint
+            file_path (str): the input file path
+            file_size (int): the current size of the input file
+            data_processor (DataProcessor): the processor the checkpoint would be restored into
+
+        Returns:
+            bool: True if processing can resume from the checkpoint's offset
+
+        Raises: None
+        """
+        return (state["file_path"] == path.abspath(file_path)
+                and state["offset"] <= file_size
+                and state.get("amount_digits") == data_processor.amount_digits
+                and state.get("fx_rates") == (None if data_processor.fx_rates is None else data_processor.fx_rates.to_dict())
+                and ("transaction_sketches" in state["results"]) == (data_processor.sketches is not None)
+                and ("time_buckets" in state["results"]) == (data_processor.time_buckets is not None)
+                and state["fingerprint"] == self.__fingerprint(file_path, state["offset"]))
+
+    def __last_line_end(self, file_path: str, start: int, end: int) -> int:
+        """
+        finds the end of the last complete line between two offsets, searching back from end
+
+        Args:
+            file_path (str): the input file path
+            start (int): the offset of the first line, a line boundary
+            end (int): the offset the search starts back from, e.g. the file size
+
+        Returns:
+            int: the offset just after the last newline before end, or start if there is none
+
+        Raises: None
+        """
+        with open(file_path, "rb") as input_file:
+            while end > start:
+                block_start = max(start, end - self.LINE_SEARCH_SIZE)
+                input_file.seek(block_start)
+                newline = input_file.read(end - block_start).rfind(b"\n")
+                if newline >= 0:
+                    return block_start + newline + 1
+                end = block_start
+        return start
+
+    def __fingerprint(self, file_path: str, offset: int) -> str:
+        """
+        hashes the bytes just before an offset
+
+        Args:
+            file_path (str): the input file path
+            offset (int): the end of the hashed bytes
+
+        Returns:
+            str: the hex digest
+
+        Raises: None
+        """
+        start = max(0, offset - self.FINGERPRINT_SIZE)
+        with open(file_path, "rb") as input_file:
+            input_file.seek(start)
+            return hashlib.sha256(input_file.read(offset - start)).hexdigest()
+
+
+def _to_json(value):
+    """Serializes the values json does not support natively (Transaction records, fixed-point Decimal amounts,
+    sketches and time buckets)."""
+    if isinstance(value, Transaction):
+        return value.to_dict()
+    if isinstance(value, (TransactionSketches, TimeBucketedStatistics)):
+        return value.to_dict()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
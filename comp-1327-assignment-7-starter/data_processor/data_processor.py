@@ -6,6 +6,21 @@ __author__ = "D Synkiw"
 __version__ = "1.0"
 
 import logging
+import queue
+from functools import partial
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Iterable
+from data_processor.aggregates import AccountSummaries, TransactionStatistics
+from data_processor.fx_rates import FxRateTable
+from data_processor.results_index import ResultsIndex
+from data_processor.rules import SuspiciousTransactionRules
+from data_processor.sketches import TransactionSketches
+from data_processor.time_buckets import TimeBucketedStatistics
+from data_processor.transaction_batch import TransactionBatch
+from input_handler.input_handler import InputHandler
+from input_handler.mmap_scanner import MmapCsvScanner
+from metrics.pipeline_metrics import PipelineMetrics
+from transaction.amounts import parse_minor_units, to_decimal
 
 class DataProcessor:
     """
@@ -13,23 +28,53 @@ class DataProcessor:
     updates the transaction statistics, and gets the average transaction amount
     """
     
-    #the threshhold for what transactions are labelled as suspicious
+    #the threshhold for what transactions are labelled as suspicious, used when no rules are given
     LARGE_TRANSACTION_THRESHOLD = 10000
 
-    #if the currency is one of these labels the transaction will be flagged as suspicious
-    UNCOMMON_CURRENCIES = ["XRP", "LTC"]
+    #if the currency is one of these labels the transaction will be flagged as suspicious, used when no rules are given
+    UNCOMMON_CURRENCIES = frozenset(["XRP", "LTC"])
 
 
-    def __init__(self, transactions: list, logging_level = "WARNING", logging_format = "%(asctime)s - %(levelname)s - %(message)s", logging_file = ""):
+    def __init__(self, transactions: Iterable, logging_level = "WARNING", logging_format = "%(asctime)s - %(levelname)s - %(message)s", logging_file = "",
+                 log_every: int = 1, background_logging: bool = False, metrics: PipelineMetrics = None,
+                 suspicious_sink: Callable = None, rules: SuspiciousTransactionRules = None, amount_digits: int = None,
+                 sketches: bool = False, time_buckets: bool = False, fx_rates: FxRateTable = None):
         """
         initializes the the class, takes a list of transactions as an argument, creating the variables for the class
         also sets the default parameters for logging.
+        transactions may also be any iterable (e.g. InputHandler.iter_input_data()), in which case process_data
+        consumes it in a single streaming pass
         
         Args:
-            transactions (list): list of all the transactions from a csv or json file 
+            transactions (Iterable): list (or any iterable) of all the transactions from a csv or json file, as
+                dictionaries or Transaction records 
             logging_level (str): the default logging level for the class (default: "WARNING")
             logging_format (str): the default logging format for the class (default: "%(asctime)s - %(levelname)s - %(message)s")
             logging_file (str): the default name for the logging file for the class (default: "")
+            log_every (int): only every Nth per transaction info log is written, the others are skipped before
+                their message is built (default: 1, every transaction)
+            background_logging (bool): if True, log records are handed to a queue and written to the log handlers
+                by a background thread, call close() when done to flush them (default: False)
+            metrics (PipelineMetrics): optional metrics that count the transactions processed and, for the
+                modes that validate rows themselves, the rows read and rejected (default: None)
+            suspicious_sink (Callable): if given, every flagged transaction is passed to this callable as soon as it
+                is detected (e.g. a CsvSuspiciousSink) instead of being kept in suspicious_transactions, so memory
+                stays constant however many transactions are flagged (default: None)
+            rules (SuspiciousTransactionRules): the rules flagging suspicious transactions, compiled once here
+                (default: None, LARGE_TRANSACTION_THRESHOLD and UNCOMMON_CURRENCIES)
+            amount_digits (int): if given, fixed-point mode: amounts are parsed from their text to integer minor units
+                with this many decimal places (2 for cents) and summed as integers, so totals are exact. the
+                aggregates are returned as Decimal values (default: None, amounts are floats)
+            sketches (bool): if True, fixed memory sketches of the amounts and accounts of every transaction type
+                are kept alongside the statistics, for percentiles and distinct account counts (see
+                get_transaction_amount_quantile and get_distinct_account_count) (default: False)
+            time_buckets (bool): if True the totals and counts of every day are kept per transaction type and per
+                account, for daily, weekly and monthly statistics (see get_time_bucketed_statistics) (default: False)
+            fx_rates (FxRateTable): if given, every amount is converted to the table's reporting currency before it
+                is aggregated or checked against the rules, so balances, totals and thresholds are all in that
+                currency. flagged transactions keep their original amount and currency, and transactions whose
+                currency has no rate are skipped and counted as "no_fx_rate" rejections in every processing mode
+                (default: None, amounts are used as is whatever their currency)
             
         Returns: None
         
@@ -43,17 +88,51 @@ class DataProcessor:
         
         self.logger = logging.getLogger(__name__)
         
+        #per transaction info logs are sampled, see __should_log
+        self.__log_every = max(1, int(log_every))
+        self.__log_counts = {"account_summary": 0, "transaction_statistics": 0}
+        
+        self.__metrics = metrics
+        
+        #queue handler and the listener thread writing its records (see start_background_logging)
+        self.__queue_handler = None
+        self.__log_listener = None
+        if background_logging:
+            self.start_background_logging()
+        
         self.__transactions = transactions
         
         #dictionary of all of the accounts and their account number, balances, withdrawels, and deposits (see update_account_summary)
         self.__account_summaries = {}
         
-        #list of any transactions that are labelled suspicious (see check_suspicious_transactions)
+        #list of any transactions that are labelled suspicious (see check_suspicious_transactions), stays empty
+        #when they are streamed to the suspicious sink instead
         self.__suspicious_transactions = []
+        self.__suspicious_sink = suspicious_sink
+        
+        #how many transactions have been labelled suspicious, whether they were kept or streamed
+        self.__suspicious_count = 0
+        
+        #converts an Amount value to the type the aggregates are kept in
+        self.__amount_digits = amount_digits
+        self.__parse_amount = float if amount_digits is None else partial(parse_minor_units, digits = amount_digits)
+        
+        #converts amounts to the reporting currency, only when a rate table is given
+        self.__fx_rates = fx_rates
+        
+        #in fixed-point mode the rules' amount limits are scaled to minor units once, here
+        self.__rules = rules or SuspiciousTransactionRules(self.LARGE_TRANSACTION_THRESHOLD, self.UNCOMMON_CURRENCIES)
+        self.__compiled_rules = self.__rules.compile(1 if amount_digits is None else 10 ** amount_digits)
         
         #saves a dictionary of all transactions under an account, keeping a total amount of money in an account
         #and how many transactions are made(see update_transaction_statistics)
         self.__transaction_statistics = {}
+        
+        #approximate percentiles and distinct accounts per transaction type, only kept when asked for
+        self.__sketches = TransactionSketches() if sketches else None
+        
+        #daily totals per transaction type and account, only kept when asked for
+        self.__time_buckets = TimeBucketedStatistics(integer_amounts = amount_digits is not None) if time_buckets else None
 
     @property
     def input_data(self) -> list:
@@ -77,12 +156,13 @@ class DataProcessor:
         Args: None
         
         Returns
-            dict: a dictionary of the account summary(initialized as an empty dict)
+            dict: a dictionary of the account summary(initialized as an empty dict), in fixed-point mode a copy
+                with Decimal amounts
             
         Raises: None
         
         """
-        return self.__account_summaries
+        return self.__export(self.__account_summaries, AccountSummaries.FIELDS)
     
     @property
     def suspicious_transactions(self) -> list:
@@ -98,6 +178,35 @@ class DataProcessor:
         """
         return self.__suspicious_transactions
     
+    @property
+    def rules(self) -> SuspiciousTransactionRules:
+        """
+        accessor for the suspicious transaction rules
+        
+        Args: None
+        
+        Returns:
+            SuspiciousTransactionRules: the rules flagging suspicious transactions
+            
+        Raises: None
+        """
+        return self.__rules
+    
+    @property
+    def suspicious_count(self) -> int:
+        """
+        accessor for the number of transactions labelled suspicious so far, including the ones streamed to the
+            suspicious sink
+        
+        Args: None
+        
+        Returns:
+            int: the number of suspicious transactions
+            
+        Raises: None
+        """
+        return self.__suspicious_count
+    
     @property
     def transaction_statistics(self) -> dict:
         """
@@ -106,10 +215,284 @@ class DataProcessor:
         Args: None
         
         Returns:
-            dict: dictionary of the transaction statistics(initailized as an empty dict)
+            dict: dictionary of the transaction statistics(initailized as an empty dict), in fixed-point mode a copy
+                with Decimal amounts
         Raises: None
         """
-        return self.__transaction_statistics
+        return self.__export(self.__transaction_statistics, ("total_amount",))
+
+    @property
+    def amount_digits(self) -> int:
+        """
+        accessor for the decimal places of the minor units amounts are summed in
+        
+        Args: None
+        
+        Returns:
+            int: the number of decimal places, or None if amounts are summed as floats
+        Raises: None
+        """
+        return self.__amount_digits
+
+    def __export(self, entries: dict, amount_fields: tuple) -> dict:
+        """
+        converts aggregates kept in minor units to Decimal amounts, aggregates kept as floats are returned as is
+        
+        Args:
+            entries (dict): the account summaries or transaction statistics
+            amount_fields (tuple): the fields of an entry holding amounts
+        
+        Returns:
+            dict: the aggregates with the amount fields as Decimal values
+        
+        Raises: None
+        """
+        digits = self.__amount_digits
+        if digits is None:
+            return entries
+        return {
+            key: dict(entry, **{field: to_decimal(entry[field], digits) for field in amount_fields})
+            for key, entry in entries.items()
+        }
+
+    def __import(self, entries, amount_fields: tuple) -> dict:
+        """
+        converts partial aggregates with Decimal, text or float amounts (see __export) back to minor units
+        
+        Args:
+            entries: the account summaries or transaction statistics, a dictionary or a mergeable aggregate
+            amount_fields (tuple): the fields of an entry holding amounts
+        
+        Returns:
+            dict: the aggregates with the amount fields in minor units, or entries as is if amounts are floats
+        
+        Raises:
+            ValueError: if an amount is not a number
+        """
+        digits = self.__amount_digits
+        if digits is None:
+            return entries
+        return {
+            key: dict(entry, **{field: parse_minor_units(entry[field], digits) for field in amount_fields})
+            for key, entry in getattr(entries, "entries", entries).items()
+        }
+
+    @property
+    def metrics(self) -> PipelineMetrics:
+        """
+        accessor for the metrics the processing counts are recorded in
+        
+        Args: None
+        
+        Returns:
+            PipelineMetrics: the metrics, or None if none were given
+        
+        Raises: None
+        """
+        return self.__metrics
+
+    @property
+    def fx_rates(self) -> FxRateTable:
+        """
+        accessor for the rates amounts are converted to the reporting currency with
+        
+        Args: None
+        
+        Returns:
+            FxRateTable: the rate table, or None if amounts are not converted
+        
+        Raises: None
+        """
+        return self.__fx_rates
+
+    def __amount(self, transaction: dict):
+        """
+        parses the amount of a transaction to the aggregates' type, converted to the reporting currency when
+            there is a rate table
+        
+        Args:
+            transaction (dict): the transaction
+        
+        Returns:
+            the amount, a float or integer minor units
+        
+        Raises:
+            ValueError: if the amount is not a number, or its currency has no rate
+        """
+        amount = self.__parse_amount(transaction["Amount"])
+        if self.__fx_rates is None:
+            return amount
+        return self.__fx_rates.convert(amount, transaction.get("Currency"), transaction.get("Date"))
+
+    def __has_fx_rate(self, transaction: dict) -> bool:
+        """
+        checks that the currency (and date, for dated rates) of a transaction has a rate in the rate table
+        
+        Args:
+            transaction (dict): the transaction
+        
+        Returns:
+            bool: True if the amount can be converted
+        
+        Raises: None
+        """
+        try:
+            self.__fx_rates.rate(transaction.get("Currency"), transaction.get("Date"))
+        except (ValueError, TypeError):
+            return False
+        return True
+
+    def __record_no_fx_rate(self, rejected: int) -> None:
+        """
+        counts the rows skipped because their currency has no FX rate, the same way in every mode
+        
+        Args:
+            rejected (int): the number of skipped rows
+        
+        Returns: None
+        
+        Raises: None
+        """
+        if not rejected:
+            return
+        if self.__metrics is not None:
+            self.__metrics.record_rejection("no_fx_rate", rejected)
+        self.logger.info("%d rows rejected without an FX rate", rejected)
+
+    @property
+    def sketches(self) -> TransactionSketches:
+        """
+        accessor for the amount quantile and distinct account sketches
+        
+        Args: None
+        
+        Returns:
+            TransactionSketches: the sketches, or None if they are not kept (see __init__)
+        
+        Raises: None
+        """
+        return self.__sketches
+
+    @property
+    def time_buckets(self) -> TimeBucketedStatistics:
+        """
+        accessor for the daily totals per transaction type and account
+        
+        Args: None
+        
+        Returns:
+            TimeBucketedStatistics: the time buckets, or None if they are not kept (see __init__)
+        
+        Raises: None
+        """
+        return self.__time_buckets
+
+    @property
+    def results(self) -> dict:
+        """
+        accessor for the dictionary returned by the processing methods
+        
+        Args: None
+        
+        Returns:
+            dict: returns account_summaries, suspicious_transactions, and transaction statistics as the keys 
+                and the output of their respective methods as the values of a dictionary, plus
+                transaction_sketches and time_buckets when they are kept
+        
+        Raises: None
+        """
+        results = {
+            "account_summaries": self.account_summaries,
+            "suspicious_transactions": self.__suspicious_transactions,
+            "transaction_statistics": self.transaction_statistics
+        }
+        if self.__sketches is not None:
+            results["transaction_sketches"] = self.__sketches
+        if self.__time_buckets is not None:
+            results["time_buckets"] = self.__time_buckets
+        return results
+
+    def start_background_logging(self) -> None:
+        """
+        moves log writing off the processing thread: the logger's records are put on a queue and a
+            QueueListener thread passes them to the root logger's handlers (e.g. the logging file)
+        
+        Args: None
+        
+        Returns: None
+        
+        Raises: None
+        """
+        if self.__log_listener is not None:
+            return
+        
+        log_queue = queue.SimpleQueue()
+        self.__queue_handler = QueueHandler(log_queue)
+        self.__log_listener = QueueListener(log_queue, *logging.getLogger().handlers, respect_handler_level = True)
+        self.logger.addHandler(self.__queue_handler)
+        self.logger.propagate = False
+        self.__log_listener.start()
+
+    def close(self) -> None:
+        """
+        stops background logging (if it was started), writing out every queued log record first
+        
+        Args: None
+        
+        Returns: None
+        
+        Raises: None
+        """
+        if self.__log_listener is None:
+            return
+        
+        self.__log_listener.stop()
+        self.logger.removeHandler(self.__queue_handler)
+        self.logger.propagate = True
+        self.__queue_handler = None
+        self.__log_listener = None
+
+    def __enter__(self) -> "DataProcessor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __should_log(self, kind: str) -> bool:
+        """
+        decides if a per transaction info log should be written, checking the level first so nothing is
+            counted or formatted when INFO is disabled, then keeping only every log_every-th log of each kind
+        
+        Args:
+            kind (str): the kind of log, one of the __log_counts keys
+        
+        Returns:
+            bool: True if the log should be written
+        
+        Raises: None
+        """
+        if not self.logger.isEnabledFor(logging.INFO):
+            return False
+        self.__log_counts[kind] += 1
+        return self.__log_counts[kind] % self.__log_every == 0
+
+    def __log_summary(self, processed: int) -> None:
+        """
+        writes one info log summarizing a processing run instead of one per transaction
+        
+        Args:
+            processed (int): how many transactions the run processed
+        
+        Returns: None
+        
+        Raises: None
+        """
+        if self.__metrics is not None:
+            self.__metrics.increment("rows_processed", processed)
+            self.__metrics.set("suspicious_transactions", self.__suspicious_count)
+        self.logger.info("Data Processing Complete: %d transactions processed, %d accounts, %d transaction types, %d suspicious transactions",
+                         processed, len(self.__account_summaries), len(self.__transaction_statistics),
+                         self.__suspicious_count)
 
     def process_data(self) -> dict:
         """
@@ -124,18 +507,376 @@ class DataProcessor:
         Raises: None
         """
         
-        #runs these three methods for every transaction within the transactions list
-        for transaction in self.__transactions:
+        return self.process_transactions(self.__transactions)
+
+    def process_transactions(self, transactions: Iterable) -> dict:
+        """
+        streaming mode: folds any iterable of transactions (list, generator, csv reader...) into the aggregates
+            one transaction at a time, so nothing but the aggregates is held in memory. can be called more than
+            once to keep adding transactions to the same aggregates. transactions whose currency has no FX rate
+            are skipped and counted, as in every other mode
+        
+        Args:
+            transactions (Iterable): any iterable of transaction dictionaries
+        
+        Returns:
+            dict: returns account_summaries, suspicious_transactions, and transaction statistics as the keys 
+                and the output of their respective methods as the values of a dictionary
+        
+        Raises: None
+        """
+        
+        #runs these three methods for every transaction within the transactions iterable
+        fx_rates = self.__fx_rates
+        processed = rejected = 0
+        for transaction in transactions:
+            if fx_rates is not None and not self.__has_fx_rate(transaction):
+                rejected += 1
+                continue
             self.update_account_summary(transaction)
             self.check_suspicious_transactions(transaction)
             self.update_transaction_statistics(transaction)
+            processed += 1
 
-        self.logger.info("Data Processing Complete")
-        return {
-            "account_summaries": self.__account_summaries,
-            "suspicious_transactions": self.__suspicious_transactions,
-            "transaction_statistics": self.__transaction_statistics
-        }
+        self.__record_no_fx_rate(rejected)
+        self.__log_summary(processed)
+        return self.results
+
+    def process_fused(self, rows: Iterable) -> dict:
+        """
+        fused pipeline: parses, validates and aggregates every raw row (e.g. InputHandler.iter_raw_input_data())
+            in one pass, the amount is converted once per row and the account summary, suspicious check and
+            statistics are all updated inline instead of through three method calls. rows that fail
+            InputHandler's validation rules, or whose currency has no FX rate, are skipped and counted. per
+            transaction info logs are not written, only one summary line at the end
+        
+        Args:
+            rows (Iterable): any iterable of unvalidated transaction dictionaries
+        
+        Returns:
+            dict: returns account_summaries, suspicious_transactions, and transaction statistics as the keys 
+                and the output of their respective methods as the values of a dictionary
+        
+        Raises: None
+        """
+        
+        #binds everything used in the loop to local variables
+        account_summaries = self.__account_summaries
+        transaction_statistics = self.__transaction_statistics
+        suspicious_transactions = self.__suspicious_transactions
+        flag_suspicious = self.__suspicious_sink or suspicious_transactions.append
+        get_threshold = self.__compiled_rules.thresholds.get
+        default_threshold = self.__compiled_rules.default_threshold
+        extra_check = self.__compiled_rules.extra_check
+        parse_amount = self.__parse_amount
+        convert = None if self.__fx_rates is None else self.__fx_rates.convert
+        add_to_sketches = None if self.__sketches is None else self.__sketches.add
+        add_to_time_buckets = None if self.__time_buckets is None else self.__time_buckets.add
+        valid_transaction_types = InputHandler.VALID_TRANSACTION_TYPES
+        metrics = self.__metrics
+        processed = rejected = flagged = 0
+
+        for row in rows:
+            #parses the typed record once: (account number, transaction type, amount)
+            #the type lookup is in the try too, a JSON row can hold an unhashable value (list, object)
+            try:
+                amount = parse_amount(row["Amount"])
+                transaction_type = row["Transaction type"]
+                account_number = row["Account number"]
+                valid = amount >= 0 and transaction_type in valid_transaction_types
+            except (KeyError, ValueError, TypeError):
+                valid = False
+            if not valid:
+                rejected += 1
+                if metrics is not None:
+                    metrics.record_rejection(InputHandler.rejection_reason(row))
+                continue
+            if convert is not None:
+                try:
+                    amount = convert(amount, row.get("Currency"), row.get("Date"))
+                except (ValueError, TypeError):
+                    rejected += 1
+                    if metrics is not None:
+                        metrics.record_rejection("no_fx_rate")
+                    continue
+            processed += 1
+
+            #account summary
+            summary = account_summaries.get(account_number)
+            if summary is None:
+                summary = account_summaries[account_number] = {
+                    "account_number": account_number,
+                    "balance": 0,
+                    "total_deposits": 0,
+                    "total_withdrawals": 0
+                }
+            if transaction_type == "deposit":
+                summary["balance"] += amount
+                summary["total_deposits"] += amount
+            elif transaction_type == "withdrawal":
+                summary["balance"] -= amount
+                summary["total_withdrawals"] += amount
+
+            #suspicious transactions
+            if (extra_check is not None and extra_check(account_number, transaction_type, amount, row.get("Description"),
+                                                        row.get("Date"))) \
+                    or amount > get_threshold(row.get("Currency"), default_threshold):
+                flag_suspicious(row)
+                flagged += 1
+                self.logger.warning("Suspicious transaction: %s", row)
+
+            #transaction statistics
+            statistic = transaction_statistics.get(transaction_type)
+            if statistic is None:
+                statistic = transaction_statistics[transaction_type] = {
+                    "total_amount": 0,
+                    "transaction_count": 0
+                }
+            statistic["total_amount"] += amount
+            statistic["transaction_count"] += 1
+            if add_to_sketches is not None:
+                add_to_sketches(transaction_type, account_number, amount)
+            if add_to_time_buckets is not None:
+                add_to_time_buckets(transaction_type, account_number, amount, row.get("Date"))
+
+        self.__suspicious_count += flagged
+        if metrics is not None:
+            metrics.increment("rows_read", processed + rejected)
+        self.__log_summary(processed)
+        if rejected:
+            self.logger.info("%d rows rejected by validation", rejected)
+        return self.results
+
+    def process_scanned(self, scanner: MmapCsvScanner) -> dict:
+        """
+        memory-mapped mode: aggregates the decoded columns yielded by an MmapCsvScanner (see
+            InputHandler.get_mmap_scanner), the scanner has already validated the rows and parsed the amounts,
+            and only the rows flagged as suspicious are fully decoded into transaction dictionaries
+        
+        Args:
+            scanner (MmapCsvScanner): the scanner over the CSV input file
+        
+        Returns:
+            dict: returns account_summaries, suspicious_transactions, and transaction statistics as the keys 
+                and the output of their respective methods as the values of a dictionary
+        
+        Raises:
+            FileNotFoundError: if the scanned file does not exist
+            ValueError: if the scanner's amounts are not in this processor's amount type (see amount_digits)
+        """
+        if scanner.amount_digits != self.__amount_digits:
+            raise ValueError("The scanner must be created with the DataProcessor's amount_digits")
+        
+        #binds everything used in the loop to local variables
+        account_summaries = self.__account_summaries
+        transaction_statistics = self.__transaction_statistics
+        suspicious_transactions = self.__suspicious_transactions
+        flag_suspicious = self.__suspicious_sink or suspicious_transactions.append
+        get_threshold = self.__compiled_rules.thresholds.get
+        default_threshold = self.__compiled_rules.default_threshold
+        extra_check = self.__compiled_rules.extra_check
+        needs_row = self.__compiled_rules.needs_row
+        add_to_sketches = None if self.__sketches is None else self.__sketches.add
+        add_to_time_buckets = None if self.__time_buckets is None else self.__time_buckets.add
+        convert = None if self.__fx_rates is None else self.__fx_rates.convert
+        convert_by_date = convert is not None and self.__fx_rates.is_dated
+        decode_row = scanner.decode_row
+        processed = flagged = no_fx_rate = 0
+
+        for account_number, transaction_type, amount, currency, line in scanner.scan():
+            #the date is not one of the scanned columns, so the row is only decoded if the rates depend on it
+            transaction = None
+            if convert is not None:
+                try:
+                    if convert_by_date:
+                        transaction = decode_row(line)
+                        amount = convert(amount, currency, transaction.get("Date"))
+                    else:
+                        amount = convert(amount, currency)
+                except (ValueError, TypeError):
+                    no_fx_rate += 1
+                    continue
+            processed += 1
+
+            summary = account_summaries.get(account_number)
+            if summary is None:
+                summary = account_summaries[account_number] = {
+                    "account_number": account_number,
+                    "balance": 0,
+                    "total_deposits": 0,
+                    "total_withdrawals": 0
+                }
+            if transaction_type == "deposit":
+                summary["balance"] += amount
+                summary["total_deposits"] += amount
+            elif transaction_type == "withdrawal":
+                summary["balance"] -= amount
+                summary["total_withdrawals"] += amount
+
+            #rules on the description or date need the whole row, the others only the scanned columns
+            suspicious = amount > get_threshold(currency, default_threshold)
+            if extra_check is not None:
+                transaction = transaction or (decode_row(line) if needs_row else {})
+                suspicious = extra_check(account_number, transaction_type, amount, transaction.get("Description"),
+                                         transaction.get("Date")) or suspicious
+            if suspicious:
+                transaction = transaction or decode_row(line)
+                flag_suspicious(transaction)
+                flagged += 1
+                self.logger.warning("Suspicious transaction: %s", transaction)
+
+            statistic = transaction_statistics.get(transaction_type)
+            if statistic is None:
+                statistic = transaction_statistics[transaction_type] = {
+                    "total_amount": 0,
+                    "transaction_count": 0
+                }
+            statistic["total_amount"] += amount
+            statistic["transaction_count"] += 1
+            if add_to_sketches is not None:
+                add_to_sketches(transaction_type, account_number, amount)
+            if add_to_time_buckets is not None:
+                #the date is not one of the scanned columns, so the row is decoded unless it already was
+                add_to_time_buckets(transaction_type, account_number, amount, (transaction or decode_row(line)).get("Date"))
+
+        self.__suspicious_count += flagged
+        if self.__metrics is not None:
+            self.__metrics.increment("rows_read", processed + no_fx_rate + scanner.rejected_count)
+            if scanner.rejected_count:
+                self.__metrics.record_rejection("invalid_row", scanner.rejected_count)
+        self.__record_no_fx_rate(no_fx_rate)
+        self.__log_summary(processed)
+        if scanner.rejected_count:
+            self.logger.info("%d rows rejected by validation", scanner.rejected_count)
+        return self.results
+
+    def process_columnar(self) -> dict:
+        """
+        batch mode: loads all of the transactions into a columnar TransactionBatch (each amount parsed once) and
+            computes the aggregates with per-column group-bys, vectorized with NumPy when it is installed. to read
+            a file straight into a batch use TransactionBatch.from_file and process_batch
+        
+        Args: None
+        
+        Returns:
+            dict: the same dictionary as process_data
+        
+        Raises: None
+        """
+        return self.process_batch(TransactionBatch.from_transactions(self.__transactions, self.__amount_digits))
+
+    def process_batch(self, batch: TransactionBatch) -> dict:
+        """
+        folds a TransactionBatch into the aggregates, the batch totals are added onto any aggregates already
+            collected so batches can be processed one after another
+        
+        Args:
+            batch (TransactionBatch): the columnar transactions to process
+        
+        Returns:
+            dict: returns account_summaries, suspicious_transactions, and transaction statistics as the keys 
+                and the output of their respective methods as the values of a dictionary
+        
+        Raises:
+            ValueError: if the batch's amounts are not in this processor's amount type (see amount_digits)
+        """
+        if batch.amount_digits != self.__amount_digits:
+            raise ValueError("The batch must be built with the DataProcessor's amount_digits")
+        
+        #the amounts are converted column-wise, the rows keep their original amounts and the rows whose currency
+        #has no rate are left out
+        read_batch = batch
+        if self.__fx_rates is not None:
+            batch = batch.normalized(self.__fx_rates)
+        
+        #only the flagged rows are rebuilt as transaction dictionaries
+        suspicious_rows = batch.suspicious_rows(self.__compiled_rules)
+        
+        #a batch built from a raw file (e.g. by ParsedInputCache) knows the rows its validation rejected
+        if self.__metrics is not None and read_batch.rejection_reasons is not None:
+            self.__metrics.increment("rows_read", len(read_batch) + sum(read_batch.rejection_reasons.values()))
+            for reason, count in read_batch.rejection_reasons.items():
+                self.__metrics.record_rejection(reason, count)
+        self.__record_no_fx_rate(len(read_batch) - len(batch))
+        
+        #the batch aggregates are already in this processor's amount type
+        AccountSummaries(self.__account_summaries).update(batch.account_summaries())
+        TransactionStatistics(self.__transaction_statistics).update(batch.transaction_statistics())
+        if self.__sketches is not None:
+            batch.update_sketches(self.__sketches)
+        if self.__time_buckets is not None:
+            batch.update_time_buckets(self.__time_buckets)
+        self.__add_suspicious(batch.rows(suspicious_rows), log_suspicious = True)
+        self.__log_summary(len(batch))
+        return self.results
+
+    def merge_results(self, results: dict, log_suspicious: bool = True) -> dict:
+        """
+        adds partial results (the dictionary returned by process_data, e.g. computed by another process or on
+            another batch) onto the saved aggregates, merging must be done in input order for the suspicious
+            transactions and the order of the accounts to match a single serial run. the partial suspicious
+            transactions go to the suspicious sink if there is one. in fixed-point mode the partial amounts
+            (e.g. the Decimal values returned by another processor) are converted back to minor units. the
+            counters of partial results with a pipeline_metrics key (added by the parallel and multi-file
+            workers) are added to the metrics
+        
+        Args:
+            results (dict): a dictionary with account_summaries, suspicious_transactions and transaction_statistics keys
+            log_suspicious (bool): if False the merged suspicious transactions are not logged again, e.g. when
+                restoring results saved by a previous run (default: True)
+        
+        Returns:
+            dict: returns account_summaries, suspicious_transactions, and transaction statistics as the keys 
+                and the output of their respective methods as the values of a dictionary
+        
+        Raises:
+            ValueError: in fixed-point mode, if a partial amount is not a number
+        """
+        
+        #adds the partial account summaries and statistics onto the saved ones, creating any new accounts and
+        #transaction types (the partial aggregates may be plain dictionaries or AccountSummaries/TransactionStatistics)
+        AccountSummaries(self.__account_summaries).update(
+            self.__import(results["account_summaries"], AccountSummaries.FIELDS))
+        TransactionStatistics(self.__transaction_statistics).update(
+            self.__import(results["transaction_statistics"], ("total_amount",)))
+        sketches = results.get("transaction_sketches")
+        if sketches is not None and self.__sketches is not None:
+            self.__sketches.update(sketches if isinstance(sketches, TransactionSketches)
+                                   else TransactionSketches.from_dict(sketches))
+        time_buckets = results.get("time_buckets")
+        if time_buckets is not None and self.__time_buckets is not None:
+            self.__time_buckets.update(time_buckets if isinstance(time_buckets, TimeBucketedStatistics)
+                                       else TimeBucketedStatistics.from_dict(time_buckets))
+        self.__add_suspicious(results["suspicious_transactions"], log_suspicious)
+        if self.__metrics is not None:
+            partial_metrics = results.get("pipeline_metrics")
+            if partial_metrics is not None:
+                self.__metrics.update(partial_metrics)
+            self.__metrics.set("suspicious_transactions", self.__suspicious_count)
+        return self.results
+
+    def __add_suspicious(self, transactions: list, log_suspicious: bool) -> None:
+        """
+        keeps (or passes to the suspicious sink) transactions that were flagged elsewhere, e.g. by a batch or
+            another process
+        
+        Args:
+            transactions (list): the flagged transactions, in input order
+            log_suspicious (bool): if False the transactions are not logged
+        
+        Returns: None
+        
+        Raises: None
+        """
+        if self.__suspicious_sink is None:
+            self.__suspicious_transactions.extend(transactions)
+        else:
+            for transaction in transactions:
+                self.__suspicious_sink(transaction)
+        self.__suspicious_count += len(transactions)
+        if log_suspicious:
+            for transaction in transactions:
+                self.logger.warning("Suspicious transaction: %s", transaction)
 
     def update_account_summary(self, transaction: dict) -> None:
         """
@@ -153,7 +894,7 @@ class DataProcessor:
         #takes the relevant info from the transaction and saves it to local variables
         account_number = transaction["Account number"]
         transaction_type = transaction["Transaction type"]
-        amount = float(transaction["Amount"])
+        amount = self.__amount(transaction)
 
         #if a given account number hasnt been encountered yet it creates an account summary for that account
         if account_number not in self.__account_summaries:
@@ -171,12 +912,13 @@ class DataProcessor:
         elif transaction_type == "withdrawal":
             self.__account_summaries[account_number]["balance"] -= amount
             self.__account_summaries[account_number]["total_withdrawals"] += amount
-        self.logger.info(f"Account summary updated: {self.__account_summaries[account_number]}")
+        if self.__should_log("account_summary"):
+            self.logger.info("Account summary updated: %s", self.__account_summaries[account_number])
 
     def check_suspicious_transactions(self, transaction: dict) -> None:
         """
-        checks for suspicious transactions using the LARGE_TRANSACTION_THRESHOLD and UNCOMMON_CURRENCIES constants, if it is flagged as suspicious,
-            that transaction is appended to the suspicious_transactions list
+        checks for suspicious transactions using the compiled rules (by default the LARGE_TRANSACTION_THRESHOLD and UNCOMMON_CURRENCIES constants), if it is flagged as suspicious,
+            that transaction is appended to the suspicious_transactions list (or passed to the suspicious sink)
         
         Args:
             transaction (dict): a given transaction dictionary that contains the relevant data of the amount of the transaction and its currency
@@ -187,14 +929,18 @@ class DataProcessor:
         """
         
         #takes the relevant info from the transaction and saves it to local variables
-        amount = float(transaction["Amount"])
+        amount = self.__amount(transaction)
         currency = transaction["Currency"]
         
         #flags a transaction as suspicious(thus saving it to suspicious transactions)
-        if amount > self.LARGE_TRANSACTION_THRESHOLD \
-            or currency in self.UNCOMMON_CURRENCIES:
-            self.__suspicious_transactions.append(transaction)
-            self.logger.warning(f"Suspicious transaction: {transaction}")
+        if self.__compiled_rules(transaction.get("Account number"), amount, currency, transaction.get("Description"),
+                                 transaction.get("Date"), transaction.get("Transaction type")):
+            if self.__suspicious_sink is None:
+                self.__suspicious_transactions.append(transaction)
+            else:
+                self.__suspicious_sink(transaction)
+            self.__suspicious_count += 1
+            self.logger.warning("Suspicious transaction: %s", transaction)
 
     def update_transaction_statistics(self, transaction: dict) -> None:
         """
@@ -209,7 +955,7 @@ class DataProcessor:
         
         #takes the relevant info from the transaction and saves it to local variables
         transaction_type = transaction["Transaction type"]
-        amount = float(transaction["Amount"])
+        amount = self.__amount(transaction)
 
         #creates a new transaction type under transaction_statistics if it has not been previously created
         if transaction_type not in self.__transaction_statistics:
@@ -222,7 +968,16 @@ class DataProcessor:
         self.__transaction_statistics[transaction_type]["total_amount"] += amount
         self.__transaction_statistics[transaction_type]["transaction_count"] += 1
         
-        self.logger.info(f"Updated transaction statistics for: {transaction_type}")
+        #adds the amount and account to the type's sketches, when they are kept
+        if self.__sketches is not None:
+            self.__sketches.add(transaction_type, transaction.get("Account number"), amount)
+        
+        #adds the amount to the day of the transaction, when time buckets are kept
+        if self.__time_buckets is not None:
+            self.__time_buckets.add(transaction_type, transaction.get("Account number"), amount, transaction.get("Date"))
+        
+        if self.__should_log("transaction_statistics"):
+            self.logger.info("Updated transaction statistics for: %s", transaction_type)
 
     def get_average_transaction_amount(self, transaction_type: str) -> float:
         """
@@ -237,7 +992,92 @@ class DataProcessor:
         """
         
         #takes the relevant info from the transaction_statistics and saves it to local variables
-        total_amount = self.__transaction_statistics[transaction_type]["total_amount"]
-        transaction_count = self.__transaction_statistics[transaction_type]["transaction_count"]
+        statistic = self.transaction_statistics[transaction_type]
+        total_amount = statistic["total_amount"]
+        transaction_count = statistic["transaction_count"]
     
         return 0 if transaction_count == 0 else total_amount / transaction_count
+
+    def get_transaction_amount_quantile(self, transaction_type: str, quantile: float) -> float:
+        """
+        estimates a percentile of the amounts of a transaction type from its sketch, e.g. 0.5 for the median or
+            0.99 for the 99th percentile, within about 1% of the rank
+        
+        Args:
+            transaction_type (str): the transaction type
+            quantile (float): the quantile, from 0 to 1
+            
+        Returns:
+            float: the estimated amount (a Decimal in fixed-point mode), None if there were no transactions of that type
+        
+        Raises:
+            ValueError: if sketches are not kept, or quantile is not between 0 and 1
+        """
+        if self.__sketches is None:
+            raise ValueError("Percentiles need the DataProcessor to be created with sketches = True")
+        amount = self.__sketches.quantile(transaction_type, quantile)
+        if amount is None or self.__amount_digits is None:
+            return amount
+        return to_decimal(amount, self.__amount_digits)
+
+    def get_distinct_account_count(self, transaction_type: str = None) -> int:
+        """
+        estimates how many distinct accounts made transactions from the HyperLogLog sketches, within about 1%
+        
+        Args:
+            transaction_type (str): only count the accounts with transactions of this type (default: None, every type)
+            
+        Returns:
+            int: the estimated number of accounts
+        
+        Raises:
+            ValueError: if sketches are not kept
+        """
+        if self.__sketches is None:
+            raise ValueError("Distinct account counts need the DataProcessor to be created with sketches = True")
+        return self.__sketches.distinct_accounts(transaction_type)
+
+    def get_results_index(self) -> ResultsIndex:
+        """
+        indexes the current results for account lookups, range and top-N queries and suspicious transaction
+            filters (see ResultsIndex), the index is a snapshot and does not see transactions processed afterwards
+        
+        Args: None
+        
+        Returns:
+            ResultsIndex: the index over the account summaries and suspicious transactions
+        
+        Raises: None
+        """
+        return ResultsIndex(self.results)
+
+    def get_time_bucketed_statistics(self, granularity: str = "day", transaction_type: str = None,
+                                     account_number: str = None) -> list:
+        """
+        gives the total amount and number of transactions of every day, week (starting on monday) or month with
+            transactions, from the time buckets
+        
+        Args:
+            granularity (str): "day", "week" or "month" (default: "day")
+            transaction_type (str): only the transactions of this type (default: None, every type)
+            account_number (str): only the transactions of this account (default: None, every account)
+            
+        Returns:
+            list: dictionaries of period (the first day, an ISO date string), total_amount (a Decimal in
+                fixed-point mode) and transaction_count, oldest first
+        
+        Raises:
+            ValueError: if time buckets are not kept, the granularity is unknown, or both a transaction type and
+                an account are given
+        """
+        if self.__time_buckets is None:
+            raise ValueError("Time bucketed statistics need the DataProcessor to be created with time_buckets = True")
+        digits = self.__amount_digits
+        return [
+            {
+                "period": period.isoformat(),
+                "total_amount": total if digits is None else to_decimal(total, digits),
+                "transaction_count": count
+            }
+            for period, total, count in self.__time_buckets.buckets(granularity, transaction_type, account_number)
+        ]
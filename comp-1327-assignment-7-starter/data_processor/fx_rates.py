@@ -0,0 +1,257 @@
+"""
+Includes the FxRateTable class, which converts amounts in any currency to one reporting currency with the rates of a
+local rate table, by currency and date
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import csv
+from bisect import bisect_left, bisect_right
+from datetime import date
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+from typing import Iterable
+from transaction.dates import parse_day_ordinal
+
+#columns of an FX rate CSV file, e.g. "EUR,2023-03-01,1.4650"
+RATE_COLUMNS = ("Currency", "Date", "Rate")
+
+#number of (currency, date) lookups kept, the cache is emptied when it is full
+FX_CACHE_SIZE = 65536
+
+
+def convert_minor_units(amount: int, rate: Decimal) -> int:
+    """
+    converts an amount in minor units with an exact rate, rounding half to even to the nearest minor unit
+
+    Args:
+        amount (int): the amount in minor units (see transaction.amounts.parse_minor_units)
+        rate (Decimal): the value of one unit of the amount's currency in the reporting currency
+
+    Returns:
+        int: the converted amount in minor units of the reporting currency
+
+    Raises: None
+    """
+    return int((rate * amount).to_integral_value(ROUND_HALF_EVEN))
+
+
+class FxRateTable:
+    """
+    the rates converting amounts to a reporting currency: for every currency, the value of one unit in the reporting
+    currency from each date on. the rate of a date is the last one on or before it, and dates before the first rate
+    of a currency use that first rate. lookups are cached by (currency, date string), so each date is parsed and
+    searched once per currency however many transactions share it
+    """
+
+    def __init__(self, reporting_currency: str, rates: Iterable = ()):
+        """
+        initializes the table
+
+        Args:
+            reporting_currency (str): the currency every amount is converted to, its rate is always 1
+            rates (Iterable): (currency, ISO date, rate) tuples, see add_rate (default: ())
+
+        Returns: None
+
+        Raises:
+            ValueError: if a date is not an ISO date or a rate is not a positive number
+        """
+        self.__reporting_currency = reporting_currency
+
+        #currency -> (sorted day ordinals, the rate from each of them on)
+        self.__rates = {}
+
+        #(currency, date) -> (rate as a Decimal, rate as a float), see __lookup
+        self.__cache = {}
+
+        for currency, rate_date, rate in rates:
+            self.add_rate(currency, rate_date, rate)
+
+    @classmethod
+    def from_csv(cls, file_path: str, reporting_currency: str) -> "FxRateTable":
+        """
+        loads the rates from a CSV file with a header row holding RATE_COLUMNS
+
+        Args:
+            file_path (str): the path of the CSV file
+            reporting_currency (str): the currency the rates convert to
+
+        Returns:
+            FxRateTable: the table
+
+        Raises:
+            FileNotFoundError: if the file does not exist
+            ValueError: if a column is missing, a date is not an ISO date or a rate is not a positive number
+        """
+        with open(file_path, "r", newline = "") as rates_file:
+            reader = csv.DictReader(rates_file)
+            missing_columns = [column for column in RATE_COLUMNS if column not in (reader.fieldnames or ())]
+            if missing_columns:
+                raise ValueError(f"FX rate file is missing the columns: {', '.join(missing_columns)}")
+            return cls(reporting_currency, ((row["Currency"], row["Date"], row["Rate"]) for row in reader))
+
+    @property
+    def reporting_currency(self) -> str:
+        """
+        accessor for the currency amounts are converted to
+
+        Args: None
+
+        Returns:
+            str: the reporting currency
+
+        Raises: None
+        """
+        return self.__reporting_currency
+
+    @property
+    def currencies(self) -> list:
+        """
+        accessor for the currencies with rates
+
+        Args: None
+
+        Returns:
+            list: the currencies, in the order they were first added
+
+        Raises: None
+        """
+        return list(self.__rates)
+
+    @property
+    def is_dated(self) -> bool:
+        """
+        checks if a rate depends on the date, i.e. a currency has more than one rate. when it doesn't, amounts can
+            be converted without reading the transaction dates
+
+        Args: None
+
+        Returns:
+            bool: True if a currency has several rates
+
+        Raises: None
+        """
+        return any(len(ordinals) > 1 for ordinals, _ in self.__rates.values())
+
+    def add_rate(self, currency: str, rate_date: str, rate) -> None:
+        """
+        adds (or replaces) the rate of a currency from a date on
+
+        Args:
+            currency (str): the currency
+            rate_date (str): the ISO date the rate applies from
+            rate: the value of one unit of the currency in the reporting currency, a number or its text
+
+        Returns: None
+
+        Raises:
+            ValueError: if the date is not an ISO date or the rate is not a finite positive number
+        """
+        ordinal = parse_day_ordinal(rate_date)
+        try:
+            rate = Decimal(str(rate).strip())
+        except InvalidOperation:
+            raise ValueError(f"Invalid FX rate for {currency} on {rate_date}: {rate}") from None
+        #NaN and infinity are Decimals too, comparing NaN would raise InvalidOperation
+        if not rate.is_finite() or rate <= 0:
+            raise ValueError(f"Invalid FX rate for {currency} on {rate_date}: {rate}")
+
+        ordinals, rates = self.__rates.setdefault(currency, ([], []))
+        index = bisect_left(ordinals, ordinal)
+        if index < len(ordinals) and ordinals[index] == ordinal:
+            rates[index] = rate
+        else:
+            ordinals.insert(index, ordinal)
+            rates.insert(index, rate)
+        self.__cache.clear()
+
+    def __lookup(self, currency: str, transaction_date: str) -> tuple:
+        """
+        finds the rate of a currency on a date, from the cache when it has already been looked up
+
+        Args:
+            currency (str): the currency
+            transaction_date (str): an ISO date or date and time, or None for the latest rate
+
+        Returns:
+            tuple: the rate as a Decimal and as a float
+
+        Raises:
+            ValueError: if the currency has no rate or the date is not an ISO date
+        """
+        key = (currency, transaction_date)
+        cached = self.__cache.get(key)
+        if cached is not None:
+            return cached
+
+        if currency == self.__reporting_currency:
+            rate = Decimal(1)
+        elif currency not in self.__rates:
+            raise ValueError(f"No FX rate for {currency}")
+        else:
+            ordinals, rates = self.__rates[currency]
+            if transaction_date is None:
+                rate = rates[-1]
+            else:
+                rate = rates[max(0, bisect_right(ordinals, parse_day_ordinal(transaction_date)) - 1)]
+
+        if len(self.__cache) >= FX_CACHE_SIZE:
+            self.__cache.clear()
+        cached = self.__cache[key] = (rate, float(rate))
+        return cached
+
+    def rate(self, currency: str, transaction_date: str = None) -> Decimal:
+        """
+        gives the rate converting a currency to the reporting currency on a date
+
+        Args:
+            currency (str): the currency
+            transaction_date (str): an ISO date or date and time (default: None, the latest rate)
+
+        Returns:
+            Decimal: the value of one unit of the currency in the reporting currency
+
+        Raises:
+            ValueError: if the currency has no rate or the date is not an ISO date
+        """
+        return self.__lookup(currency, transaction_date)[0]
+
+    def convert(self, amount, currency: str, transaction_date: str = None):
+        """
+        converts one amount to the reporting currency, amounts already in the reporting currency are returned as is
+
+        Args:
+            amount: the amount, a float or integer minor units (rounded half to even after the conversion)
+            currency (str): the currency of the amount
+            transaction_date (str): the date of the transaction (default: None, the latest rate)
+
+        Returns:
+            the converted amount, of the same type as amount
+
+        Raises:
+            ValueError: if the currency has no rate or the date is not an ISO date
+        """
+        if currency == self.__reporting_currency:
+            return amount
+        rate, float_rate = self.__lookup(currency, transaction_date)
+        if isinstance(amount, int):
+            return convert_minor_units(amount, rate)
+        return amount * float_rate
+
+    def to_dict(self) -> dict:
+        """
+        converts the table to a JSON serializable dictionary (e.g. to check a checkpoint used the same rates)
+
+        Args: None
+
+        Returns:
+            dict: the reporting currency and, per currency, [ISO date, rate text] pairs in date order
+
+        Raises: None
+        """
+        return {
+            "reporting_currency": self.__reporting_currency,
+            "rates": {currency: [[date.fromordinal(ordinal).isoformat(), str(rate)] for ordinal, rate in zip(*entry)]
+                      for currency, entry in self.__rates.items()}
+        }
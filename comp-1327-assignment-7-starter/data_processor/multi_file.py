@@ -0,0 +1,232 @@
+"""
+Includes the MultiFileProcessor class, which reads and validates several input files concurrently and aggregates
+them into a single DataProcessor
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import asyncio
+import glob
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from data_processor.data_processor import DataProcessor
+from data_processor.fx_rates import FxRateTable
+from data_processor.rules import SuspiciousTransactionRules
+from input_handler.input_handler import InputHandler
+from metrics.pipeline_metrics import PipelineMetrics
+
+#the file formats InputHandler can read
+SUPPORTED_FORMATS = frozenset(["csv", "json"]) | InputHandler.JSON_LINES_FORMATS
+
+
+def _process_file(file_path: str, rules: SuspiciousTransactionRules, amount_digits: int = None,
+                  sketches: bool = False, time_buckets: bool = False, fx_rates: FxRateTable = None) -> dict:
+    """
+    worker function: reads, validates and processes one input file with the fused pipeline
+
+    Args:
+        file_path (str): the path of the input file
+        rules (SuspiciousTransactionRules): the rules of the parent process's DataProcessor
+        amount_digits (int): the amount_digits of the parent process's DataProcessor (default: None)
+        sketches (bool): if True the file's sketches are returned with its results (default: False)
+        time_buckets (bool): if True the file's time buckets are returned with its results (default: False)
+        fx_rates (FxRateTable): the rates of the parent process's DataProcessor (default: None)
+
+    Returns:
+        dict: the partial results of the file, in the same format as DataProcessor.process_data, plus the
+            file's metrics under pipeline_metrics
+
+    Raises:
+        FileNotFoundError: if the file does not exist
+    """
+    metrics = PipelineMetrics()
+    processor = DataProcessor([], rules=rules, amount_digits=amount_digits, sketches=sketches,
+                              time_buckets=time_buckets, fx_rates=fx_rates, metrics=metrics)
+
+    #the parent process logs the merged results, the workers stay quiet
+    processor.logger.setLevel(logging.CRITICAL)
+    results = processor.process_fused(InputHandler(file_path).iter_raw_input_data())
+
+    #the file's counters are added to the parent's metrics by merge_results
+    results["pipeline_metrics"] = metrics.to_dict()
+    return results
+
+
+def _read_file(file_path: str, metrics: PipelineMetrics = None) -> list:
+    """
+    worker function: reads and validates one input file
+
+    Args:
+        file_path (str): the path of the input file
+        metrics (PipelineMetrics): counts the rows read and rejected, one per file as the files are read on
+            different threads (default: None)
+
+    Returns:
+        list: the valid transaction dictionaries of the file, in file order
+
+    Raises:
+        FileNotFoundError: if the file does not exist
+    """
+    return list(InputHandler(file_path, metrics=metrics).iter_input_data())
+
+
+class MultiFileProcessor:
+    """
+    processes many input files (e.g. one per branch) at once with asyncio: every file is read and validated on
+    a worker and the results are fed to one DataProcessor in file order, so the output does not depend on which
+    file finishes first and the wall time approaches the slowest file rather than the sum of all of them.
+    by default each file is aggregated on a worker process and the partial results are merged; with rules that
+    depend on the order of the transactions (velocity rules), or when use_processes is False, the files are
+    read on threads (asyncio.to_thread) and their transactions are processed by the DataProcessor itself
+    """
+
+    def __init__(self, file_paths: list, workers: int = None, use_processes: bool = True):
+        """
+        initializes the class with the input files and the size of the worker pool
+
+        Args:
+            file_paths (list): the paths of the input files, processed in this order
+            workers (int): how many files are read at the same time (default: None, one per CPU)
+            use_processes (bool): if True files are aggregated on worker processes, otherwise they are read on
+                threads (default: True)
+
+        Returns: None
+
+        Raises: None
+        """
+        self.__file_paths = list(file_paths)
+        self.__workers = workers or os.cpu_count() or 1
+        self.__use_processes = use_processes
+
+    @classmethod
+    def from_glob(cls, pattern: str, workers: int = None, use_processes: bool = True) -> "MultiFileProcessor":
+        """
+        finds the input files matching a glob pattern (e.g. "input/branches/*.csv", ** matches any number of
+            directories), keeping the ones in a format InputHandler reads, sorted by path
+
+        Args:
+            pattern (str): the glob pattern
+            workers (int): see __init__ (default: None)
+            use_processes (bool): see __init__ (default: True)
+
+        Returns:
+            MultiFileProcessor: the processor for the matching files
+
+        Raises:
+            FileNotFoundError: if no supported file matches the pattern
+        """
+        file_paths = sorted(
+            file_path for file_path in glob.glob(pattern, recursive=True)
+            if os.path.isfile(file_path) and InputHandler(file_path).get_file_format() in SUPPORTED_FORMATS
+        )
+        if not file_paths:
+            raise FileNotFoundError(f"No input files match: {pattern}")
+        return cls(file_paths, workers, use_processes)
+
+    @property
+    def file_paths(self) -> list:
+        """
+        accessor for the input file paths
+
+        Args: None
+
+        Returns:
+            list: the paths of the input files, in processing order
+
+        Raises: None
+        """
+        return self.__file_paths
+
+    def process_data(self, data_processor: DataProcessor) -> dict:
+        """
+        processes every file and aggregates them into data_processor, see process_data_async. must not be
+            called from a running event loop
+
+        Args:
+            data_processor (DataProcessor): the processor the files are aggregated into
+
+        Returns:
+            dict: the aggregated results, in the same format as DataProcessor.process_data
+
+        Raises:
+            FileNotFoundError: if one of the files does not exist
+        """
+        return asyncio.run(self.process_data_async(data_processor))
+
+    async def process_data_async(self, data_processor: DataProcessor) -> dict:
+        """
+        processes every file concurrently and aggregates them into data_processor in file order
+
+        Args:
+            data_processor (DataProcessor): the processor the files are aggregated into
+
+        Returns:
+            dict: the aggregated results, in the same format as DataProcessor.process_data
+
+        Raises:
+            FileNotFoundError: if one of the files does not exist
+        """
+        if self.__use_processes and not data_processor.rules.is_order_dependent:
+            await self.__merge_from_processes(data_processor)
+        else:
+            await self.__process_from_threads(data_processor)
+
+        data_processor.logger.info("Processing of %d input files complete", len(self.__file_paths))
+        return data_processor.results
+
+    async def __merge_from_processes(self, data_processor: DataProcessor) -> None:
+        """
+        aggregates every file on a worker process and merges the partial results in file order as they arrive
+
+        Args:
+            data_processor (DataProcessor): the processor the partial results are merged into
+
+        Returns: None
+
+        Raises:
+            FileNotFoundError: if one of the files does not exist
+        """
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=max(1, min(self.__workers, len(self.__file_paths)))) as pool:
+            futures = [loop.run_in_executor(pool, _process_file, file_path, data_processor.rules,
+                                            data_processor.amount_digits, data_processor.sketches is not None,
+                                            data_processor.time_buckets is not None, data_processor.fx_rates)
+                       for file_path in self.__file_paths]
+            try:
+                for future in futures:
+                    data_processor.merge_results(await future)
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    async def __process_from_threads(self, data_processor: DataProcessor) -> None:
+        """
+        reads the files on threads, at most workers at a time, and processes their transactions in file order
+
+        Args:
+            data_processor (DataProcessor): the processor the transactions are processed by
+
+        Returns: None
+
+        Raises:
+            FileNotFoundError: if one of the files does not exist
+        """
+        semaphore = asyncio.Semaphore(self.__workers)
+
+        async def read(file_path: str) -> tuple:
+            metrics = PipelineMetrics()
+            async with semaphore:
+                return await asyncio.to_thread(_read_file, file_path, metrics), metrics
+
+        tasks = [asyncio.create_task(read(file_path)) for file_path in self.__file_paths]
+        try:
+            for task in tasks:
+                transactions, metrics = await task
+                if data_processor.metrics is not None:
+                    data_processor.metrics.update(metrics.to_dict())
+                data_processor.process_transactions(transactions)
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,148 @@
+"""
+Includes the ParallelProcessor class, which splits a CSV input file into byte ranges and processes
+them on a pool of worker processes
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from data_processor.data_processor import DataProcessor
+from data_processor.fx_rates import FxRateTable
+from data_processor.rules import SuspiciousTransactionRules
+from input_handler.input_handler import InputHandler
+from metrics.pipeline_metrics import PipelineMetrics
+
+
+def _process_range(file_path: str, start: int, end: int, rules: SuspiciousTransactionRules,
+                   amount_digits: int = None, sketches: bool = False, time_buckets: bool = False,
+                   fx_rates: FxRateTable = None) -> dict:
+    """
+    worker function: reads, validates and processes one byte range of the input file
+
+    Args:
+        file_path (str): the path of the CSV input file
+        start (int): the byte offset of the first line of the range
+        end (int): the byte offset the range stops at
+        rules (SuspiciousTransactionRules): the rules of the parent process's DataProcessor
+        amount_digits (int): the amount_digits of the parent process's DataProcessor (default: None)
+        sketches (bool): if True the range's sketches are returned with its results (default: False)
+        time_buckets (bool): if True the range's time buckets are returned with its results (default: False)
+        fx_rates (FxRateTable): the rates of the parent process's DataProcessor (default: None)
+
+    Returns:
+        dict: the partial results of the range, in the same format as DataProcessor.process_data, plus the
+            range's metrics under pipeline_metrics
+
+    Raises:
+        FileNotFoundError: if the file does not exist
+    """
+    metrics = PipelineMetrics()
+    processor = DataProcessor([], rules=rules, amount_digits=amount_digits, sketches=sketches,
+                              time_buckets=time_buckets, fx_rates=fx_rates, metrics=metrics)
+
+    #the parent process logs the merged results, the workers stay quiet
+    processor.logger.setLevel(logging.CRITICAL)
+    results = processor.process_transactions(InputHandler(file_path, metrics=metrics).iter_csv_range(start, end))
+
+    #the range's counters are added to the parent's metrics by merge_results
+    results["pipeline_metrics"] = metrics.to_dict()
+    return results
+
+
+class ParallelProcessor:
+    """
+    processes a CSV input file on several CPU cores: the file is split into byte ranges on line boundaries,
+    every range is processed by a worker process, and the partial results are merged in file order so the
+    output matches the serial path (float totals are summed per range first, so they can differ from a serial
+    run in the last digits)
+    """
+
+    def __init__(self, file_path: str, workers: int = None, chunks_per_worker: int = 4):
+        """
+        initializes the class with the input file and the size of the process pool
+
+        Args:
+            file_path (str): the path of the CSV input file
+            workers (int): the number of worker processes (default: None, one per CPU)
+            chunks_per_worker (int): how many byte ranges to create per worker, more ranges balance the load
+                better when some parts of the file are slower to process (default: 4)
+
+        Returns: None
+
+        Raises: None
+        """
+        self.__file_path = file_path
+        self.__workers = workers or os.cpu_count() or 1
+        self.__chunks_per_worker = chunks_per_worker
+
+    @property
+    def file_path(self) -> str:
+        """
+        accessor for the input file path
+
+        Args: None
+
+        Returns:
+            str: the path of the CSV input file
+
+        Raises: None
+        """
+        return self.__file_path
+
+    @property
+    def workers(self) -> int:
+        """
+        accessor for the number of worker processes
+
+        Args: None
+
+        Returns:
+            int: the size of the process pool
+
+        Raises: None
+        """
+        return self.__workers
+
+    def process_data(self, data_processor: DataProcessor) -> dict:
+        """
+        processes the whole file in parallel and merges every partial result into data_processor, which keeps
+            its logging set up and any aggregates it already had. the workers flag suspicious transactions with
+            data_processor's rules
+
+        Args:
+            data_processor (DataProcessor): the processor the results are merged into
+
+        Returns:
+            dict: the merged results, in the same format as DataProcessor.process_data
+
+        Raises:
+            FileNotFoundError: if the file does not exist
+            ValueError: if the file is not a CSV file, or the rules have a velocity limit, which needs the
+                transactions of an account to be checked in one place, in order
+        """
+        input_handler = InputHandler(self.__file_path)
+        if input_handler.get_file_format() != "csv":
+            raise ValueError(f"Parallel processing only supports CSV files: {self.__file_path}")
+        if data_processor.rules.is_order_dependent:
+            raise ValueError("Parallel processing does not support velocity rules")
+
+        ranges = input_handler.get_csv_byte_ranges(self.__workers * self.__chunks_per_worker)
+
+        #pool.map returns the partial results in file order, so they can be merged as they arrive
+        with ProcessPoolExecutor(max_workers=self.__workers) as pool:
+            starts = [start for start, _ in ranges]
+            ends = [end for _, end in ranges]
+            partial_results_in_order = pool.map(_process_range, repeat(self.__file_path), starts, ends,
+                                                repeat(data_processor.rules), repeat(data_processor.amount_digits),
+                                                repeat(data_processor.sketches is not None),
+                                                repeat(data_processor.time_buckets is not None),
+                                                repeat(data_processor.fx_rates))
+            for partial_results in partial_results_in_order:
+                data_processor.merge_results(partial_results)
+
+        data_processor.logger.info(f"Parallel processing of {len(ranges)} ranges complete")
+        return data_processor.results
@@ -0,0 +1,197 @@
+"""
+Includes the ResultsIndex class, which answers lookups, range and top-N queries over the results returned by
+DataProcessor.process_data without writing them out or rescanning them
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import heapq
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+
+#the account summary fields with a sorted index
+INDEXED_FIELDS = ("balance", "total_deposits", "total_withdrawals")
+
+
+class ResultsIndex:
+    """
+    indexes a snapshot of a DataProcessor's results: account summaries by account number (hash lookups), by each
+    of INDEXED_FIELDS (a sorted index, built the first time the field is range queried) and suspicious
+    transactions by account, currency and day. build a new index after processing more transactions
+    """
+
+    def __init__(self, results: dict):
+        """
+        indexes the results, the account and suspicious transaction indexes are built here, the sorted field
+            indexes on first use
+
+        Args:
+            results (dict): the dictionary returned by DataProcessor.process_data (or its results property)
+
+        Returns: None
+
+        Raises:
+            KeyError: if results has no account_summaries or suspicious_transactions
+        """
+        self.__account_summaries = results["account_summaries"]
+        self.__suspicious_transactions = list(results["suspicious_transactions"])
+
+        #field -> (sorted values, account numbers in the same order), see __sorted_index
+        self.__sorted_indexes = {}
+
+        #positions of the suspicious transactions, in input order, by account number and by currency
+        self.__suspicious_by_account = {}
+        self.__suspicious_by_currency = {}
+        for position, transaction in enumerate(self.__suspicious_transactions):
+            self.__suspicious_by_account.setdefault(transaction.get("Account number"), []).append(position)
+            self.__suspicious_by_currency.setdefault(transaction.get("Currency"), []).append(position)
+
+        #(day, position) of every suspicious transaction sorted by day, the day being the ISO date part of Date
+        self.__suspicious_by_day = sorted((_day(transaction.get("Date")), position)
+                                          for position, transaction in enumerate(self.__suspicious_transactions))
+        self.__suspicious_days = [day for day, _ in self.__suspicious_by_day]
+
+    def __len__(self) -> int:
+        return len(self.__account_summaries)
+
+    def __contains__(self, account_number: str) -> bool:
+        return account_number in self.__account_summaries
+
+    def get_account(self, account_number: str) -> dict:
+        """
+        looks up the summary of an account
+
+        Args:
+            account_number (str): the account number
+
+        Returns:
+            dict: the account summary, or None if the account has no transactions
+
+        Raises: None
+        """
+        return self.__account_summaries.get(account_number)
+
+    def __sorted_index(self, field: str) -> tuple:
+        """
+        gives the sorted index of a field, sorting the accounts by it the first time
+
+        Args:
+            field (str): one of INDEXED_FIELDS
+
+        Returns:
+            tuple: the sorted values and the account numbers in the same order
+
+        Raises:
+            ValueError: if the field is not indexed
+        """
+        index = self.__sorted_indexes.get(field)
+        if index is None:
+            if field not in INDEXED_FIELDS:
+                raise ValueError(f"Unknown field: {field}, expected one of {INDEXED_FIELDS}")
+            pairs = sorted((summary[field], account_number)
+                           for account_number, summary in self.__account_summaries.items())
+            index = self.__sorted_indexes[field] = ([value for value, _ in pairs],
+                                                    [account_number for _, account_number in pairs])
+        return index
+
+    def accounts_between(self, field: str, low=None, high=None) -> list:
+        """
+        finds the accounts whose field is between low and high (both included) with a binary search of the
+            field's sorted index
+
+        Args:
+            field (str): one of INDEXED_FIELDS
+            low: the smallest value kept (default: None, no lower bound)
+            high: the largest value kept (default: None, no upper bound)
+
+        Returns:
+            list: the account summaries, from the smallest value to the largest
+
+        Raises:
+            ValueError: if the field is not indexed
+        """
+        values, account_numbers = self.__sorted_index(field)
+        start = 0 if low is None else bisect_left(values, low)
+        end = len(values) if high is None else bisect_right(values, high)
+        return [self.__account_summaries[account_number] for account_number in account_numbers[start:end]]
+
+    def top_accounts(self, field: str, count: int, largest: bool = True) -> list:
+        """
+        finds the accounts with the largest (or smallest) values of a field. uses a heap of count entries,
+            O(n log count), unless the field's sorted index has already been built, which is just sliced
+
+        Args:
+            field (str): one of INDEXED_FIELDS
+            count (int): how many accounts to return
+            largest (bool): if False, the accounts with the smallest values are returned (default: True)
+
+        Returns:
+            list: the account summaries, the largest (or smallest) value first
+
+        Raises:
+            ValueError: if the field is not indexed
+        """
+        if field not in INDEXED_FIELDS:
+            raise ValueError(f"Unknown field: {field}, expected one of {INDEXED_FIELDS}")
+        if count <= 0:
+            return []
+
+        index = self.__sorted_indexes.get(field)
+        if index is not None:
+            account_numbers = index[1]
+            selected = account_numbers[:-count - 1:-1] if largest else account_numbers[:count]
+            return [self.__account_summaries[account_number] for account_number in selected]
+
+        #ties are broken by account number, the same as in the sorted index
+        select = heapq.nlargest if largest else heapq.nsmallest
+        return select(count, self.__account_summaries.values(), key=itemgetter(field, "account_number"))
+
+    def suspicious_transactions(self, account_number: str = None, currency: str = None, start_date: str = None,
+                                end_date: str = None) -> list:
+        """
+        finds the suspicious transactions matching every filter given. the most selective index among the
+            filters is used and the other filters are checked on its transactions only
+
+        Args:
+            account_number (str): only the transactions of this account (default: None)
+            currency (str): only the transactions in this currency (default: None)
+            start_date (str): only the transactions on or after this ISO date, e.g. "2023-03-01" (default: None)
+            end_date (str): only the transactions on or before this ISO date (default: None)
+
+        Returns:
+            list: the matching transactions, in input order
+
+        Raises: None
+        """
+        candidates = []
+        if account_number is not None:
+            candidates.append(self.__suspicious_by_account.get(account_number, []))
+        if currency is not None:
+            candidates.append(self.__suspicious_by_currency.get(currency, []))
+        if start_date is not None or end_date is not None:
+            start = 0 if start_date is None else bisect_left(self.__suspicious_days, _day(start_date))
+            end = len(self.__suspicious_days) if end_date is None else bisect_right(self.__suspicious_days,
+                                                                                      _day(end_date))
+            candidates.append(sorted(position for _, position in self.__suspicious_by_day[start:end]))
+        if not candidates:
+            return list(self.__suspicious_transactions)
+
+        positions = min(candidates, key=len)
+        matches = []
+        for position in positions:
+            transaction = self.__suspicious_transactions[position]
+            if account_number is not None and transaction.get("Account number") != account_number:
+                continue
+            if currency is not None and transaction.get("Currency") != currency:
+                continue
+            day = _day(transaction.get("Date"))
+            if (start_date is not None and day < _day(start_date)) or (end_date is not None and day > _day(end_date)):
+                continue
+            matches.append(transaction)
+        return matches
+
+
+def _day(date) -> str:
+    """the ISO date part (YYYY-MM-DD) of a Date value, dates without one sort first"""
+    return "" if date is None else str(date)[:10]
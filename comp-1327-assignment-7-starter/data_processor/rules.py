@@ -0,0 +1,362 @@
+"""
+Includes the SuspiciousTransactionRules class, the configurable rules that decide which transactions are
+suspicious, and CompiledRules, the form the DataProcessor evaluates them in
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import json
+import re
+from typing import Iterable
+from data_processor.velocity import VelocityDetector
+from transaction.dates import parse_day_ordinal
+
+#keys allowed in a rules configuration (see SuspiciousTransactionRules.from_dict)
+CONFIG_KEYS = frozenset([
+    "threshold",
+    "flagged_currencies",
+    "currency_thresholds",
+    "account_limits",
+    "description_patterns",
+    "ignore_case",
+    "max_daily_transactions",
+    "velocity_windows"
+])
+
+
+class CompiledRules:
+    """
+    the rules compiled once for fast evaluation: the threshold and flagged currency rules are folded into one
+    currency -> threshold dictionary (a flagged currency has a threshold of -inf), so the common case costs a
+    single dictionary lookup however many currencies are configured. the other rules are only evaluated by
+    extra_check, which is None when none of them are configured
+    """
+
+    #how many days before an account's newest transaction its daily counts are kept, so rows that are slightly
+    #out of date order are still counted on their day while the counts of an account stay bounded
+    DAILY_COUNT_WINDOW_DAYS = 7
+
+    def __init__(self, thresholds: dict, default_threshold: float, account_limits: dict,
+                 description_pattern: re.Pattern, max_daily_transactions: int, velocity_detectors: list = ()):
+        """
+        initializes the compiled rules, see SuspiciousTransactionRules.compile
+
+        Args:
+            thresholds (dict): currency -> amount threshold, for the currencies that don't use default_threshold
+            default_threshold (float): amounts strictly greater than this are suspicious
+            account_limits (dict): account number (as a string) -> amount limit
+            description_pattern (re.Pattern): the description patterns as one regular expression, or None
+            max_daily_transactions (int): the most transactions an account can make in a day before the next
+                ones are suspicious, or None
+            velocity_detectors (list): the sliding window detectors, each with its own per account windows
+                (default: ())
+
+        Returns: None
+
+        Raises: None
+        """
+        self.thresholds = thresholds
+        self.default_threshold = default_threshold
+        self.account_limits = account_limits
+        self.description_pattern = description_pattern
+        self.max_daily_transactions = max_daily_transactions
+        self.velocity_detectors = list(velocity_detectors)
+
+        #account number -> [newest day ordinal, {day ordinal: transactions counted so far}], for the velocity rule.
+        #only the days within DAILY_COUNT_WINDOW_DAYS of the newest one are kept
+        self.daily_counts = {}
+
+        #True if the rules need the description or date of a transaction, not just its account, amount and currency
+        self.needs_row = description_pattern is not None or max_daily_transactions is not None \
+            or bool(self.velocity_detectors)
+
+        self.extra_check = self.__build_extra_check() \
+            if account_limits or self.needs_row else None
+
+    def __call__(self, account_number: str, amount: float, currency: str, description: str = None,
+                 date: str = None, transaction_type: str = None) -> bool:
+        """
+        evaluates every rule against one transaction, counting it for the velocity rule
+
+        Args:
+            account_number (str): the account of the transaction
+            amount (float): the parsed amount
+            currency (str): the currency
+            description (str): the description, only needed for description patterns (default: None)
+            date (str): the date, only needed for the velocity rules (default: None)
+            transaction_type (str): the type, only needed for velocity windows limited to some types (default: None)
+
+        Returns:
+            bool: True if the transaction is suspicious
+
+        Raises: None
+        """
+        #the extra check runs first, so the velocity rules count the transactions the thresholds already flag
+        if self.extra_check is not None and self.extra_check(account_number, transaction_type, amount, description, date):
+            return True
+        return amount > self.thresholds.get(currency, self.default_threshold)
+
+    def count_daily_transaction(self, account_number, date: str) -> int:
+        """
+        counts a transaction for the max_daily_transactions rule. when the account's newest day moves forward the
+            days that left the window are dropped, so each account keeps at most DAILY_COUNT_WINDOW_DAYS + 1 counts
+
+        Args:
+            account_number: the account of the transaction
+            date (str): the Date field, an ISO 8601 date or date and time
+
+        Returns:
+            int: the transactions of the account on that day so far, including this one, or 0 if the transaction
+                is not counted because its date can't be parsed or is older than the account's window
+
+        Raises: None
+        """
+        try:
+            day = parse_day_ordinal(date)
+        except (ValueError, TypeError):
+            return 0
+
+        state = self.daily_counts.get(account_number)
+        if state is None:
+            self.daily_counts[account_number] = [day, {day: 1}]
+            return 1
+        counts = state[1]
+        if day > state[0]:
+            state[0] = day
+            for old_day in [old_day for old_day in counts if old_day < day - self.DAILY_COUNT_WINDOW_DAYS]:
+                del counts[old_day]
+        elif day < state[0] - self.DAILY_COUNT_WINDOW_DAYS:
+            return 0
+        count = counts[day] = counts.get(day, 0) + 1
+        return count
+
+    def __build_extra_check(self):
+        """
+        builds a function checking only the configured account limit, description and velocity rules
+
+        Args: None
+
+        Returns:
+            function: (account number, transaction type, amount, description, date) -> True if one of the rules
+                flags the transaction
+
+        Raises: None
+        """
+        account_limits = self.account_limits
+        search = self.description_pattern.search if self.description_pattern is not None else None
+        max_daily_transactions = self.max_daily_transactions
+        count_daily_transaction = self.count_daily_transaction
+        updates = [detector.update for detector in self.velocity_detectors]
+        no_limit = float("inf")
+
+        def extra_check(account_number, transaction_type, amount, description, date) -> bool:
+            suspicious = False
+            if max_daily_transactions is not None:
+                suspicious = count_daily_transaction(account_number, date) > max_daily_transactions
+            #every window is updated, even once one of them has flagged the transaction
+            for update in updates:
+                if update(account_number, transaction_type, amount, date):
+                    suspicious = True
+            #JSON input can hold account numbers as ints, the limits are keyed by their string form
+            if account_limits and amount > account_limits.get(str(account_number), no_limit):
+                suspicious = True
+            if search is not None and description and search(description):
+                suspicious = True
+            return suspicious
+
+        return extra_check
+
+
+class SuspiciousTransactionRules:
+    """
+    the rules used to flag suspicious transactions: a default amount threshold, per currency thresholds, always
+    flagged currencies, per account amount limits, description patterns, a per account, per day transaction
+    count limit and sliding window velocity limits (see VelocityDetector). the velocity state is kept by the
+    compiled rules, so a run that is split (parallel ranges) or resumed (checkpoints) can't see the state of the
+    other parts
+    """
+
+    def __init__(self, threshold: float = 10000, flagged_currencies: Iterable = (), currency_thresholds: dict = None,
+                 account_limits: dict = None, description_patterns: Iterable = (), ignore_case: bool = False,
+                 max_daily_transactions: int = None, velocity_windows: Iterable = ()):
+        """
+        initializes the rules
+
+        Args:
+            threshold (float): amounts strictly greater than this are suspicious (default: 10000)
+            flagged_currencies (Iterable): currencies that are always suspicious (default: ())
+            currency_thresholds (dict): currency -> threshold replacing the default one (default: None)
+            account_limits (dict): account number -> amounts strictly greater than this are suspicious, the account
+                numbers are compared as strings so 1001 and "1001" are the same account (default: None)
+            description_patterns (Iterable): regular expressions, a description matching one of them is suspicious
+                (default: ())
+            ignore_case (bool): if True the description patterns ignore case (default: False)
+            max_daily_transactions (int): transactions after this many from the same account on the same date are
+                suspicious, rows dated more than CompiledRules.DAILY_COUNT_WINDOW_DAYS before the account's newest
+                row are not counted (default: None, no velocity rule)
+            velocity_windows (Iterable): VelocityDetector settings, e.g. [{"window_hours": 6, "max_total": 20000,
+                "transaction_types": ["withdrawal"]}] (default: ())
+
+        Returns: None
+
+        Raises:
+            re.error: if a description pattern is not a valid regular expression
+            ValueError: if a velocity window is invalid
+        """
+        self.__threshold = threshold
+        self.__flagged_currencies = frozenset(flagged_currencies)
+        self.__currency_thresholds = dict(currency_thresholds or {})
+        self.__account_limits = {str(account): limit for account, limit in (account_limits or {}).items()}
+        self.__description_patterns = list(description_patterns)
+        self.__ignore_case = ignore_case
+        self.__max_daily_transactions = max_daily_transactions
+
+        #built once to validate the settings, compile() copies them so each DataProcessor has its own windows
+        self.__velocity_detectors = [VelocityDetector.from_dict(window) for window in velocity_windows]
+
+        #compiled here so an invalid pattern fails when the rules are loaded, not while processing
+        self.__description_pattern = None
+        if self.__description_patterns:
+            self.__description_pattern = re.compile("|".join(f"(?:{pattern})" for pattern in self.__description_patterns),
+                                                    re.IGNORECASE if ignore_case else 0)
+
+    @classmethod
+    def from_dict(cls, config: dict) -> "SuspiciousTransactionRules":
+        """
+        builds the rules from a configuration dictionary, whose keys are the __init__ argument names
+
+        Args:
+            config (dict): the configuration, e.g. {"threshold": 10000, "flagged_currencies": ["XRP", "LTC"],
+                "currency_thresholds": {"JPY": 1500000}, "account_limits": {"1001": 5000},
+                "description_patterns": ["crypto"], "ignore_case": true, "max_daily_transactions": 20}
+
+        Returns:
+            SuspiciousTransactionRules: the rules
+
+        Raises:
+            ValueError: if the configuration has an unknown key
+        """
+        unknown_keys = set(config) - CONFIG_KEYS
+        if unknown_keys:
+            raise ValueError(f"Unknown rule settings: {', '.join(sorted(unknown_keys))}")
+        return cls(**config)
+
+    @classmethod
+    def from_file(cls, file_path: str) -> "SuspiciousTransactionRules":
+        """
+        loads the rules from a JSON configuration file (see from_dict)
+
+        Args:
+            file_path (str): the path of the JSON file
+
+        Returns:
+            SuspiciousTransactionRules: the rules
+
+        Raises:
+            FileNotFoundError: if the file does not exist
+            ValueError: if the file is not valid JSON or has an unknown key
+        """
+        with open(file_path, "r") as config_file:
+            return cls.from_dict(json.load(config_file))
+
+    @property
+    def threshold(self) -> float:
+        """
+        accessor for the default amount threshold
+
+        Args: None
+
+        Returns:
+            float: amounts strictly greater than this are suspicious
+
+        Raises: None
+        """
+        return self.__threshold
+
+    @property
+    def flagged_currencies(self) -> frozenset:
+        """
+        accessor for the always flagged currencies
+
+        Args: None
+
+        Returns:
+            frozenset: the currencies that are always suspicious
+
+        Raises: None
+        """
+        return self.__flagged_currencies
+
+    @property
+    def max_daily_transactions(self) -> int:
+        """
+        accessor for the velocity limit
+
+        Args: None
+
+        Returns:
+            int: the most transactions per account and date before the next ones are suspicious, or None
+
+        Raises: None
+        """
+        return self.__max_daily_transactions
+
+    @property
+    def is_order_dependent(self) -> bool:
+        """
+        checks if the rules keep state across transactions (the velocity rules), in which case the transactions
+            must all be checked by one DataProcessor, in input order
+
+        Args: None
+
+        Returns:
+            bool: True if there is a velocity rule
+
+        Raises: None
+        """
+        return self.__max_daily_transactions is not None or bool(self.__velocity_detectors)
+
+    def to_dict(self) -> dict:
+        """
+        converts the rules back to a configuration dictionary (see from_dict)
+
+        Args: None
+
+        Returns:
+            dict: the configuration
+
+        Raises: None
+        """
+        return {
+            "threshold": self.__threshold,
+            "flagged_currencies": sorted(self.__flagged_currencies),
+            "currency_thresholds": dict(self.__currency_thresholds),
+            "account_limits": dict(self.__account_limits),
+            "description_patterns": list(self.__description_patterns),
+            "ignore_case": self.__ignore_case,
+            "max_daily_transactions": self.__max_daily_transactions,
+            "velocity_windows": [detector.to_dict() for detector in self.__velocity_detectors]
+        }
+
+    def compile(self, amount_scale: float = 1) -> CompiledRules:
+        """
+        compiles the rules into a CompiledRules, done once per DataProcessor. every call returns new compiled
+            rules with their own velocity counts
+
+        Args:
+            amount_scale (float): every amount limit is multiplied by this, so the compiled rules can be evaluated
+                directly on amounts in minor units, e.g. 100 for cents (default: 1)
+
+        Returns:
+            CompiledRules: the compiled rules
+
+        Raises: None
+        """
+        thresholds = {currency: threshold * amount_scale for currency, threshold in self.__currency_thresholds.items()}
+        for currency in self.__flagged_currencies:
+            thresholds[currency] = float("-inf")
+        account_limits = {account: limit * amount_scale for account, limit in self.__account_limits.items()}
+        return CompiledRules(thresholds, self.__threshold * amount_scale, account_limits,
+                             self.__description_pattern, self.__max_daily_transactions,
+                             [detector.copy(amount_scale) for detector in self.__velocity_detectors])
@@ -0,0 +1,349 @@
+"""
+Includes the TimeBucketedStatistics class, which keeps the transaction totals and counts per day for every
+transaction type and account, and rolls them up by day, week or month
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+from array import array
+from datetime import date
+from typing import Iterable
+from transaction.dates import parse_day_ordinal
+
+#the periods the daily totals can be rolled up to
+GRANULARITIES = ("day", "week", "month")
+
+
+def period_start(ordinal: int, granularity: str) -> int:
+    """
+    finds the first day of the period holding a day: the day itself, the monday of its ISO week or the first of
+        its month
+
+    Args:
+        ordinal (int): the day ordinal (see transaction.dates.parse_day_ordinal)
+        granularity (str): one of GRANULARITIES
+
+    Returns:
+        int: the ordinal of the first day of the period
+
+    Raises:
+        ValueError: if the granularity is unknown
+    """
+    if granularity == "day":
+        return ordinal
+    if granularity == "week":
+        #the ordinal 1 (0001-01-01) is a monday
+        return ordinal - (ordinal - 1) % 7
+    if granularity == "month":
+        return ordinal - date.fromordinal(ordinal).day + 1
+    raise ValueError(f"Unknown granularity: {granularity}, expected one of {GRANULARITIES}")
+
+
+class TimeBucketedStatistics:
+    """
+    keeps, for every transaction type, the total amount and the number of transactions of each day in two arrays
+    indexed by day ordinal minus the first day seen, so a day costs 16 bytes per type whatever the number of
+    transactions. accounts are many and each is active on few days, so (optionally) every account keeps a
+    dictionary of only the days it has transactions on instead of arrays spanning its first to last day. dates
+    are parsed with a cached parser, so each distinct date string is only parsed once. weeks and months are
+    rolled up from the days when queried
+    """
+
+    def __init__(self, by_account: bool = True, integer_amounts: bool = False):
+        """
+        initializes empty statistics
+
+        Args:
+            by_account (bool): if True a series is also kept per account (default: True)
+            integer_amounts (bool): if True the totals are kept as 64 bit integers, for amounts in minor units,
+                instead of floats (default: False)
+
+        Returns: None
+
+        Raises: None
+        """
+        self.__by_account = by_account
+        self.__amount_typecode = "q" if integer_amounts else "d"
+
+        #the total of a day before any amount is added, the same type as the arrays' totals
+        self.__zero = 0 if integer_amounts else 0.0
+
+        #transaction type -> [first day ordinal, totals array, counts array]
+        self.__by_type = {}
+
+        #account number -> {day ordinal: [total amount, transaction count]}, only the days with transactions
+        self.__accounts = {}
+
+        #how many transactions had a date that could not be parsed
+        self.__undated_count = 0
+
+    @property
+    def by_account(self) -> bool:
+        """
+        accessor for whether a series is kept per account
+
+        Args: None
+
+        Returns:
+            bool: True if accounts are bucketed
+
+        Raises: None
+        """
+        return self.__by_account
+
+    @property
+    def undated_count(self) -> int:
+        """
+        accessor for the number of transactions left out because their date could not be parsed
+
+        Args: None
+
+        Returns:
+            int: the number of transactions without a valid date
+
+        Raises: None
+        """
+        return self.__undated_count
+
+    @property
+    def transaction_types(self) -> list:
+        """
+        accessor for the transaction types with a series
+
+        Args: None
+
+        Returns:
+            list: the transaction types, in the order they were first seen
+
+        Raises: None
+        """
+        return list(self.__by_type)
+
+    def __series(self, series: dict, key: str, ordinal: int) -> tuple:
+        """
+        gives the series of a key, creating it or growing it so it covers a day
+
+        Args:
+            series (dict): the series of the transaction types or of the accounts
+            key (str): the transaction type or account number
+            ordinal (int): the day that must be covered
+
+        Returns:
+            tuple: the series ([first ordinal, totals, counts]) and the index of the day in its arrays
+
+        Raises: None
+        """
+        entry = series.get(key)
+        if entry is None:
+            entry = series[key] = [ordinal, array(self.__amount_typecode, [0]), array("q", [0])]
+            return entry, 0
+
+        first, totals, counts = entry
+        index = ordinal - first
+        if index < 0:
+            #a day before the first one: the arrays are shifted right once for the whole gap
+            entry[1] = array(self.__amount_typecode, bytes(-index * totals.itemsize)) + totals
+            entry[2] = array("q", bytes(-index * counts.itemsize)) + counts
+            entry[0] = ordinal
+            index = 0
+        elif index >= len(totals):
+            growth = index + 1 - len(totals)
+            totals.frombytes(bytes(growth * totals.itemsize))
+            counts.frombytes(bytes(growth * counts.itemsize))
+        return entry, index
+
+    def __add_account_day(self, account_number: str, ordinal: int, total, count: int) -> None:
+        """
+        adds a total and a count to one day of an account
+
+        Args:
+            account_number (str): the account number
+            ordinal (int): the day ordinal
+            total: the amount to add
+            count (int): the number of transactions to add
+
+        Returns: None
+
+        Raises: None
+        """
+        days = self.__accounts.get(account_number)
+        if days is None:
+            days = self.__accounts[account_number] = {}
+        day = days.get(ordinal)
+        if day is None:
+            days[ordinal] = [self.__zero + total, count]
+        else:
+            day[0] += total
+            day[1] += count
+
+    def add(self, transaction_type: str, account_number: str, amount, transaction_date: str) -> None:
+        """
+        adds one transaction to the day of its date
+
+        Args:
+            transaction_type (str): the transaction type
+            account_number (str): the account of the transaction
+            amount: the parsed amount
+            transaction_date (str): the Date field, an ISO 8601 date or date and time
+
+        Returns: None
+
+        Raises: None
+        """
+        try:
+            ordinal = parse_day_ordinal(transaction_date)
+        except (ValueError, TypeError):
+            self.__undated_count += 1
+            return
+        entry, index = self.__series(self.__by_type, transaction_type, ordinal)
+        entry[1][index] += amount
+        entry[2][index] += 1
+        if self.__by_account:
+            self.__add_account_day(account_number, ordinal, amount, 1)
+
+    def add_days(self, transaction_type: str, account_number: str, days: Iterable) -> None:
+        """
+        adds the daily totals of one transaction type and account, e.g. grouped from a TransactionBatch
+
+        Args:
+            transaction_type (str): the transaction type
+            account_number (str): the account of the transactions
+            days (Iterable): (date string, total amount, transaction count) tuples
+
+        Returns: None
+
+        Raises: None
+        """
+        for transaction_date, total, count in days:
+            try:
+                ordinal = parse_day_ordinal(transaction_date)
+            except (ValueError, TypeError):
+                self.__undated_count += count
+                continue
+            entry, index = self.__series(self.__by_type, transaction_type, ordinal)
+            entry[1][index] += total
+            entry[2][index] += count
+            if self.__by_account:
+                self.__add_account_day(account_number, ordinal, total, count)
+
+    def buckets(self, granularity: str = "day", transaction_type: str = None, account_number: str = None) -> list:
+        """
+        rolls the days up to periods, leaving out the periods without transactions
+
+        Args:
+            granularity (str): one of GRANULARITIES (default: "day")
+            transaction_type (str): only the transactions of this type (default: None, every type)
+            account_number (str): only the transactions of this account, every type (default: None)
+
+        Returns:
+            list: (first day of the period as a date, total amount, transaction count) tuples, oldest first
+
+        Raises:
+            ValueError: if the granularity is unknown, both a type and an account are given, or accounts are
+                not bucketed
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}, expected one of {GRANULARITIES}")
+        if account_number is not None:
+            if transaction_type is not None:
+                raise ValueError("Buckets are kept per transaction type or per account, not both")
+            if not self.__by_account:
+                raise ValueError("Accounts are not bucketed")
+            days = [(ordinal, total, count)
+                    for ordinal, (total, count) in self.__accounts.get(account_number, {}).items()]
+        else:
+            if transaction_type is not None:
+                entries = [self.__by_type[transaction_type]] if transaction_type in self.__by_type else []
+            else:
+                entries = list(self.__by_type.values())
+            days = [(first + index, totals[index], count)
+                    for first, totals, counts in entries for index, count in enumerate(counts) if count]
+
+        periods = {}
+        for ordinal, total, count in days:
+            period = periods.setdefault(period_start(ordinal, granularity), [0, 0])
+            period[0] += total
+            period[1] += count
+        return [(date.fromordinal(ordinal), total, count) for ordinal, (total, count) in sorted(periods.items())]
+
+    def update(self, other: "TimeBucketedStatistics") -> "TimeBucketedStatistics":
+        """
+        merges other statistics into these ones in place, e.g. the partial statistics of another process
+
+        Args:
+            other (TimeBucketedStatistics): the statistics to add
+
+        Returns:
+            TimeBucketedStatistics: these statistics
+
+        Raises: None
+        """
+        other_state = other.to_dict()
+        for key, (first, totals, counts) in other_state["transaction_types"].items():
+            last = first + len(counts) - 1
+            self.__series(self.__by_type, key, last)
+            entry, offset = self.__series(self.__by_type, key, first)
+            for index, count in enumerate(counts):
+                if count:
+                    entry[1][offset + index] += totals[index]
+                    entry[2][offset + index] += count
+        if self.__by_account:
+            for key, (ordinals, totals, counts) in other_state["accounts"].items():
+                for ordinal, total, count in zip(ordinals, totals, counts):
+                    self.__add_account_day(key, ordinal, total, count)
+        self.__undated_count += other.undated_count
+        return self
+
+    def to_dict(self) -> dict:
+        """
+        converts the statistics to a JSON serializable dictionary (e.g. for a checkpoint)
+
+        Args: None
+
+        Returns:
+            dict: the settings, every transaction type series as [first day ordinal, totals, counts] and every
+                account as [day ordinals, totals, counts] of its days with transactions, oldest first
+
+        Raises: None
+        """
+        accounts = {}
+        for key, days in self.__accounts.items():
+            ordinals = sorted(days)
+            accounts[key] = [ordinals, [days[ordinal][0] for ordinal in ordinals],
+                             [days[ordinal][1] for ordinal in ordinals]]
+        return {
+            "by_account": self.__by_account,
+            "integer_amounts": self.__amount_typecode == "q",
+            "undated_count": self.__undated_count,
+            "transaction_types": {key: [first, totals.tolist(), counts.tolist()]
+                                  for key, (first, totals, counts) in self.__by_type.items()},
+            "accounts": accounts
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "TimeBucketedStatistics":
+        """
+        rebuilds the statistics from to_dict's dictionary
+
+        Args:
+            state (dict): the dictionary
+
+        Returns:
+            TimeBucketedStatistics: the statistics
+
+        Raises:
+            KeyError: if a key is missing
+        """
+        statistics = cls(state["by_account"], state["integer_amounts"])
+        typecode = statistics.__amount_typecode
+        for key, (first, totals, counts) in state["transaction_types"].items():
+            statistics.__by_type[key] = [first, array(typecode, totals), array("q", counts)]
+        for key, (ordinals, totals, counts) in state["accounts"].items():
+            #older checkpoints saved accounts like the types, as a first ordinal and one total and count per day
+            if isinstance(ordinals, int):
+                ordinals = range(ordinals, ordinals + len(counts))
+            statistics.__accounts[key] = {ordinal: [total, count]
+                                          for ordinal, total, count in zip(ordinals, totals, counts) if count}
+        statistics.__undated_count = state["undated_count"]
+        return statistics
@@ -0,0 +1,918 @@
+"""
+Includes the TransactionBatch class, a columnar representation of a list of transactions
+used by the DataProcessor's batch mode
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import json
+import math
+import mmap
+import os
+import sys
+from array import array
+from itertools import accumulate, islice, repeat
+from typing import Iterable
+from data_processor.fx_rates import FxRateTable, convert_minor_units
+from data_processor.rules import CompiledRules
+from data_processor.sketches import TransactionSketches
+from data_processor.time_buckets import TimeBucketedStatistics
+from input_handler.input_handler import InputHandler
+from metrics.pipeline_metrics import PipelineMetrics
+from transaction.amounts import parse_minor_units
+
+try:
+    import numpy
+except ImportError:     # optional, the aggregates fall back to Python loops without it
+    numpy = None
+
+
+class CodedColumn:
+    """
+    a dictionary encoded string column: every distinct value is stored once in values and each row
+    only keeps the integer code of its value
+    """
+
+    def __init__(self, values: list = None, codes = None):
+        """
+        initializes the column, empty unless the values and codes of a saved column are given
+
+        Args:
+            values (list): the distinct values, the position of a value is its code (default: None)
+            codes: the code of every row, an array or a memoryview of a saved one (default: None)
+
+        Returns: None
+
+        Raises: None
+        """
+
+        #code of every row, in row order
+        self.codes = array("l") if codes is None else codes
+
+        #value -> code lookup, values are inserted in code order
+        self.__index = {value: code for code, value in enumerate(values or [])}
+
+        #the distinct values as a list, rebuilt from __index when new values are added
+        self.__values = list(values or [])
+
+    @property
+    def values(self) -> list:
+        """
+        accessor for the distinct values of the column, the position of a value is its code
+
+        Args: None
+
+        Returns:
+            list: the distinct values in the order they were first seen
+
+        Raises: None
+        """
+        if len(self.__values) != len(self.__index):
+            self.__values = list(self.__index)
+        return self.__values
+
+    def extend(self, values: Iterable) -> None:
+        """
+        appends rows to the column, adding any value that has not been seen yet to the dictionary
+
+        Args:
+            values (Iterable): the values of the new rows
+
+        Returns: None
+
+        Raises: None
+        """
+        if not isinstance(values, (list, tuple)):
+            values = list(values)
+        index = self.__index
+
+        #the new values get their codes in the order they are first seen, then every row is looked up in C
+        for value in dict.fromkeys(values):
+            if value not in index:
+                index[value] = len(index)
+        self.codes.fromlist(list(map(index.__getitem__, values)))
+
+    def code_of(self, value) -> int:
+        """
+        looks up the code of a value
+
+        Args:
+            value: the value to look up
+
+        Returns:
+            int: the code of the value, or -1 if the value never appears in the column
+
+        Raises: None
+        """
+        return self.__index.get(value, -1)
+
+    def __getitem__(self, row: int):
+        """
+        decodes the value of a given row
+
+        Args:
+            row (int): the row index
+
+        Returns:
+            the value stored in that row
+
+        Raises:
+            IndexError: if the row does not exist
+        """
+        return self.values[self.codes[row]]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+class StringColumn:
+    """
+    a column of mostly distinct strings (transaction IDs, amount texts): the values of every row are stored back
+    to back in one UTF-8 blob with the offset where each one starts, and a value is only decoded when its row is
+    read. this avoids one string object per row, both in a batch read by TransactionBatch.from_file and in a
+    loaded one. it has the same interface as CodedColumn, with every row being its own code, so values[codes[row]]
+    is the value of the row
+    """
+
+    def __init__(self, blob = None, offsets = None, none_rows: list = None):
+        """
+        initializes the column, empty unless the blob of a saved column is given
+
+        Args:
+            blob: the UTF-8 bytes of every value in row order, a memoryview of a saved batch (default: None)
+            offsets: the start of every row's value in blob plus the end of the last one (rows + 1 offsets)
+                (default: None)
+            none_rows (list): the rows whose value is None, stored as empty strings in blob (default: None)
+
+        Returns: None
+
+        Raises: None
+        """
+        self.__blob = bytearray() if blob is None else blob
+        self.__offsets = array("q", [0]) if offsets is None else offsets
+        self.__none_rows = set(none_rows or [])
+
+    @property
+    def codes(self) -> range:
+        """
+        accessor for the code of every row
+
+        Args: None
+
+        Returns:
+            range: the row indexes, every row is its own code
+
+        Raises: None
+        """
+        return range(len(self.__offsets) - 1)
+
+    @property
+    def values(self) -> "StringColumn":
+        """
+        accessor for the values of the column, indexed by code like CodedColumn.values
+
+        Args: None
+
+        Returns:
+            StringColumn: the column itself, as codes and rows are the same
+
+        Raises: None
+        """
+        return self
+
+    def parts(self) -> tuple:
+        """
+        accessor for the stored form of the column, as written by TransactionBatch.save
+
+        Args: None
+
+        Returns:
+            tuple: the blob, the offsets and the sorted list of rows whose value is None
+
+        Raises: None
+        """
+        return self.__blob, self.__offsets, sorted(self.__none_rows)
+
+    def extend(self, values: Iterable) -> None:
+        """
+        appends rows to the column, encoding the new values in one call when they are all ASCII
+
+        Args:
+            values (Iterable): the new values, strings or None
+
+        Returns: None
+
+        Raises: None
+        """
+        if not isinstance(values, (list, tuple)):
+            values = list(values)
+        if None in values:
+            first_row = len(self)
+            self.__none_rows.update(first_row + row for row, value in enumerate(values) if value is None)
+            values = ["" if value is None else value for value in values]
+
+        text = "".join(values)
+        if text.isascii():
+            self.__blob += text.encode("ascii")
+            lengths = map(len, values)
+        else:
+            encoded = [value.encode("utf-8") for value in values]
+            self.__blob += b"".join(encoded)
+            lengths = map(len, encoded)
+        offsets = list(accumulate(lengths, initial = self.__offsets[-1]))
+        del offsets[0]
+        self.__offsets.fromlist(offsets)
+
+    def code_of(self, value) -> int:
+        """
+        looks up the code of a value, by decoding the rows until it is found
+
+        Args:
+            value: the value to look up
+
+        Returns:
+            int: the first row holding the value, or -1 if the value never appears in the column
+
+        Raises: None
+        """
+        for row, row_value in enumerate(self):
+            if row_value == value:
+                return row
+        return -1
+
+    def __getitem__(self, row: int):
+        """
+        decodes the value of a given row
+
+        Args:
+            row (int): the row index
+
+        Returns:
+            str: the value stored in that row, or None
+
+        Raises:
+            IndexError: if the row does not exist
+        """
+        start, end = self.__offsets[row], self.__offsets[row + 1]
+        if row in self.__none_rows:
+            return None
+        return bytes(self.__blob[start:end]).decode("utf-8")
+
+    def __iter__(self):
+        return (self[row] for row in self.codes)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+class TransactionBatch:
+    """
+    stores transactions column by column (account, type and currency codes, float or integer minor unit amounts).
+    when NumPy is installed the aggregates are computed over the code and amount arrays with numpy.bincount and
+    numpy.add.at, so only the reading (see from_file) is done row by row in Python. without NumPy the same
+    aggregates are computed by Python loops over the columns. a batch can also be saved and memory mapped (see
+    save, load and ParsedInputCache)
+    """
+
+    #first bytes of a saved batch file, changed whenever the file layout changes
+    FILE_MAGIC = b"TXBATCH2"
+
+    #the columns that are never grouped by code, saved as a StringColumn blob when more than STRING_BLOB_RATIO of
+    #their rows have distinct values
+    STRING_BLOB_COLUMNS = frozenset(["transaction_ids", "raw_amounts", "descriptions"])
+    STRING_BLOB_RATIO = 0.5
+
+    #how many transactions are converted to columns at a time while building a batch
+    BUILD_CHUNK_SIZE = 65536
+
+    #how many CSV rows are read at a time by from_file, small enough that the row lists are freed before the
+    #garbage collector's older generations have to scan them
+    READ_CHUNK_SIZE = 1024
+
+    #column name -> attribute name of the column storing it, in input file order
+    ROW_COLUMNS = {
+        "Transaction ID": "transaction_ids",
+        "Account number": "account_numbers",
+        "Date": "dates",
+        "Transaction type": "transaction_types",
+        "Amount": "raw_amounts",
+        "Currency": "currencies",
+        "Description": "descriptions",
+    }
+
+    def __init__(self, amount_digits: int = None):
+        """
+        initializes an empty batch
+
+        Args:
+            amount_digits (int): if given, amounts are stored as exact integer minor units with this many decimal
+                places (array "q") instead of floats (default: None)
+
+        Returns: None
+
+        Raises: None
+        """
+        self.amount_digits = amount_digits
+
+        self.transaction_ids = CodedColumn()
+        self.account_numbers = CodedColumn()
+        self.dates = CodedColumn()
+        self.transaction_types = CodedColumn()
+        self.currencies = CodedColumn()
+        self.descriptions = CodedColumn()
+
+        #the amounts as parsed floats or minor units, used for every calculation
+        self.amounts = array("d") if amount_digits is None else array("q")
+
+        #the amounts exactly as they appeared in the input, so rows can be rebuilt unchanged
+        self.raw_amounts = CodedColumn()
+
+        #reason -> count of the rows left out of the batch by validation, None if the rows were validated elsewhere
+        self.rejection_reasons = None
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable, amount_digits: int = None) -> "TransactionBatch":
+        """
+        builds a batch from any iterable of transaction dictionaries, parsing each amount once
+
+        Args:
+            transactions (Iterable): transaction dictionaries with the input file's column names
+            amount_digits (int): if given, amounts are parsed from their text to integer minor units with this
+                many decimal places (default: None, floats)
+
+        Returns:
+            TransactionBatch: the batch holding every transaction in input order
+
+        Raises:
+            KeyError: if a transaction has no amount
+            ValueError: if an amount is not a number
+        """
+        batch = cls(amount_digits)
+        columns = [(name, getattr(batch, attribute)) for name, attribute in cls.ROW_COLUMNS.items()]
+        transactions = iter(transactions)
+
+        #converts a chunk at a time so each column is filled by one comprehension instead of a call per value
+        while True:
+            chunk = list(islice(transactions, cls.BUILD_CHUNK_SIZE))
+            if not chunk:
+                return batch
+            if amount_digits is None:
+                batch.amounts.extend([float(transaction["Amount"]) for transaction in chunk])
+            else:
+                batch.amounts.extend([parse_minor_units(transaction["Amount"], amount_digits) for transaction in chunk])
+            for name, column in columns:
+                column.extend([transaction.get(name) for transaction in chunk])
+
+    @classmethod
+    def from_file(cls, file_path: str, amount_digits: int = None) -> "TransactionBatch":
+        """
+        reads and validates an input file into a batch, counting the rejected rows in rejection_reasons. a CSV
+            file is read as lists of fields and turned into columns a chunk at a time, without building a
+            dictionary per row, the other formats are read with InputHandler.iter_input_data. the rows kept and
+            their rejection reasons are the same as InputHandler's validation
+
+        Args:
+            file_path (str): the path of the input file (CSV, JSON or JSON Lines, optionally compressed)
+            amount_digits (int): if given, amounts are parsed to integer minor units with this many decimal
+                places (default: None, floats)
+
+        Returns:
+            TransactionBatch: the batch holding every valid transaction in file order
+
+        Raises:
+            FileNotFoundError: if the file does not exist
+            ValueError: if a valid amount can't be parsed to minor units
+        """
+        input_handler = InputHandler(file_path)
+        if input_handler.get_file_format() != "csv":
+            metrics = PipelineMetrics()
+            batch = cls.from_transactions(InputHandler(file_path, metrics = metrics).iter_input_data(), amount_digits)
+            batch.rejection_reasons = metrics.rejection_reasons
+            return batch
+
+        batch = cls(amount_digits)
+        batch.rejection_reasons = {}
+        #the columns with about one distinct value per row are stored as string blobs from the start
+        batch.transaction_ids = StringColumn()
+        batch.raw_amounts = StringColumn()
+        rows = input_handler.iter_raw_csv_rows()
+        fieldnames = next(rows, [])
+        width = len(fieldnames)
+
+        #the position of every column, the last one wins when a name is repeated, like csv.DictReader
+        positions = {name: position for position, name in enumerate(fieldnames)}
+        columns = [(positions.get(name), getattr(batch, attribute)) for name, attribute in cls.ROW_COLUMNS.items()]
+        amount_position = positions.get("Amount")
+        type_position = positions.get("Transaction type")
+        valid_types = InputHandler.VALID_TRANSACTION_TYPES
+
+        while True:
+            chunk = list(islice(rows, cls.READ_CHUNK_SIZE))
+            if not chunk:
+                return batch
+
+            #blank lines are skipped and rows are cut or padded with None to the header, like csv.DictReader
+            if set(map(len, chunk)) != {width}:
+                chunk = [(row + [None] * (width - len(row)))[:width] for row in chunk if row]
+                if not chunk:
+                    continue
+            fields = list(zip(*chunk))
+            amount_texts = fields[amount_position] if amount_position is not None else [None] * len(chunk)
+            types = fields[type_position] if type_position is not None else [None] * len(chunk)
+
+            #validated with float() like InputHandler.is_valid_transaction, NaN is never >= 0. the whole chunk is
+            #checked with builtins first (a NaN amount makes the sum NaN), rows only when one of them fails
+            try:
+                floats = list(map(float, amount_texts))
+            except (ValueError, TypeError):
+                floats = [_float_or_nan(text) for text in amount_texts]
+            if not (min(floats) >= 0 and not math.isnan(sum(floats)) and valid_types.issuperset(types)):
+                valid = [amount >= 0 and transaction_type in valid_types
+                         for amount, transaction_type in zip(floats, types)]
+
+                #only the rejected rows are turned into dictionaries, to find their reason
+                reasons = batch.rejection_reasons
+                for row, is_valid in zip(chunk, valid):
+                    if not is_valid:
+                        reason = InputHandler.rejection_reason(dict(zip(fieldnames, row)))
+                        reasons[reason] = reasons.get(reason, 0) + 1
+                chunk = [row for row, is_valid in zip(chunk, valid) if is_valid]
+                floats = [amount for amount, is_valid in zip(floats, valid) if is_valid]
+                if not chunk:
+                    continue
+                fields = list(zip(*chunk))
+
+            if amount_digits is None:
+                batch.amounts.fromlist(floats)
+            else:
+                batch.amounts.fromlist([parse_minor_units(text, amount_digits) for text in fields[amount_position]])
+            for position, column in columns:
+                column.extend(fields[position] if position is not None else repeat(None, len(chunk)))
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def save(self, file_path: str) -> None:
+        """
+        writes the batch to a compact binary file: a JSON header holding the distinct values of each low
+            cardinality column, followed by the raw bytes of the code and amount arrays, each aligned to 8 bytes.
+            codes are stored in the smallest unsigned typecode that fits the column's dictionary. string columns
+            with mostly distinct values (e.g. transaction IDs) are stored as a UTF-8 blob and offsets instead of
+            a dictionary. the file is written to a temporary name first and then renamed, so readers never see a
+            partial file
+
+        Args:
+            file_path (str): the path of the file to write
+
+        Returns: None
+
+        Raises: None
+        """
+        arrays = [("amounts", self.amounts)]
+        values = {}
+        strings = {}
+        for attribute in self.ROW_COLUMNS.values():
+            column = getattr(self, attribute)
+            column_values = column.values
+            if isinstance(column, StringColumn):
+                blob, offsets, none_rows = column.parts()
+                arrays.append((attribute + ".blob", blob))
+                arrays.append((attribute + ".offsets", array(_smallest_typecode(offsets[-1]), offsets)))
+                strings[attribute] = none_rows
+            elif attribute in self.STRING_BLOB_COLUMNS and len(column_values) > len(self) * self.STRING_BLOB_RATIO \
+                    and all(value is None or isinstance(value, str) for value in column_values):
+                encoded = [b"" if value is None else value.encode("utf-8") for value in column_values]
+                blob = b"".join([encoded[code] for code in column.codes])
+                offsets = array(_smallest_typecode(len(blob)), [0])
+                offsets.extend(accumulate(len(encoded[code]) for code in column.codes))
+                arrays.append((attribute + ".blob", blob))
+                arrays.append((attribute + ".offsets", offsets))
+                none_code = column.code_of(None)
+                strings[attribute] = [row for row, code in enumerate(column.codes) if code == none_code]
+            else:
+                arrays.append((attribute, array(_smallest_typecode(len(column_values)), column.codes)))
+                values[attribute] = column_values
+
+        #works out where each array starts in the file
+        header = {"rows": len(self), "byteorder": sys.byteorder, "amount_digits": self.amount_digits,
+                  "rejection_reasons": self.rejection_reasons, "values": values, "strings": strings, "arrays": []}
+        offset = 0
+        for name, data in arrays:
+            data = memoryview(data)
+            header["arrays"].append({"name": name, "typecode": data.format, "offset": offset, "size": data.nbytes})
+            offset += _aligned(data.nbytes)
+
+        header_bytes = json.dumps(header).encode("utf-8")
+        data_start = _aligned(len(self.FILE_MAGIC) + 8 + len(header_bytes))
+        temporary_path = file_path + ".tmp"
+        with open(temporary_path, "wb") as batch_file:
+            batch_file.write(self.FILE_MAGIC)
+            batch_file.write(len(header_bytes).to_bytes(8, "little"))
+            batch_file.write(header_bytes)
+            for (name, data), entry in zip(arrays, header["arrays"]):
+                batch_file.seek(data_start + entry["offset"])
+                batch_file.write(memoryview(data).cast("B"))
+            batch_file.truncate(data_start + offset)
+        os.replace(temporary_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> "TransactionBatch":
+        """
+        reads a batch written by save, the file is memory mapped and the code and amount columns are
+            memoryviews over the mapping, so nothing is parsed or copied until it is used
+
+        Args:
+            file_path (str): the path of the file to read
+
+        Returns:
+            TransactionBatch: the saved batch
+
+        Raises:
+            ValueError: if the file is not a batch file or was written on a machine with another byte order
+        """
+        with open(file_path, "rb") as batch_file:
+            mapped_file = mmap.mmap(batch_file.fileno(), 0, access = mmap.ACCESS_READ)
+
+        magic_size = len(cls.FILE_MAGIC)
+        if mapped_file[:magic_size] != cls.FILE_MAGIC:
+            raise ValueError(f"Not a transaction batch file: {file_path}")
+        header_size = int.from_bytes(mapped_file[magic_size:magic_size + 8], "little")
+        header = json.loads(mapped_file[magic_size + 8:magic_size + 8 + header_size].decode("utf-8"))
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"Transaction batch file was written with another byte order: {file_path}")
+
+        data_start = _aligned(magic_size + 8 + header_size)
+        buffer = memoryview(mapped_file)
+        arrays = {
+            entry["name"]: buffer[data_start + entry["offset"]:data_start + entry["offset"] + entry["size"]].cast(entry["typecode"])
+            for entry in header["arrays"]
+        }
+
+        batch = cls(header.get("amount_digits"))
+        batch.rejection_reasons = header.get("rejection_reasons")
+        batch.amounts = arrays["amounts"]
+        for attribute in cls.ROW_COLUMNS.values():
+            if attribute in header["strings"]:
+                column = StringColumn(arrays[attribute + ".blob"], arrays[attribute + ".offsets"],
+                                      header["strings"][attribute])
+            else:
+                column = CodedColumn(header["values"][attribute], arrays[attribute])
+            setattr(batch, attribute, column)
+        return batch
+
+    def row(self, index: int) -> dict:
+        """
+        rebuilds the transaction dictionary stored at a given row
+
+        Args:
+            index (int): the row index
+
+        Returns:
+            dict: the transaction with the same keys and values it was read with
+
+        Raises:
+            IndexError: if the row does not exist
+        """
+        return self.rows([index])[0]
+
+    def rows(self, indexes: Iterable) -> list:
+        """
+        rebuilds the transaction dictionaries stored at several rows, decoding each column once for all of them
+
+        Args:
+            indexes (Iterable): the row indexes
+
+        Returns:
+            list: the transactions with the same keys and values they were read with, in the order of indexes
+
+        Raises:
+            IndexError: if a row does not exist
+        """
+        columns = [(name, getattr(self, attribute).values, getattr(self, attribute).codes)
+                   for name, attribute in self.ROW_COLUMNS.items()]
+        return [{name: values[codes[index]] for name, values, codes in columns} for index in indexes]
+
+    def account_summaries(self) -> dict:
+        """
+        groups the amounts by account code to build the account summaries, accounts appear in the order
+        they were first seen, the same as DataProcessor.update_account_summary
+
+        Args: None
+
+        Returns:
+            dict: account number -> summary dictionary (account_number, balance, total_deposits, total_withdrawals)
+
+        Raises: None
+        """
+        account_count = len(self.account_numbers.values)
+        deposit_code = self.transaction_types.code_of("deposit")
+        withdrawal_code = self.transaction_types.code_of("withdrawal")
+
+        if numpy is not None:
+            accounts = _numpy_codes(self.account_numbers.codes)
+            types = _numpy_codes(self.transaction_types.codes)
+            amounts = numpy.asarray(self.amounts)
+            is_deposit = types == deposit_code
+            is_withdrawal = types == withdrawal_code
+            is_balance = is_deposit | is_withdrawal
+            balances = _grouped_sums(accounts[is_balance],
+                                     numpy.where(is_withdrawal, -amounts, amounts)[is_balance], account_count)
+            deposits = _grouped_sums(accounts[is_deposit], amounts[is_deposit], account_count)
+            withdrawals = _grouped_sums(accounts[is_withdrawal], amounts[is_withdrawal], account_count)
+        else:
+            balances = [0] * account_count
+            deposits = [0] * account_count
+            withdrawals = [0] * account_count
+            for account, transaction_type, amount in zip(self.account_numbers.codes,
+                                                         self.transaction_types.codes,
+                                                         self.amounts):
+                if transaction_type == deposit_code:
+                    balances[account] += amount
+                    deposits[account] += amount
+                elif transaction_type == withdrawal_code:
+                    balances[account] -= amount
+                    withdrawals[account] += amount
+
+        return {
+            account_number: {
+                "account_number": account_number,
+                "balance": balances[code],
+                "total_deposits": deposits[code],
+                "total_withdrawals": withdrawals[code]
+            }
+            for code, account_number in enumerate(self.account_numbers.values)
+        }
+
+    def transaction_statistics(self) -> dict:
+        """
+        groups the amounts by transaction type code to build the transaction statistics
+
+        Args: None
+
+        Returns:
+            dict: transaction type -> dictionary of total_amount and transaction_count
+
+        Raises: None
+        """
+        type_count = len(self.transaction_types.values)
+
+        if numpy is not None:
+            types = _numpy_codes(self.transaction_types.codes)
+            totals = _grouped_sums(types, numpy.asarray(self.amounts), type_count)
+            counts = numpy.bincount(types, minlength = type_count).tolist()
+        else:
+            totals = [0] * type_count
+            counts = [0] * type_count
+            for transaction_type, amount in zip(self.transaction_types.codes, self.amounts):
+                totals[transaction_type] += amount
+                counts[transaction_type] += 1
+
+        return {
+            transaction_type: {
+                "total_amount": totals[code],
+                "transaction_count": counts[code]
+            }
+            for code, transaction_type in enumerate(self.transaction_types.values)
+        }
+
+    def normalized(self, fx_rates: FxRateTable) -> "TransactionBatch":
+        """
+        converts the amounts to the FX table's reporting currency, the rate of each distinct currency code (and date
+        code, when the rates change over time) is looked up once and every row is then converted with one list
+        lookup and one multiplication. the other columns are shared with this batch, so rows are still rebuilt
+        with their original amount and currency. rows whose currency (or date) has no rate are left out, the
+        caller counts them from the difference in length
+
+        Args:
+            fx_rates (FxRateTable): the rates to convert with
+
+        Returns:
+            TransactionBatch: a batch with the converted amounts, or this batch if every row is already in the
+                reporting currency
+
+        Raises: None
+        """
+        currencies = self.currencies.values
+        if all(currency == fx_rates.reporting_currency for currency in currencies):
+            return self
+
+        #the rate of every currency code, or of every (currency code, date code) pair found in the batch
+        if fx_rates.is_dated:
+            dates = self.dates.values
+            keys = list(zip(self.currencies.codes, self.dates.codes))
+            pairs = {key: (currencies[key[0]], dates[key[1]]) for key in set(keys)}
+        else:
+            keys = self.currencies.codes
+            pairs = {code: (currency, None) for code, currency in enumerate(currencies)}
+        rates = {}
+        for key, (currency, rate_date) in pairs.items():
+            try:
+                rates[key] = fx_rates.rate(currency, rate_date)
+            except (ValueError, TypeError):
+                pass
+
+        #the rows without a rate are rare, they are dropped by rebuilding the batch from the other rows
+        if len(rates) < len(pairs):
+            kept = self.rows([index for index, key in enumerate(keys) if key in rates])
+            return TransactionBatch.from_transactions(kept, self.amount_digits).normalized(fx_rates)
+
+        batch = TransactionBatch(self.amount_digits)
+        batch.rejection_reasons = self.rejection_reasons
+        for attribute in self.ROW_COLUMNS.values():
+            setattr(batch, attribute, getattr(self, attribute))
+        if self.amount_digits is None and numpy is not None and not fx_rates.is_dated:
+            float_rates = numpy.array([float(rates[code]) for code in range(len(currencies))])
+            converted = numpy.asarray(self.amounts) * float_rates[_numpy_codes(keys)]
+            batch.amounts = array("d", converted.tobytes())
+        elif self.amount_digits is None:
+            float_rates = {key: float(rate) for key, rate in rates.items()}
+            batch.amounts = array("d", [amount * float_rates[key] for amount, key in zip(self.amounts, keys)])
+        else:
+            batch.amounts = array("q", [convert_minor_units(amount, rates[key]) for amount, key in zip(self.amounts, keys)])
+        return batch
+
+    def update_sketches(self, sketches: TransactionSketches) -> None:
+        """
+        groups the amounts and distinct account codes by transaction type code and adds them to the sketches, so
+        each account is hashed once per type instead of once per row
+
+        Args:
+            sketches (TransactionSketches): the sketches to add the batch to
+
+        Returns: None
+
+        Raises: None
+        """
+        type_count = len(self.transaction_types.values)
+        amounts = [[] for _ in range(type_count)]
+        accounts = [set() for _ in range(type_count)]
+
+        for account, transaction_type, amount in zip(self.account_numbers.codes,
+                                                     self.transaction_types.codes,
+                                                     self.amounts):
+            amounts[transaction_type].append(amount)
+            accounts[transaction_type].add(account)
+
+        account_numbers = self.account_numbers.values
+        for code, transaction_type in enumerate(self.transaction_types.values):
+            sketches.extend(transaction_type, [account_numbers[account] for account in sorted(accounts[code])],
+                            amounts[code])
+
+    def update_time_buckets(self, time_buckets: TimeBucketedStatistics) -> None:
+        """
+        groups the amounts by transaction type, account and date codes and adds the daily totals to the time
+        buckets, so each distinct date string is handed over once per group instead of once per row
+
+        Args:
+            time_buckets (TimeBucketedStatistics): the statistics to add the batch to
+
+        Returns: None
+
+        Raises: None
+        """
+        by_account = time_buckets.by_account
+        account_codes = self.account_numbers.codes if by_account else repeat(0)
+
+        #(type code, account code, date code) -> [total amount, transaction count]
+        groups = {}
+        for group_key, amount in zip(zip(self.transaction_types.codes, account_codes, self.dates.codes), self.amounts):
+            group = groups.get(group_key)
+            if group is None:
+                groups[group_key] = [amount, 1]
+            else:
+                group[0] += amount
+                group[1] += 1
+
+        #the days of every (type, account) pair are added in one call
+        days = {}
+        dates = self.dates.values
+        for (transaction_type, account, day), (total, count) in groups.items():
+            days.setdefault((transaction_type, account), []).append((dates[day], total, count))
+        for (transaction_type, account), daily_totals in days.items():
+            time_buckets.add_days(self.transaction_types.values[transaction_type],
+                                  self.account_numbers.values[account] if by_account else None, daily_totals)
+
+    def suspicious_rows(self, rules: CompiledRules) -> list:
+        """
+        finds the rows flagged by the rules with column-wise lookups: each rule is evaluated once per distinct
+            value of its column (a threshold per currency, a limit per account, a pattern match per description)
+            and the rows are then checked against those per code tables in one pass. the velocity rules update
+            the compiled rules' per account state row by row, in row order
+
+        Args:
+            rules (CompiledRules): the compiled suspicious transaction rules
+
+        Returns:
+            list: the indexes of the suspicious rows, in row order
+
+        Raises: None
+        """
+        default_threshold = rules.default_threshold
+        thresholds = [rules.thresholds.get(currency, default_threshold) for currency in self.currencies.values]
+        if rules.extra_check is None and numpy is not None:
+            amounts = numpy.asarray(self.amounts)
+            flagged = amounts > _numpy_limits(thresholds, amounts)[_numpy_codes(self.currencies.codes)]
+            return numpy.flatnonzero(flagged).tolist()
+        if rules.extra_check is None:
+            return [
+                index
+                for index, (amount, currency) in enumerate(zip(self.amounts, self.currencies.codes))
+                if amount > thresholds[currency]
+            ]
+
+        #True per code if every row with that value is suspicious, whatever its amount
+        flagged_descriptions = [False] * len(self.descriptions.values)
+        if rules.description_pattern is not None:
+            search = rules.description_pattern.search
+            flagged_descriptions = [bool(description) and search(description) is not None
+                                    for description in self.descriptions.values]
+        no_limit = float("inf")
+        limits = [rules.account_limits.get(str(account_number), no_limit) for account_number in self.account_numbers.values]
+
+        #the velocity rules are evaluated row by row in row order, as they depend on the earlier rows of the account
+        over_velocity_limit = None
+        if rules.max_daily_transactions is not None or rules.velocity_detectors:
+            account_numbers = self.account_numbers.values
+            transaction_types = self.transaction_types.values
+            dates = self.dates.values
+            count_daily_transaction = rules.count_daily_transaction
+            max_daily_transactions = rules.max_daily_transactions
+            updates = [detector.update for detector in rules.velocity_detectors]
+            over_velocity_limit = []
+            columns = zip(self.account_numbers.codes, self.transaction_types.codes, self.amounts, self.dates.codes)
+            for account, transaction_type, amount, date in columns:
+                account_number = account_numbers[account]
+                suspicious = False
+                if max_daily_transactions is not None:
+                    suspicious = count_daily_transaction(account_number, dates[date]) > max_daily_transactions
+                for update in updates:
+                    if update(account_number, transaction_types[transaction_type], amount, dates[date]):
+                        suspicious = True
+                over_velocity_limit.append(suspicious)
+
+        if numpy is not None:
+            amounts = numpy.asarray(self.amounts)
+            flagged = amounts > _numpy_limits(thresholds, amounts)[_numpy_codes(self.currencies.codes)]
+            flagged |= amounts > _numpy_limits(limits, amounts)[_numpy_codes(self.account_numbers.codes)]
+            flagged |= numpy.array(flagged_descriptions, bool)[_numpy_codes(self.descriptions.codes)]
+            if over_velocity_limit is not None:
+                flagged |= numpy.array(over_velocity_limit, bool)
+            return numpy.flatnonzero(flagged).tolist()
+
+        columns = zip(self.amounts, self.currencies.codes, self.account_numbers.codes, self.descriptions.codes)
+        return [
+            index
+            for index, (amount, currency, account, description) in enumerate(columns)
+            if amount > thresholds[currency] or amount > limits[account] or flagged_descriptions[description]
+            or (over_velocity_limit is not None and over_velocity_limit[index])
+        ]
+
+def _float_or_nan(text) -> float:
+    """Parses an amount with float(), giving NaN (never a valid amount) if it is not a number."""
+    try:
+        return float(text)
+    except (ValueError, TypeError):
+        return math.nan
+
+def _numpy_codes(codes):
+    """Wraps a code column (an array, a memoryview of a saved one or a range) as a NumPy index array."""
+    if isinstance(codes, range):
+        return numpy.arange(codes.start, codes.stop, codes.step)
+    return numpy.asarray(codes).astype(numpy.intp, copy = False)
+
+def _numpy_limits(limits: list, amounts):
+    """
+    converts per code thresholds or limits to a NumPy array that compares with the amounts like Python does: limits
+    are floats for float amounts, and rounded down to int64 for integer minor unit amounts (an integer is greater
+    than a limit exactly when it is greater than the limit rounded down), infinite limits being clamped
+    """
+    if amounts.dtype.kind == "f":
+        return numpy.array(limits, numpy.float64)
+    bounds = numpy.iinfo(numpy.int64)
+    return numpy.array([bounds.min if limit == -math.inf else bounds.max if limit == math.inf
+                        else min(max(math.floor(limit), bounds.min), bounds.max) for limit in limits], numpy.int64)
+
+def _grouped_sums(codes, amounts, size: int) -> list:
+    """
+    sums the amounts of each code with NumPy, in row order so float totals are the same as a Python loop. integer
+    minor units are summed exactly with numpy.add.at, and a code without rows sums to the int 0 like the loops
+    """
+    if amounts.dtype.kind == "f":
+        totals = numpy.bincount(codes, amounts, size).tolist()
+        counts = numpy.bincount(codes, minlength = size).tolist()
+        return [total if count else 0 for total, count in zip(totals, counts)]
+    totals = numpy.zeros(size, numpy.int64)
+    numpy.add.at(totals, codes, amounts)
+    return totals.tolist()
+
+def _smallest_typecode(max_value: int) -> str:
+    """Picks the smallest unsigned array typecode that holds every integer from 0 to max_value."""
+    for typecode in ("B", "H", "I", "L", "Q"):
+        if max_value < 1 << (8 * array(typecode).itemsize):
+            return typecode
+    raise OverflowError(f"{max_value} does not fit in 64 bits")
+
+def _aligned(size: int) -> int:
+    """Rounds a byte count up to a multiple of 8 so every saved array starts aligned."""
+    return (size + 7) // 8 * 8
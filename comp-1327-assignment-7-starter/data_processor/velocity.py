@@ -0,0 +1,175 @@
+"""
+Includes the VelocityDetector class, which flags bursts of transactions on an account over a sliding time window
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+from bisect import insort
+from collections import OrderedDict, deque
+from typing import Iterable
+from transaction.dates import parse_timestamp
+
+
+class VelocityDetector:
+    """
+    keeps, for every account, the (timestamp, amount) of its transactions within the last window_hours in a deque
+    sorted by timestamp along with their running count and total, so each update only appends one entry and pops
+    the ones that left the window (O(1) amortized, an out of order transaction is inserted in place instead). a transaction is suspicious when the account's count or total over the window,
+    including it, goes over the limits. accounts are kept in least recently used order and the least recently
+    active one is dropped once there are more than max_accounts, so memory stays bounded
+    """
+
+    def __init__(self, window_hours: float = 24, max_count: int = None, max_total: float = None,
+                 transaction_types: Iterable = None, max_accounts: int = 1000000):
+        """
+        initializes the detector
+
+        Args:
+            window_hours (float): the length of the sliding window, ending at the newest transaction of the account
+                (default: 24)
+            max_count (int): more than this many transactions in the window are suspicious (default: None)
+            max_total (float): a total amount over this in the window is suspicious (default: None)
+            transaction_types (Iterable): only transactions of these types are counted, e.g. ["withdrawal"]
+                (default: None, every type)
+            max_accounts (int): the most accounts tracked at once (default: 1000000)
+
+        Returns: None
+
+        Raises:
+            ValueError: if neither max_count nor max_total is given, or the window or max_accounts is not positive
+        """
+        if max_count is None and max_total is None:
+            raise ValueError("A velocity window needs a max_count or a max_total")
+        if window_hours <= 0 or max_accounts <= 0:
+            raise ValueError("window_hours and max_accounts must be positive")
+
+        self.__window_seconds = window_hours * 3600
+        self.__max_count = max_count
+        self.__max_total = max_total
+        self.__transaction_types = frozenset(transaction_types) if transaction_types is not None else None
+        self.__max_accounts = max_accounts
+
+        #account number -> [deque of (timestamp, amount), total amount, newest timestamp], least recently used first
+        self.__windows = OrderedDict()
+
+    @classmethod
+    def from_dict(cls, config: dict) -> "VelocityDetector":
+        """
+        builds a detector from a configuration dictionary, whose keys are the __init__ argument names
+
+        Args:
+            config (dict): the configuration, e.g. {"window_hours": 24, "max_count": 5, "transaction_types": ["withdrawal"]}
+
+        Returns:
+            VelocityDetector: the detector
+
+        Raises:
+            ValueError: if the configuration is invalid
+        """
+        try:
+            return cls(**config)
+        except TypeError as error:
+            raise ValueError(f"Invalid velocity window: {config}") from error
+
+    def to_dict(self) -> dict:
+        """
+        converts the detector's settings back to a configuration dictionary (see from_dict)
+
+        Args: None
+
+        Returns:
+            dict: the configuration
+
+        Raises: None
+        """
+        return {
+            "window_hours": self.__window_seconds / 3600,
+            "max_count": self.__max_count,
+            "max_total": self.__max_total,
+            "transaction_types": sorted(self.__transaction_types) if self.__transaction_types is not None else None,
+            "max_accounts": self.__max_accounts
+        }
+
+    def copy(self, amount_scale: float = 1) -> "VelocityDetector":
+        """
+        creates a detector with the same settings and no tracked accounts
+
+        Args:
+            amount_scale (float): max_total is multiplied by this, for amounts given in minor units (default: 1)
+
+        Returns:
+            VelocityDetector: the new detector
+
+        Raises: None
+        """
+        settings = self.to_dict()
+        if settings["max_total"] is not None:
+            settings["max_total"] *= amount_scale
+        return VelocityDetector(**settings)
+
+    @property
+    def tracked_accounts(self) -> int:
+        """
+        accessor for the number of accounts currently tracked
+
+        Args: None
+
+        Returns:
+            int: the number of accounts with transactions in their window
+
+        Raises: None
+        """
+        return len(self.__windows)
+
+    def update(self, account_number: str, transaction_type: str, amount: float, date: str) -> bool:
+        """
+        adds a transaction to its account's window and checks the window against the limits. transactions of
+            other types, with a date that can't be parsed or older than the account's window are ignored
+
+        Args:
+            account_number (str): the account of the transaction
+            transaction_type (str): the type of the transaction
+            amount (float): the parsed amount
+            date (str): the Date field, an ISO 8601 date or date and time
+
+        Returns:
+            bool: True if the account's window goes over a limit with this transaction
+
+        Raises: None
+        """
+        if self.__transaction_types is not None and transaction_type not in self.__transaction_types:
+            return False
+        try:
+            timestamp = parse_timestamp(date)
+        except (ValueError, TypeError):
+            return False
+
+        windows = self.__windows
+        window = windows.get(account_number)
+        if window is None:
+            window = windows[account_number] = [deque(), 0, timestamp]
+            if len(windows) > self.__max_accounts:
+                windows.popitem(last=False)
+        else:
+            windows.move_to_end(account_number)
+
+        #the window ends at the newest timestamp seen, so rows that are slightly out of order are still counted, in
+        #timestamp order so they leave the window at the right time
+        entries = window[0]
+        if timestamp >= window[2]:
+            window[2] = timestamp
+            entries.append((timestamp, amount))
+        elif timestamp > window[2] - self.__window_seconds:
+            insort(entries, (timestamp, amount))
+        else:
+            return False
+        start = window[2] - self.__window_seconds
+        window[1] += amount
+        while entries[0][0] <= start:
+            window[1] -= entries.popleft()[1]
+            if not entries:
+                break
+
+        return (self.__max_count is not None and len(entries) > self.__max_count) \
+            or (self.__max_total is not None and window[1] > self.__max_total)
@@ -0,0 +1,318 @@
+"""Module that detects compressed input files and opens them as text
+streams, decompressing multi-member gzip files in parallel
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1.0.0"
+
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import os
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Generator, Iterator
+
+# Compression of the files ending in each suffix
+COMPRESSION_SUFFIXES = {"gz": "gzip", "gzip": "gzip", "bz2": "bz2", "xz": "xz"}
+
+# First bytes of the files written by each compressor
+COMPRESSION_MAGIC = {b"\x1f\x8b": "gzip", b"BZh": "bz2", b"\xfd7zXZ\x00": "xz"}
+
+# Functions opening a compressed file, by compression
+COMPRESSION_OPENERS = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+
+# Start of every gzip member: the magic bytes and the deflate method
+GZIP_MEMBER_HEADER = b"\x1f\x8b\x08"
+
+# Compressed bytes of a multi-member gzip file handed to one worker at a time
+# (more if a single member is bigger)
+SEGMENT_SIZE = 1 << 19
+
+# Most compressed bytes being decompressed ahead of the reader, whatever the
+# file size or the number of workers, so memory stays bounded
+MAX_PENDING_SIZE = 1 << 22
+
+# Most decompressed bytes a worker holds for one segment. A segment that
+# inflates to more (e.g. one huge member in `cat big.gz small.gz`) is
+# given up by its worker and decompressed by the reader as it reads
+MAX_SEGMENT_OUTPUT = 1 << 23
+
+# Compressed bytes fed to zlib at a time while inflating a member
+INFLATE_BLOCK_SIZE = 1 << 18
+
+# Most decompressed bytes zlib returns at a time, so a highly compressed
+# block never inflates into one big chunk
+INFLATE_CHUNK_SIZE = 1 << 18
+
+
+def sniff_compression(file_path: str) -> str:
+    """Detect the compression of a file from its first bytes.
+
+    Args:
+        file_path (str): The path to the file.
+
+    Returns:
+        str: 'gzip', 'bz2' or 'xz', or None if the file is not compressed.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    with open(file_path, "rb") as input_file:
+        head = input_file.read(max(len(magic) for magic in COMPRESSION_MAGIC))
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def open_compressed_text(file_path: str, compression: str, workers: int = None):
+    """Open a compressed file as a text stream, decompressing as it is read.
+
+    gzip files made of several members (e.g. concatenated or written by
+    bgzip/pigz) are decompressed by a pool of threads, one segment of
+    members each, and the output is still read in file order.
+
+    Args:
+        file_path (str): The path to the compressed file.
+        compression (str): 'gzip', 'bz2' or 'xz'.
+        workers (int): Threads decompressing a multi-member gzip file.
+            Defaults to the number of CPUs; 1 reads it sequentially.
+
+    Returns:
+        TextIO: The decompressed text, UTF-8 decoded.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the compression is unknown.
+    """
+    if compression not in COMPRESSION_OPENERS:
+        raise ValueError(f"Unknown compression: {compression}")
+    workers = workers or os.cpu_count() or 1
+    if compression == "gzip" and workers > 1:
+        with open(file_path, "rb") as input_file:
+            size = os.fstat(input_file.fileno()).st_size
+            if size >= 2 * SEGMENT_SIZE:
+                data = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+                starts = _segment_starts(data)
+                if len(starts) > 1:
+                    raw = _ChunkReader(_iter_parallel_members(data, starts, workers))
+                    return io.TextIOWrapper(io.BufferedReader(raw), encoding="utf-8")
+                data.close()
+    return COMPRESSION_OPENERS[compression](file_path, "rt", encoding="utf-8")
+
+
+def _segment_starts(data) -> list:
+    """Pick the offsets where the workers start decompressing, about
+    SEGMENT_SIZE bytes apart.
+
+    Every offset holds the gzip member header bytes, but the bytes can also
+    occur by chance inside compressed data, so an offset is only a candidate
+    member start (see _iter_parallel_members).
+
+    Args:
+        data: The compressed file contents.
+
+    Returns:
+        list: Increasing offsets, the first one 0.
+    """
+    starts = [0]
+    while True:
+        offset = data.find(GZIP_MEMBER_HEADER, starts[-1] + SEGMENT_SIZE)
+        if offset < 0:
+            return starts
+        starts.append(offset)
+
+
+def _inflate_members(data, start: int, end: int) -> Generator[bytes, None, int]:
+    """Decompress the whole gzip members starting from start until one
+    ends at or after end.
+
+    Args:
+        data: The compressed file contents.
+        start (int): The offset of a member.
+        end (int): Stop at the first member boundary at or after this offset.
+
+    Yields:
+        bytes: Decompressed chunks of at most INFLATE_CHUNK_SIZE bytes, in
+        file order.
+
+    Returns:
+        int: The offset the last member ended at.
+
+    Raises:
+        zlib.error: If no valid member starts at start.
+    """
+    size = len(data)
+    position = start
+    # The views are released as soon as they are used, so the file can be closed even after an error
+    with memoryview(data) as view:
+        while position < end and position < size:
+            # Trailing zero padding after the last member is ignored, like gzip does
+            if not data[position:position + INFLATE_BLOCK_SIZE].strip(b"\x00") \
+                    and not data[position:].strip(b"\x00"):
+                position = size
+                break
+            decompressor = zlib.decompressobj(wbits=31)
+            while not decompressor.eof:
+                if position >= size:
+                    raise zlib.error("Truncated gzip member")
+                # The input zlib did not get to (its output being capped) is fed again next time, the
+                # input after the end of the member is the next member
+                with view[position:position + INFLATE_BLOCK_SIZE] as block:
+                    chunk = decompressor.decompress(block, INFLATE_CHUNK_SIZE)
+                    unread = decompressor.unused_data if decompressor.eof else decompressor.unconsumed_tail
+                    position += len(block) - len(unread)
+                if chunk:
+                    yield chunk
+    return position
+
+
+def _inflate_segment(data, start: int, end: int) -> tuple:
+    """Decompress a segment on a worker thread, see _inflate_members.
+
+    The worker gives up once the segment has inflated to more than
+    MAX_SEGMENT_OUTPUT bytes, so a member much bigger than SEGMENT_SIZE is
+    never held in memory whole.
+
+    Args:
+        data: The compressed file contents.
+        start (int): The offset of a member.
+        end (int): Stop at the first member boundary at or after this offset.
+
+    Returns:
+        tuple: The decompressed chunks (a deque) and the offset the last
+        member ended at, or None and start if the segment inflates to more
+        than MAX_SEGMENT_OUTPUT bytes.
+
+    Raises:
+        zlib.error: If no valid member starts at start.
+    """
+    chunks = deque()
+    inflated = 0
+    members = _inflate_members(data, start, end)
+    while True:
+        try:
+            chunk = next(members)
+        except StopIteration as stop:
+            return chunks, stop.value
+        inflated += len(chunk)
+        if inflated > MAX_SEGMENT_OUTPUT:
+            members.close()
+            return None, start
+        chunks.append(chunk)
+
+
+def _iter_parallel_members(data, starts: list, workers: int) -> Iterator[bytes]:
+    """Decompress the segments of a multi-member gzip file on threads and
+    yield their output in file order.
+
+    zlib releases the GIL while it inflates, so the segments are decompressed
+    at the same time. Segments are only submitted while the compressed size
+    of the ones not read yet is under MAX_PENDING_SIZE, each of them holds at
+    most MAX_SEGMENT_OUTPUT decompressed bytes, and each chunk is released
+    once it is yielded. A segment whose start turns out not to be a member
+    boundary (the header bytes occurred inside compressed data) is
+    discarded, and whatever the previous segment did not cover is
+    decompressed inline, chunk by chunk. So is a segment that inflates to
+    more than MAX_SEGMENT_OUTPUT bytes. The pages of the map before the
+    last decompressed member are dropped from memory as the reader goes.
+
+    Args:
+        data: The compressed file contents, closed once they are consumed.
+        starts (list): The candidate member offsets, see _segment_starts.
+        workers (int): The number of threads.
+
+    Yields:
+        bytes: Decompressed chunks, in file order.
+
+    Raises:
+        zlib.error: If the file is not a valid gzip file.
+    """
+    segments = deque(zip(starts, starts[1:] + [len(data)]))
+    pending = deque()
+    pending_size = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            def submit() -> None:
+                # At least one segment is always in flight, however big it is
+                nonlocal pending_size
+                while segments and (not pending or pending_size + segments[0][1] - segments[0][0] <= MAX_PENDING_SIZE):
+                    start, end = segments.popleft()
+                    pending.append((start, end, pool.submit(_inflate_segment, data, start, end)))
+                    pending_size += end - start
+
+            try:
+                submit()
+                covered = released = 0
+                while pending:
+                    start, end, future = pending.popleft()
+                    try:
+                        chunks, stop = future.result()
+                    except zlib.error:
+                        chunks, stop = None, start
+                    pending_size -= end - start
+                    submit()
+                    if start == covered and chunks is not None:
+                        while chunks:
+                            yield chunks.popleft()
+                        covered = stop
+                    elif covered < end:
+                        covered = yield from _inflate_members(data, covered, end)
+                    released = _release_pages(data, released, covered)
+            finally:
+                # Segments not started yet are dropped if the reader stops early
+                for _, _, future in pending:
+                    future.cancel()
+    finally:
+        data.close()
+
+
+def _release_pages(data, start: int, end: int) -> int:
+    """Drop the pages of a memory map the reader is done with, where the
+    platform supports it, so they don't count towards the resident memory.
+    They are read from the file again if they are used after all.
+
+    Args:
+        data: The memory-mapped file.
+        start (int): The offset the last release stopped at, page aligned.
+        end (int): The offset the reader is done up to.
+
+    Returns:
+        int: The offset this release stopped at.
+    """
+    end -= end % mmap.PAGESIZE
+    if end <= start or not hasattr(mmap, "MADV_DONTNEED") or not hasattr(data, "madvise"):
+        return start
+    data.madvise(mmap.MADV_DONTNEED, start, end - start)
+    return end
+
+
+class _ChunkReader(io.RawIOBase):
+    """Raw binary stream over an iterator of byte chunks."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self.__chunks = chunks
+        self.__chunk = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self.__chunk:
+            chunk = next(self.__chunks, None)
+            if chunk is None:
+                return 0
+            self.__chunk = memoryview(chunk)
+        size = min(len(buffer), len(self.__chunk))
+        buffer[:size] = self.__chunk[:size]
+        self.__chunk = self.__chunk[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            self.__chunks.close()
+        super().close()
@@ -5,13 +5,24 @@ __author__ = "Sullivan Lavoie"
 __version__ = "1.0.0"
 
 import csv
-import json
 from os import path
+from typing import Iterable, Iterator, TextIO
+from input_handler.compressed import COMPRESSION_SUFFIXES, open_compressed_text, sniff_compression
+from input_handler.json_stream import iter_json_array, iter_json_lines
+from input_handler.mmap_scanner import MmapCsvScanner
+from metrics.pipeline_metrics import PipelineMetrics
+from transaction.transaction import Transaction
 
 class InputHandler:
     """Class to handle input files and provide methods to read and process them.
     """
 
+    # Transaction types accepted by data_validation
+    VALID_TRANSACTION_TYPES = frozenset(["deposit", "withdrawal", "transfer"])
+
+    # File extensions read as JSON Lines (one transaction object per line)
+    JSON_LINES_FORMATS = frozenset(["jsonl", "ndjson"])
+
     
 
 
@@ -20,13 +31,22 @@ class InputHandler:
 
 
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, metrics: PipelineMetrics = None,
+                 decompression_workers: int = None):
         """Initialize the InputHandler with the path to the input file.
 
         Args:
             file_path (str): The path to the input file.
+            metrics (PipelineMetrics): Optional metrics that count the rows read
+                and rejected (with the rejection reason) during validation.
+            decompression_workers (int): Threads decompressing a multi-member
+                gzip input file. Defaults to the number of CPUs.
         """
         self.__file_path = file_path    # Store the file path
+        self.__metrics = metrics    # Store the optional metrics
+        self.__decompression_workers = decompression_workers
+        self.__compression = None     # Compression and format detected from the file contents, see get_compression
+        self.__sniffed_format = None
 
     @property
     def file_path(self) -> str:
@@ -40,15 +60,73 @@ class InputHandler:
     def get_file_format(self) -> str:
         """Get the format of the input file based on its extension.
 
+        A compression suffix is skipped, so 'data.csv.gz' is a 'csv' file.
+        A compressed file without a format suffix gets its format from the
+        first character of its contents ('[' for json, '{' for jsonl, csv
+        otherwise).
+
         Returns:
             str: The file format (e.g., 'csv', 'json').
         """
-        return self.__file_path.split(".")[-1]     # Extract and return the file extension
+        file_format = self.__file_path.split(".")[-1]     # Extract the file extension
+        compression = self.get_compression()
+        if compression is None:
+            return file_format
+        if file_format in COMPRESSION_SUFFIXES:
+            inner_format = path.splitext(path.splitext(self.__file_path)[0])[1][1:]
+            if inner_format:
+                return inner_format
+        if self.__sniffed_format is None:
+            with self.__open_text() as input_file:
+                first = input_file.read(64).lstrip()[:1]
+            self.__sniffed_format = {"[": "json", "{": "jsonl"}.get(first, "csv")
+        return self.__sniffed_format
+
+    def get_compression(self) -> str:
+        """Get the compression of the input file.
+
+        The suffix decides first (.gz, .gzip, .bz2, .xz). Files with a
+        supported format suffix (.csv, .json, .jsonl, .ndjson) are read as
+        plain text without opening them. Only files with any other suffix
+        have their first bytes checked for a compressor's magic bytes.
+
+        Returns:
+            str: 'gzip', 'bz2' or 'xz', or None if the file is not compressed.
+        """
+        suffix = self.__file_path.split(".")[-1].lower()
+        if suffix in COMPRESSION_SUFFIXES:
+            return COMPRESSION_SUFFIXES[suffix]
+        if suffix in ("csv", "json") or suffix in self.JSON_LINES_FORMATS or not path.isfile(self.__file_path):
+            return None
+        if self.__compression is None:
+            self.__compression = sniff_compression(self.__file_path) or ""
+        return self.__compression or None
+
+    def __open_text(self) -> TextIO:
+        """Open the input file for reading text, decompressing it on the fly
+        if it is compressed (see get_compression).
+
+        Returns:
+            TextIO: The open file.
+        """
+        compression = self.get_compression()
+        if compression is None:
+            return open(self.__file_path, "r")
+        return open_compressed_text(self.__file_path, compression, self.__decompression_workers)
+
+    def __check_uncompressed(self) -> None:
+        """Reject compressed files in the methods that seek to byte offsets.
+
+        Raises:
+            ValueError: If the file is compressed.
+        """
+        if self.get_compression() is not None:
+            raise ValueError(f"Byte ranges and memory mapping need an uncompressed file: {self.__file_path}")
 
     def read_input_data(self) -> list:
         """Read the input data from the file.
 
-        This method reads the input file based on its format (CSV or JSON) and returns the data as a list of dictionaries.
+        This method reads the input file based on its format (CSV, JSON or JSON Lines) and returns the data as a list of dictionaries.
 
         Returns:
             list: The data read from the file, where each item is a dictionary representing a row of data.
@@ -62,7 +140,83 @@ class InputHandler:
             transactions =  self.read_csv_data()    # Read data from CSV file
         elif file_format == "json":
             transactions = self.read_json_data()     # Read data from JSON file
+        elif file_format in self.JSON_LINES_FORMATS:
+            transactions = list(self.iter_json_lines_data())     # Read data from JSON Lines file
         return transactions     # Return the list of transactions
+
+    def iter_input_data(self) -> Iterator[dict]:
+        """Stream the validated input data from the file one row at a time.
+
+        This is the streaming counterpart of read_input_data. Rows are read,
+        validated and yielded individually, so memory use stays flat no matter
+        how large the input file is. Unsupported formats yield nothing.
+
+        Yields:
+            dict: A valid transaction, in file order.
+
+        Raises:
+            FileNotFoundError: If the file does not exist (raised on first iteration).
+        """
+        file_format = self.get_file_format()   # Get the file format based on the file extension
+
+        if file_format == "csv":
+            yield from self.iter_csv_data()     # Stream rows from CSV file
+        elif file_format == "json":
+            yield from self.iter_json_data()    # Stream rows from JSON file
+        elif file_format in self.JSON_LINES_FORMATS:
+            yield from self.iter_json_lines_data()    # Stream rows from JSON Lines file
+
+    def iter_transactions(self) -> Iterator[Transaction]:
+        """Stream the valid input data as compact Transaction records.
+
+        Each row is parsed once into a Transaction (float amount, interned
+        text fields) and validated with the same rules as data_validation.
+
+        Yields:
+            Transaction: A valid transaction, in file order.
+
+        Raises:
+            FileNotFoundError: If the file does not exist (raised on first iteration).
+        """
+        valid_transaction_types = self.VALID_TRANSACTION_TYPES
+        metrics = self.__metrics
+        rows_read = 0
+        try:
+            for row in self.iter_raw_input_data():
+                rows_read += 1
+                try:
+                    transaction = Transaction.from_dict(row)
+                    if transaction.amount >= 0 and transaction.transaction_type in valid_transaction_types:
+                        yield transaction
+                        continue
+                except (KeyError, ValueError, TypeError):
+                    pass     # Skip rows with missing keys or a non-numeric amount
+                if metrics is not None:
+                    metrics.record_rejection(self.rejection_reason(row))
+        finally:
+            if metrics is not None:
+                metrics.increment("rows_read", rows_read)
+
+    def iter_raw_input_data(self) -> Iterator[dict]:
+        """Stream the input data from the file without validating it.
+
+        Used by pipelines that validate each row themselves while parsing it,
+        such as DataProcessor.process_fused, so the amount is only converted once.
+
+        Yields:
+            dict: Each row of the file, in file order.
+
+        Raises:
+            FileNotFoundError: If the file does not exist (raised on first iteration).
+        """
+        file_format = self.get_file_format()   # Get the file format based on the file extension
+
+        if file_format == "csv":
+            yield from self.iter_raw_csv_data()
+        elif file_format == "json":
+            yield from self.iter_raw_json_data()
+        elif file_format in self.JSON_LINES_FORMATS:
+            yield from self.iter_raw_json_lines_data()
     
     
 
@@ -79,20 +233,164 @@ class InputHandler:
             
             FileNotFoundError: If the file does not exist.
         """
+        return list(self.iter_csv_data())      # Return list of valid transactions
+
+    def iter_csv_data(self) -> Iterator[dict]:
+        """Stream the valid transactions from a CSV file.
+
+        Rows are validated as they are read from the csv.DictReader, so only
+        one row is held in memory at a time.
+
+        Yields:
+            dict: A valid transaction, in file order.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        yield from self.validate_stream(self.iter_raw_csv_data())     # Yield each valid row
+
+    def iter_raw_csv_data(self) -> Iterator[dict]:
+        """Stream every row of a CSV file without validating it.
+
+        Yields:
+            dict: Each row as read by csv.DictReader, in file order.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
         if not path.isfile(self.__file_path):
             raise FileNotFoundError(f"File: {self.__file_path} does not exist.")      # Check if the file exists
 
-        transactions = []    # Initialize an empty list to store transactions
+          # Open the CSV file and stream its contents
+        with self.__open_text() as input_file:
+            yield from csv.DictReader(input_file)     # Yield each row as it is read
 
-        
-          # Open the CSV file and read its contents
-        with open(self.__file_path, "r") as input_file:
-            reader = csv.DictReader(input_file)     # Create a CSV reader object
-            for row in reader:
-                transactions.append(row)     # Append each row to the transactions list
-        
-        return self.data_validation(transactions)      # Return updated list of valid transactions
+    def iter_raw_csv_rows(self) -> Iterator[list]:
+        """Stream every row of a CSV file as a list of fields, without validating it.
+
+        No dictionary is built per row, so readers that work column by
+        column (e.g. TransactionBatch.from_file) avoid that cost.
+
+        Yields:
+            list: The header row first, then each row as read by csv.reader,
+            in file order. Blank lines are yielded as empty lists.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        if not path.isfile(self.__file_path):
+            raise FileNotFoundError(f"File: {self.__file_path} does not exist.")      # Check if the file exists
+
+        with self.__open_text() as input_file:
+            yield from csv.reader(input_file)
+
+    def get_csv_byte_ranges(self, chunk_count: int) -> list:
+        """Split the body of a CSV file into byte ranges that start and end on line boundaries.
+
+        The ranges can be read independently with iter_csv_range, e.g. by
+        separate worker processes. Quoted fields containing line breaks are
+        not supported, since a range could start inside one.
+
+        Args:
+            chunk_count (int): The number of ranges to aim for.
+
+        Returns:
+            list: (start, end) byte offset tuples covering every row after the header, in file order.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If the file is compressed.
+        """
+        if not path.isfile(self.__file_path):
+            raise FileNotFoundError(f"File: {self.__file_path} does not exist.")
+        self.__check_uncompressed()
+
+        file_size = path.getsize(self.__file_path)
+        with open(self.__file_path, "rb") as input_file:
+            input_file.readline()     # Skip the header row
+            boundaries = [input_file.tell()]
+            chunk_size = max(1, (file_size - boundaries[0]) // max(1, chunk_count))
+            while boundaries[-1] < file_size:
+                # Move forward one chunk, then on to the start of the next line
+                input_file.seek(boundaries[-1] + chunk_size)
+                input_file.readline()
+                boundaries.append(min(input_file.tell(), file_size))
+
+        return list(zip(boundaries, boundaries[1:]))
+
+    def iter_csv_range(self, start: int, end: int) -> Iterator[dict]:
+        """Stream the valid transactions from one byte range of a CSV file.
+
+        The header row is always read from the top of the file, so any range
+        returned by get_csv_byte_ranges can be read on its own.
+
+        Args:
+            start (int): The byte offset of the first line to read.
+            end (int): The byte offset to stop reading at.
+
+        Yields:
+            dict: A valid transaction from the range, in file order.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        yield from self.validate_stream(self.iter_raw_csv_range(start, end))
+
+    def iter_raw_csv_range(self, start: int, end: int) -> Iterator[dict]:
+        """Stream every row of one byte range of a CSV file without validating it.
+
+        Args:
+            start (int): The byte offset of the first line to read.
+            end (int): The byte offset to stop reading at.
+
+        Yields:
+            dict: Each row of the range, in file order.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If the file is compressed.
+        """
+        if not path.isfile(self.__file_path):
+            raise FileNotFoundError(f"File: {self.__file_path} does not exist.")
+        self.__check_uncompressed()
+
+        with open(self.__file_path, "rb") as input_file:
+            fieldnames = next(csv.reader([input_file.readline().decode("utf-8")]))
+            input_file.seek(start)
+
+            def lines() -> Iterator[str]:
+                """Decode the lines of the range one at a time."""
+                position = start
+                while position < end:
+                    line = input_file.readline()
+                    if not line:
+                        return
+                    position += len(line)
+                    yield line.decode("utf-8")
+
+            yield from csv.DictReader(lines(), fieldnames=fieldnames)
             
+    def get_mmap_scanner(self, amount_digits: int = None) -> MmapCsvScanner:
+        """Get a memory-mapped scanner over the CSV file.
+
+        The scanner only decodes the columns needed for aggregation and
+        applies the same validation rules as data_validation; use it with
+        DataProcessor.process_scanned.
+
+        Args:
+            amount_digits (int): If given, the scanner parses amounts to
+                integer minor units with this many decimal places, for a
+                DataProcessor in fixed-point mode.
+
+        Returns:
+            MmapCsvScanner: The scanner for this file.
+
+        Raises:
+            ValueError: If the file is compressed.
+        """
+        self.__check_uncompressed()
+        return MmapCsvScanner(self.__file_path, self.VALID_TRANSACTION_TYPES, amount_digits=amount_digits)
+
     def read_json_data(self) -> list:
         """Read the input data from a JSON file.
 
@@ -107,18 +405,151 @@ class InputHandler:
         FileNotFoundError: If the file does not exist.
         
         """
-        # Research the json.load function so that you 
-        # understand the format of the data once it is
-        # placed into input_data
+        return list(self.iter_json_data())      # Return list of valid transactions
+
+    def iter_json_data(self) -> Iterator[dict]:
+        """Stream the valid transactions from a JSON array file.
+
+        The array is parsed incrementally, so each transaction is validated and
+        yielded as soon as it is decoded instead of after the whole file is loaded.
+
+        Yields:
+            dict: A valid transaction, in file order.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            json.JSONDecodeError: If the file is not a JSON array.
+        """
+        yield from self.validate_stream(self.iter_raw_json_data())
 
+    def iter_raw_json_data(self) -> Iterator[dict]:
+        """Stream every item of a JSON array file without validating it.
+
+        Yields:
+            dict: Each decoded item, in file order.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            json.JSONDecodeError: If the file is not a JSON array.
+        """
           # Check if the file exists
         if not path.isfile(self.__file_path):
             raise FileNotFoundError(f"File: {self.__file_path} does not exist.")
-        # Open the JSON file and read its contents
-        with open(self.__file_path, "r") as input_file:
-            transactions = json.load(input_file)
+        # Open the JSON file and decode it one transaction at a time
+        with self.__open_text() as input_file:
+            yield from iter_json_array(input_file)
+
+    def iter_json_lines_data(self) -> Iterator[dict]:
+        """Stream the valid transactions from a JSON Lines (NDJSON) file.
+
+        Yields:
+            dict: A valid transaction, in file order.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            json.JSONDecodeError: If a line is not valid JSON.
+        """
+        yield from self.validate_stream(self.iter_raw_json_lines_data())
+
+    def iter_raw_json_lines_data(self) -> Iterator[dict]:
+        """Stream every line of a JSON Lines (NDJSON) file without validating it.
+
+        Yields:
+            dict: The object decoded from each line, in file order.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            json.JSONDecodeError: If a line is not valid JSON.
+        """
+        if not path.isfile(self.__file_path):
+            raise FileNotFoundError(f"File: {self.__file_path} does not exist.")
+        with self.__open_text() as input_file:
+            yield from iter_json_lines(input_file)
+
+    def is_valid_transaction(self, row: dict) -> bool:
+        """Check whether a single transaction passes validation.
+
+        A transaction is valid when its 'Amount' is a non-negative number and its
+        'Transaction type' is one of VALID_TRANSACTION_TYPES.
+
+        Args:
+            row (dict): The transaction to check.
+
+        Returns:
+            bool: True if the transaction is valid, False otherwise.
+        """
+        try:
+            # Check for required keys and validate 'amount'. The type
+            # lookup is inside the try, as JSON rows can hold unhashable
+            # values (lists, objects).
+            amount = float(row['Amount'])
+            transaction_type = row['Transaction type']
+            return amount >= 0 and transaction_type in self.VALID_TRANSACTION_TYPES
+        except (KeyError, ValueError, TypeError):
+            # Required keys are missing, amount is not a number or the
+            # type is not hashable
+            return False
+
+    @classmethod
+    def rejection_reason(cls, row: dict) -> str:
+        """Explain why a transaction fails validation.
+
+        Args:
+            row (dict): The transaction to check.
 
-        return self.data_validation(transactions)      # Return updated list of valid transactions
+        Returns:
+            str: None if the transaction is valid, otherwise one of 'missing_amount',
+            'missing_transaction_type', 'non_numeric_amount', 'negative_amount'
+            or 'invalid_transaction_type'.
+        """
+        try:
+            amount = row['Amount']
+        except (KeyError, TypeError):
+            return "missing_amount"
+        try:
+            transaction_type = row['Transaction type']
+        except (KeyError, TypeError):
+            return "missing_transaction_type"
+        try:
+            amount = float(amount)
+        except (ValueError, TypeError):
+            return "non_numeric_amount"
+        if not amount >= 0:
+            return "negative_amount"
+        if not isinstance(transaction_type, str) or transaction_type not in cls.VALID_TRANSACTION_TYPES:
+            return "invalid_transaction_type"
+        return None
+
+    def validate_stream(self, transactions: Iterable[dict]) -> Iterator[dict]:
+        """Lazily filter an iterable of transactions down to the valid ones.
+
+        When the handler has metrics, every row is counted in 'rows_read' and
+        every rejected row is recorded with its rejection_reason.
+
+        Args:
+            transactions (Iterable[dict]): Any iterable of transactions, e.g. a csv.DictReader.
+
+        Yields:
+            dict: Each valid transaction, in input order.
+        """
+        is_valid_transaction = self.is_valid_transaction
+        metrics = self.__metrics
+        if metrics is None:
+            for row in transactions:
+                if is_valid_transaction(row):
+                    yield row
+            return
+
+        rows_read = 0
+        try:
+            for row in transactions:
+                rows_read += 1
+                if is_valid_transaction(row):
+                    yield row
+                else:
+                    metrics.record_rejection(self.rejection_reason(row))
+        finally:
+            metrics.increment("rows_read", rows_read)
     
     def data_validation(self, transactions: list) -> list:
         """Validate the input data.
@@ -131,22 +562,8 @@ class InputHandler:
         Returns:
            list: A list of dictionaries containing only valid transactions.
         """
-        # Check if the input data is a list
-        valid_transactions = []  # List to store valid transactions
-        for row in transactions:
-            try:
-                # Check for required keys and validate 'amount'
-                amount = float(row['Amount'])
-                transaction_type = row['Transaction type']
-                if amount >= 0 and transaction_type in ['deposit', 'withdrawal', 'transfer']:
-                    # If all validations pass, add to valid transactions
-                    valid_transactions.append(row)
-            except (KeyError, ValueError):
-                # Skip transaction if required keys are missing or amount is not a number
-                pass
-        
-        
-        return valid_transactions
+        # Keep only the transactions that pass validation
+        return list(self.validate_stream(transactions))
     
     
    
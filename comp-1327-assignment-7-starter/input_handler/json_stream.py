@@ -0,0 +1,138 @@
+"""Module with incremental JSON readers used by the InputHandler class
+
+Both readers decode one transaction at a time from an open text file so
+large JSON inputs never have to be materialized as a single Python list.
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1.0.0"
+
+import json
+from typing import Iterator, TextIO
+
+# Number of characters read from the file each time the buffer runs dry
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Largest array item, in characters, held in the buffer while it is decoded
+DEFAULT_MAX_ITEM_SIZE = 16 * 1024 * 1024
+
+# A decoding error this close to the end of the buffer can be an item cut
+# by the end of the chunk (e.g. "-Infinity" cut after "-Inf")
+_PARTIAL_TOKEN_SIZE = 16
+
+_WHITESPACE = " \t\n\r"
+
+# Characters that can follow a complete array item
+_ITEM_ENDS = _WHITESPACE + ",]"
+
+
+def iter_json_array(input_file: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    max_item_size: int = DEFAULT_MAX_ITEM_SIZE) -> Iterator:
+    """Yield the items of a top-level JSON array as they are decoded.
+
+    The file is read in chunks of chunk_size characters and each array item is
+    decoded with json.JSONDecoder.raw_decode as soon as it is complete, so only
+    the current item (plus at most one chunk) is held in memory. More is only
+    read when decoding fails at the end of the buffer (an item cut by the
+    chunk), a malformed item raises right away.
+
+    Args:
+        input_file (TextIO): An open text file positioned at the start of the array.
+        chunk_size (int): The number of characters to read per chunk.
+        max_item_size (int): The most characters a single item can span.
+
+    Yields:
+        object: Each decoded item of the array, in file order.
+
+    Raises:
+        json.JSONDecodeError: If the file is not a well formed JSON array, or
+            an item is longer than max_item_size.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def fill(size: int = chunk_size) -> bool:
+        """Append the next chunk to the buffer, dropping consumed text."""
+        nonlocal buffer, position, eof
+        chunk = input_file.read(size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+
+    def next_token() -> str:
+        """Skip whitespace and return the next character ('' at end of file)."""
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if not fill():
+                return ""
+
+    if next_token() != "[":
+        raise json.JSONDecodeError("Expecting '['", buffer, position)
+    position += 1
+
+    if next_token() == "]":
+        return
+
+    while True:
+        next_token()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as error:
+                # Only an error at the end of the buffer (or in a string running
+                # into it) can be an item split across chunks
+                truncated = error.pos >= len(buffer) - _PARTIAL_TOKEN_SIZE \
+                    or error.msg.startswith("Unterminated string")
+                if not truncated or eof:
+                    raise
+                pending = len(buffer) - position
+                if pending > max_item_size:
+                    raise json.JSONDecodeError(f"Array item longer than {max_item_size} characters",
+                                               buffer, position) from None
+                # The read size grows with the item, so a long item is decoded a few times, not once per chunk
+                if not fill(max(chunk_size, pending)):
+                    raise
+                continue
+            # A number is only complete once a delimiter follows it: "4.5e1"
+            # cut after "4" or "4." decodes as 4, so more is read first
+            if type(item) in (int, float) and not eof \
+                    and (end == len(buffer) or buffer[end] not in _ITEM_ENDS) and fill():
+                continue
+            break
+        position = end
+        yield item
+
+        separator = next_token()
+        if separator == "]":
+            return
+        if separator != ",":
+            raise json.JSONDecodeError("Expecting ',' delimiter", buffer, position)
+        position += 1
+
+
+def iter_json_lines(input_file: TextIO) -> Iterator:
+    """Yield one decoded value per line of a JSON Lines (NDJSON) file.
+
+    Blank lines are skipped.
+
+    Args:
+        input_file (TextIO): An open JSON Lines text file.
+
+    Yields:
+        object: The value decoded from each non-blank line, in file order.
+
+    Raises:
+        json.JSONDecodeError: If a line is not valid JSON.
+    """
+    for line in input_file:
+        if line.strip():
+            yield json.loads(line)
@@ -0,0 +1,235 @@
+"""Module with a memory-mapped CSV scanner that only decodes the columns
+needed for aggregation
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1.0.0"
+
+import csv
+import mmap
+import re
+from operator import itemgetter
+from os import path
+from typing import Iterator
+from transaction.amounts import parse_minor_units
+
+
+class MmapCsvScanner:
+    """Scan a CSV transaction file through a memory map.
+
+    Lines and fields are matched by a regular expression run over the map,
+    without copying the lines or going through the csv module. Only the account number,
+    transaction type, amount and currency are copied out and decoded
+    (repeated values come from small caches), the amount is parsed straight
+    from the bytes. The full row is only decoded, with decode_row, when it is needed,
+    e.g. for a suspicious transaction. Lines containing quotes are parsed
+    with the csv module so quoted commas are handled, but quoted line breaks
+    are not supported.
+    """
+
+    def __init__(self, file_path: str, valid_transaction_types: frozenset, encoding: str = "utf-8",
+                 amount_digits: int = None):
+        """Initialize the scanner with the path to the CSV file.
+
+        Args:
+            file_path (str): The path to the CSV file.
+            valid_transaction_types (frozenset): The transaction types that pass validation.
+            encoding (str): The text encoding of the file.
+            amount_digits (int): If given, amounts are parsed from the bytes
+                to integer minor units with this many decimal places
+                instead of to floats.
+        """
+        self.__file_path = file_path
+        self.__valid_transaction_types = valid_transaction_types
+        self.__encoding = encoding
+        self.__amount_digits = amount_digits
+        self.__fieldnames = []
+        self.__rejected_count = 0
+
+        # The map of the running scan, for decode_row
+        self.__mapped_file = None
+
+    @property
+    def file_path(self) -> str:
+        """Get the path of the scanned file.
+
+        Returns:
+            str: The path of the CSV file.
+        """
+        return self.__file_path
+
+    @property
+    def amount_digits(self) -> int:
+        """Get the decimal places of the minor units scanned amounts are in.
+
+        Returns:
+            int: The number of decimal places, or None if amounts are floats.
+        """
+        return self.__amount_digits
+
+    @property
+    def fieldnames(self) -> list:
+        """Get the column names read from the header by the last scan.
+
+        Returns:
+            list: The column names, in file order.
+        """
+        return self.__fieldnames
+
+    @property
+    def rejected_count(self) -> int:
+        """Get how many rows the last scan skipped because they failed validation.
+
+        Returns:
+            int: The number of rejected rows.
+        """
+        return self.__rejected_count
+
+    def scan(self) -> Iterator[tuple]:
+        """Yield the aggregation columns of every valid row.
+
+        Rows with a missing or non-numeric amount, a negative amount or an
+        unknown transaction type are skipped and counted in rejected_count.
+        Rows with fewer fields than the header are read like csv.DictReader
+        reads them: the missing fields are None.
+
+        Yields:
+            tuple: (account number, transaction type, amount, currency, line) for
+            each valid row, where line is the (start, end) offsets of the row in
+            the file for decode_row and amount is a float, or an int in minor
+            units if amount_digits is set.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If the header is missing one of the needed columns.
+        """
+        if not path.isfile(self.__file_path):
+            raise FileNotFoundError(f"File: {self.__file_path} does not exist.")
+        self.__rejected_count = 0
+        if path.getsize(self.__file_path) == 0:
+            return
+
+        encoding = self.__encoding
+        valid_transaction_types = self.__valid_transaction_types
+        amount_digits = self.__amount_digits
+
+        # bytes -> str caches, most files only have a few distinct values per column
+        accounts = {}
+        transaction_types = {}
+        currencies = {}
+
+        with open(self.__file_path, "rb") as input_file, \
+                mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            size = len(mapped_file)
+            find = mapped_file.find
+            header_end = find(b"\n")
+            header_end = size if header_end == -1 else header_end + 1
+            self.__fieldnames = next(csv.reader([mapped_file[:header_end].decode(encoding)]))
+            account_index = self.__fieldnames.index("Account number")
+            type_index = self.__fieldnames.index("Transaction type")
+            amount_index = self.__fieldnames.index("Amount")
+            currency_index = self.__fieldnames.index("Currency") if "Currency" in self.__fieldnames else None
+
+            # Every line is matched over the map by one regular expression,
+            # only the needed fields are copied out of it
+            line_pattern, pick = self.__line_pattern([account_index, type_index, amount_index, currency_index])
+
+            self.__mapped_file = mapped_file
+            try:
+                for match in line_pattern.finditer(mapped_file, header_end):
+                    raw_account, raw_type, raw_amount, raw_currency, line = pick(match.groups())
+                    if line is not None:
+                        # Quoted fields or fewer fields than needed: parsed with the csv module
+                        if not line:
+                            continue
+                        fields = self.__split(line)
+                        raw_account, raw_type, raw_amount, raw_currency = [
+                            fields[index] if index is not None and index < len(fields) else None
+                            for index in (account_index, type_index, amount_index, currency_index)
+                        ]
+
+                    try:
+                        amount = float(raw_amount) if amount_digits is None \
+                            else parse_minor_units(raw_amount, amount_digits)
+                    except (ValueError, TypeError):
+                        self.__rejected_count += 1
+                        continue
+
+                    transaction_type = transaction_types.get(raw_type)
+                    if transaction_type is None and raw_type is not None:
+                        transaction_type = transaction_types[raw_type] = raw_type.decode(encoding)
+                    if not amount >= 0 or transaction_type not in valid_transaction_types:
+                        self.__rejected_count += 1
+                        continue
+
+                    account_number = accounts.get(raw_account)
+                    if account_number is None and raw_account is not None:
+                        account_number = accounts[raw_account] = raw_account.decode(encoding)
+
+                    currency = currencies.get(raw_currency)
+                    if currency is None and raw_currency is not None:
+                        currency = currencies[raw_currency] = raw_currency.decode(encoding)
+
+                    yield account_number, transaction_type, amount, currency, match.span()
+            finally:
+                self.__mapped_file = None
+
+    @staticmethod
+    def __line_pattern(indexes: list) -> tuple:
+        """Build the regular expression matching one line of the file.
+
+        Lines without quotes that have every needed field match the first
+        alternative, with one group per needed field. Any other line is
+        captured whole by the last group and left to the csv module.
+
+        Args:
+            indexes (list): The column index of every needed field, None for
+                a missing column (its value is always None).
+
+        Returns:
+            tuple: The compiled expression, matching a line and its line
+            break, and a function picking the needed fields (in the order of
+            indexes) then the last group from match.groups().
+        """
+        columns = sorted(index for index in indexes if index is not None)
+        fields = [b"[^,\"\r\n]*"] * (columns[-1] + 1)
+        for index in columns:
+            fields[index] = b"([^,\"\r\n]*)"
+
+        # The groups are numbered in column order, a group that never matches stands for missing columns
+        missing = len(columns)
+        pattern = re.compile(b"(?:" + b",".join(fields) + b"(?=[,\r\n]|\\Z)[^\r\n]*(?:(?!)())?|([^\n]*?))\r?(?:\n|\\Z)")
+        return pattern, itemgetter(*[missing if index is None else columns.index(index) for index in indexes],
+                                   missing + 1)
+
+    def decode_row(self, line) -> dict:
+        """Fully decode a line returned by scan.
+
+        Args:
+            line: The (start, end) offsets yielded by scan, which can only be
+                decoded while the scan is running, or the raw line bytes.
+
+        Returns:
+            dict: The row keyed by column name, the same as csv.DictReader
+            would return (missing fields are None).
+        """
+        if isinstance(line, tuple):
+            start, end = line
+            line = self.__mapped_file[start:end].rstrip(b"\r\n")
+        values = next(csv.reader([line.decode(self.__encoding)]))
+        row = dict(zip(self.__fieldnames, values))
+        for name in self.__fieldnames[len(values):]:
+            row[name] = None
+        return row
+
+    def __split(self, line: bytes) -> list:
+        """Split a line that contains quotes with the csv module.
+
+        Args:
+            line (bytes): The raw line.
+
+        Returns:
+            list: The fields, as bytes.
+        """
+        encoding = self.__encoding
+        return [field.encode(encoding) for field in next(csv.reader([line.decode(encoding)]))]
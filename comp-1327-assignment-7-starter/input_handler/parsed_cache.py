@@ -0,0 +1,159 @@
+"""Module with a cache of parsed and validated input files stored in a
+columnar binary format
+
+The first run over an input file parses and validates it into a
+TransactionBatch and saves the batch next to the other cache entries. Later
+runs over the unchanged file memory-map the saved batch instead of parsing
+the text again.
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1.0.0"
+
+import hashlib
+import os
+from os import path
+from data_processor.transaction_batch import TransactionBatch
+
+
+class ParsedInputCache:
+    """Cache parsed input files as TransactionBatch files.
+
+    An entry is keyed by the input file's absolute path, size and
+    modification time, so editing or appending to the file makes the old
+    entry unreachable and the file is parsed again. The entries of older
+    versions of a file are deleted when its new entry is saved.
+    """
+
+    # Suffix of the cache entry files
+    ENTRY_SUFFIX = ".txbatch"
+
+    def __init__(self, cache_directory: str, amount_digits: int = None):
+        """Initialize the cache with the directory holding its entries.
+
+        Args:
+            cache_directory (str): The directory of the cache entries, it is
+                created on the first save.
+            amount_digits (int): If given, batches hold amounts as integer
+                minor units with this many decimal places, see
+                TransactionBatch.from_file. Defaults to None.
+        """
+        self.__cache_directory = cache_directory
+        self.__amount_digits = amount_digits
+
+    @property
+    def cache_directory(self) -> str:
+        """Get the directory holding the cache entries.
+
+        Returns:
+            str: The cache directory.
+        """
+        return self.__cache_directory
+
+    def get_entry_path(self, file_path: str) -> str:
+        """Get the path of the cache entry of the current version of a file.
+
+        Args:
+            file_path (str): The path to the input file.
+
+        Returns:
+            str: The path of the entry, which may not exist yet.
+
+        Raises:
+            FileNotFoundError: If the input file does not exist.
+        """
+        if not path.isfile(file_path):
+            raise FileNotFoundError(f"File: {file_path} does not exist.")
+        status = os.stat(file_path)
+        version = f"{status.st_size}|{status.st_mtime_ns}"
+        filename = self.__path_prefix(file_path) + hashlib.sha256(version.encode("utf-8")).hexdigest()[:32]
+        if self.__amount_digits is not None:
+            filename += f"-{self.__amount_digits}"
+        return path.join(self.__cache_directory, filename + self.ENTRY_SUFFIX)
+
+    def load(self, file_path: str) -> TransactionBatch:
+        """Load the cached batch of a file.
+
+        Args:
+            file_path (str): The path to the input file.
+
+        Returns:
+            TransactionBatch: The cached batch, or None if the file has no
+            entry for its current version or the entry cannot be read.
+
+        Raises:
+            FileNotFoundError: If the input file does not exist.
+        """
+        entry_path = self.get_entry_path(file_path)
+        if not path.isfile(entry_path):
+            return None
+        try:
+            batch = TransactionBatch.load(entry_path)
+        except (ValueError, KeyError):
+            return None
+        return batch if batch.amount_digits == self.__amount_digits else None
+
+    def load_or_build(self, file_path: str) -> TransactionBatch:
+        """Load the cached batch of a file, parsing and caching it on a miss.
+
+        Args:
+            file_path (str): The path to the input file (CSV, JSON or JSON Lines).
+
+        Returns:
+            TransactionBatch: The validated transactions of the file.
+
+        Raises:
+            FileNotFoundError: If the input file does not exist.
+        """
+        batch = self.load(file_path)
+        if batch is not None:
+            return batch
+
+        entry_path = self.get_entry_path(file_path)
+        # The rows rejected by validation are counted and saved with the
+        # batch, so a run reading the cache still reports them
+        batch = TransactionBatch.from_file(file_path, self.__amount_digits)
+        os.makedirs(self.__cache_directory, exist_ok=True)
+        batch.save(entry_path)
+        self.__prune(file_path, entry_path)
+        return batch
+
+    def __prune(self, file_path: str, entry_path: str) -> None:
+        """Delete the entries of older versions of a file.
+
+        Entries of the current version with another amount_digits are kept.
+
+        Args:
+            file_path (str): The path to the input file.
+            entry_path (str): The path of the entry just saved for it.
+        """
+        prefix = self.__path_prefix(file_path)
+        current = path.basename(entry_path)[:len(prefix) + 32]
+        for filename in os.listdir(self.__cache_directory):
+            if filename.startswith(prefix) and filename.endswith(self.ENTRY_SUFFIX) \
+                    and not filename.startswith(current):
+                try:
+                    os.remove(path.join(self.__cache_directory, filename))
+                except FileNotFoundError:
+                    # Already pruned by another run
+                    pass
+
+    @staticmethod
+    def __path_prefix(file_path: str) -> str:
+        """Get the start of the entry filenames of every version of a file.
+
+        Args:
+            file_path (str): The path to the input file.
+
+        Returns:
+            str: The hash of the file's absolute path and a separator.
+        """
+        return hashlib.sha256(path.abspath(file_path).encode("utf-8")).hexdigest()[:32] + "-"
+
+    def clear(self) -> None:
+        """Delete every entry of the cache."""
+        if not path.isdir(self.__cache_directory):
+            return
+        for filename in os.listdir(self.__cache_directory):
+            if filename.endswith(self.ENTRY_SUFFIX):
+                os.remove(path.join(self.__cache_directory, filename))
@@ -4,12 +4,29 @@
 __author__ = ""
 __version__ = ""
 
+import argparse
 from os import path
 from input_handler.input_handler import InputHandler
+from input_handler.parsed_cache import ParsedInputCache
+from data_processor.checkpoint import CheckpointStore
 from data_processor.data_processor import DataProcessor
+from data_processor.fx_rates import FxRateTable
+from data_processor.multi_file import MultiFileProcessor
+from data_processor.rules import SuspiciousTransactionRules
+from metrics.pipeline_metrics import PipelineMetrics
 from output_handler.output_handler import OutputHandler
+from output_handler.suspicious_sink import CsvSuspiciousSink
+from transaction.amounts import DEFAULT_AMOUNT_DIGITS
 
-def main() -> None:
+# File suffix added to the output files of each compression
+OUTPUT_SUFFIXES = {"gzip": ".gz", "bz2": ".bz2", "xz": ".xz"}
+
+def main(checkpoint_file: str = None, metrics_file: str = None, 
+         cache_directory: str = None, stream_suspicious: bool = False, 
+         rules_file: str = None, input_pattern: str = None, 
+         fixed_point: bool = False, output_format: str = "csv", 
+         compression: str = None, fx_rates_file: str = None, 
+         reporting_currency: str = "CAD") -> None:
     """Main function to read input data, process it, and write the 
     results to output files.
 
@@ -17,8 +34,47 @@ def main() -> None:
     - Processes the data using DataProcessor.
     - Writes the processed data to CSV and JSON files using 
     OutputHandler.
+
+    Args:
+        checkpoint_file (str): Optional path of a checkpoint file. When
+            given, only the rows appended to the input file since the 
+            previous run are processed and merged into the saved 
+            aggregates.
+        metrics_file (str): Optional path of a metrics file written at
+            the end of the run with per-stage timings, row counters, 
+            rejection reasons and peak memory (Prometheus text format 
+            if it ends in .prom, JSON otherwise).
+        cache_directory (str): Optional directory of the parsed input
+            cache. When given, the input file is parsed once into a 
+            columnar binary file that later runs memory-map instead of
+            parsing the text again.
+        stream_suspicious (bool): Write each suspicious transaction to 
+            its output file as soon as it is detected instead of keeping
+            them all in memory until the end of the run.
+        rules_file (str): Optional path of a JSON file with the rules 
+            flagging suspicious transactions (see 
+            SuspiciousTransactionRules.from_dict). The default rules 
+            flag amounts over 10000 and XRP or LTC transactions.
+        input_pattern (str): Optional glob pattern (e.g. 
+            "input/branches/*.csv"). When given, every matching file is
+            read and validated concurrently and they are all aggregated
+            together, instead of input/input_data.csv.
+        fixed_point (bool): Sum amounts exactly as integer cents instead
+            of floats.
+        output_format (str): Format of the output files: "csv" (the 
+            default), "json" (one JSON array per file) or "ndjson" (one
+            JSON object per line).
+        compression (str): Optional compression of the JSON output 
+            files: "gzip", "bz2" or "xz".
+        fx_rates_file (str): Optional path of a CSV file of FX rates 
+            (Currency, Date, Rate), e.g. input/fx_rates.csv. When given,
+            amounts are converted to the reporting currency before they
+            are aggregated or compared with the thresholds.
+        reporting_currency (str): Currency the FX rates convert to.
     """
 
+    metrics = PipelineMetrics()
+
     # Retrieves the directory name of the current script or module file.
     current_directory = path.dirname(path.abspath(__file__))
 
@@ -26,20 +82,6 @@ def main() -> None:
     # and the filename to create a complete path to the file.
     input_file_path = path.join(current_directory, "input/input_data.csv")
 
-    input_handler = InputHandler(input_file_path)
-    transactions = input_handler.read_input_data()
-
-    data_processor = DataProcessor(transactions, logging_file = "fdp_team_6.log", logging_level = "INFO")
-    processed_data = data_processor.process_data()
-
-
-    account_summaries = processed_data["account_summaries"]
-    suspicious_transactions = processed_data["suspicious_transactions"]
-    transaction_statistics = processed_data["transaction_statistics"]
-    output_handler = OutputHandler(account_summaries, 
-                                   suspicious_transactions, 
-                                   transaction_statistics)
-
     # Joins the current directory, the relative path to the output 
     # folder and the filename to create a complete path to each of the 
     # output files.
@@ -51,14 +93,130 @@ def main() -> None:
     ]
 
     file_path = {}
+    extension = output_format + OUTPUT_SUFFIXES.get(compression, "")
 
     for filename in filenames:
         file_path[filename] = path.join(current_directory,
-                                        f"output/{file_prefix}_{filename}.csv")
+                                        f"output/{file_prefix}_{filename}.{extension}")
+
+    input_handler = InputHandler(input_file_path, metrics = metrics)
+    # Streams raw rows straight into the DataProcessor's fused pipeline,
+    # which validates and aggregates each row in a single pass so the
+    # input file is never fully held in memory.
+    rows = input_handler.iter_raw_input_data()
+
+    # Log records are written to the log file by a background thread;
+    # close() flushes them once processing is done.
+    # Suspicious transactions are either kept until the end of the run or
+    # written to their output file as soon as they are flagged.
+    suspicious_sink = None
+    if stream_suspicious:
+        suspicious_sink = CsvSuspiciousSink(file_path["suspicious_transactions"])
 
-    output_handler.write_account_summaries_to_csv(file_path["account_summaries"])
-    output_handler.write_suspicious_transactions_to_csv(file_path["suspicious_transactions"])
-    output_handler.write_transaction_statistics_to_csv(file_path["transaction_statistics"])
+    rules = SuspiciousTransactionRules.from_file(rules_file) if rules_file else None
+
+    # Amounts are converted to the reporting currency before they are
+    # summed or compared with the thresholds.
+    fx_rates = FxRateTable.from_csv(fx_rates_file, reporting_currency) if fx_rates_file else None
+
+    data_processor = DataProcessor([], logging_file = "fdp_team_6.log", logging_level = "INFO",
+                                   background_logging = True, metrics = metrics,
+                                   suspicious_sink = suspicious_sink, rules = rules,
+                                   amount_digits = DEFAULT_AMOUNT_DIGITS if fixed_point else None,
+                                   fx_rates = fx_rates)
+    # Reading and processing are fused, so they are timed as one stage.
+    with metrics.stage("read_and_process"):
+        if input_pattern:
+            multi_file_processor = MultiFileProcessor.from_glob(input_pattern)
+            processed_data = multi_file_processor.process_data(data_processor)
+        elif checkpoint_file:
+            checkpoint_store = CheckpointStore(checkpoint_file)
+            processed_data = checkpoint_store.process_new_rows(input_file_path, data_processor)
+        elif cache_directory:
+            parsed_cache = ParsedInputCache(cache_directory, data_processor.amount_digits)
+            processed_data = data_processor.process_batch(parsed_cache.load_or_build(input_file_path))
+        else:
+            processed_data = data_processor.process_fused(rows)
+    data_processor.close()
+    if suspicious_sink is not None:
+        suspicious_sink.close()
+
+
+    account_summaries = processed_data["account_summaries"]
+    suspicious_transactions = processed_data["suspicious_transactions"]
+    transaction_statistics = processed_data["transaction_statistics"]
+    output_handler = OutputHandler(account_summaries, 
+                                   suspicious_transactions, 
+                                   transaction_statistics)
+
+    # The three reports are written concurrently by the bulk writers.
+    with metrics.stage("write"):
+        if output_format == "csv":
+            output_handler.write_all_to_csv(file_path["account_summaries"],
+                                            None if stream_suspicious else file_path["suspicious_transactions"],
+                                            file_path["transaction_statistics"])
+        else:
+            output_handler.write_all_to_json(file_path["account_summaries"],
+                                             file_path["suspicious_transactions"],
+                                             file_path["transaction_statistics"],
+                                             lines = output_format == "ndjson",
+                                             compression = compression)
+
+    if metrics_file:
+        metrics.write(metrics_file)
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse the command line options of the script.
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description = "Process the transactions in input/input_data.csv.")
+    parser.add_argument("--checkpoint", metavar = "PATH", 
+                        help = "resume from (and update) the checkpoint saved at PATH")
+    parser.add_argument("--metrics", metavar = "PATH", 
+                        help = "write run metrics to PATH (Prometheus text format for .prom, JSON otherwise)")
+    parser.add_argument("--cache", metavar = "DIR", 
+                        help = "reuse (or create) a parsed copy of the input file in DIR")
+    parser.add_argument("--stream-suspicious", action = "store_true", 
+                        help = "write suspicious transactions to their output file as they are detected")
+    parser.add_argument("--rules", metavar = "PATH", 
+                        help = "flag suspicious transactions with the JSON rules saved at PATH")
+    parser.add_argument("--inputs", metavar = "GLOB", 
+                        help = "process every input file matching GLOB concurrently instead of input/input_data.csv")
+    parser.add_argument("--fixed-point", action = "store_true", 
+                        help = "sum amounts exactly as integer cents instead of floats")
+    parser.add_argument("--format", choices = ["csv", "json", "ndjson"], default = "csv", 
+                        help = "format of the output files (default: csv)")
+    parser.add_argument("--compress", choices = sorted(OUTPUT_SUFFIXES), 
+                        help = "compress the JSON output files while they are written")
+    parser.add_argument("--fx-rates", metavar = "PATH", 
+                        help = "convert amounts to the reporting currency with the CSV rates (Currency,Date,Rate) saved at PATH, e.g. input/fx_rates.csv")
+    parser.add_argument("--reporting-currency", default = "CAD", 
+                        help = "currency the --fx-rates rates convert to (default: CAD)")
+    arguments = parser.parse_args()
+    if arguments.stream_suspicious and arguments.checkpoint:
+        # A resumed run would only stream the new rows and overwrite the
+        # suspicious transactions streamed by the previous runs.
+        parser.error("--stream-suspicious cannot be combined with --checkpoint")
+    if arguments.format == "csv" and arguments.compress:
+        parser.error("--compress needs --format json or ndjson")
+    if arguments.stream_suspicious and arguments.format != "csv":
+        # The suspicious transactions are streamed as CSV.
+        parser.error("--stream-suspicious only supports --format csv")
+    if arguments.inputs and (arguments.checkpoint or arguments.cache):
+        parser.error("--inputs cannot be combined with --checkpoint or --cache")
+    return arguments
 
 if __name__ == "__main__":
-    main()
+    arguments = parse_arguments()
+    main(checkpoint_file = arguments.checkpoint, metrics_file = arguments.metrics, 
+         cache_directory = arguments.cache, 
+         stream_suspicious = arguments.stream_suspicious, 
+         rules_file = arguments.rules, 
+         input_pattern = arguments.inputs, 
+         fixed_point = arguments.fixed_point, 
+         output_format = arguments.format, 
+         compression = arguments.compress, 
+         fx_rates_file = arguments.fx_rates, 
+         reporting_currency = arguments.reporting_currency)
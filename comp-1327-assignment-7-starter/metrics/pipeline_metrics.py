@@ -0,0 +1,193 @@
+"""Module with the PipelineMetrics class, which collects timings, counters
+and memory usage for a run of the pipeline and exports them as JSON or in
+the Prometheus text format
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1.0.0"
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import resource
+except ImportError:     # Not available on Windows
+    resource = None
+
+
+def peak_rss_mb() -> float:
+    """Get the peak resident set size of the current process.
+
+    Returns:
+        float: The peak RSS in MiB, or None where it cannot be measured.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class PipelineMetrics:
+    """Collect per-stage wall and CPU time, row counters and rejection reasons.
+
+    Example:
+        >>> metrics = PipelineMetrics()
+        >>> with metrics.stage("read"):
+        ...     rows = input_handler.read_input_data()
+        >>> metrics.write("output/metrics.json")
+    """
+
+    # Prefix of every exported Prometheus metric name
+    PROMETHEUS_PREFIX = "transaction_pipeline"
+
+    def __init__(self):
+        """Initialize empty metrics."""
+        self.__stages = {}
+        self.__counters = {}
+        self.__rejection_reasons = {}
+
+    @property
+    def stages(self) -> dict:
+        """Get the stage timings.
+
+        Returns:
+            dict: Stage name -> {"wall_seconds": float, "cpu_seconds": float}, in the order the stages first ran.
+        """
+        return self.__stages
+
+    @property
+    def counters(self) -> dict:
+        """Get the counters.
+
+        Returns:
+            dict: Counter name (e.g. 'rows_read') -> value.
+        """
+        return self.__counters
+
+    @property
+    def rejection_reasons(self) -> dict:
+        """Get how many rows were rejected for each reason.
+
+        Returns:
+            dict: Reason (see InputHandler.rejection_reason) -> count.
+        """
+        return self.__rejection_reasons
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the wall clock and CPU time of the code run inside the block.
+
+        Running the same stage more than once adds up its times.
+
+        Args:
+            name (str): The stage name.
+        """
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            timing = self.__stages.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0})
+            timing["wall_seconds"] += time.perf_counter() - wall_start
+            timing["cpu_seconds"] += time.process_time() - cpu_start
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        """Add to a counter, creating it at zero if needed.
+
+        Args:
+            counter (str): The counter name.
+            amount (int): How much to add.
+        """
+        self.__counters[counter] = self.__counters.get(counter, 0) + amount
+
+    def set(self, counter: str, value) -> None:
+        """Set a counter to a value, e.g. a total known at the end of a stage.
+
+        Args:
+            counter (str): The counter name.
+            value: The new value.
+        """
+        self.__counters[counter] = value
+
+    def record_rejection(self, reason: str, amount: int = 1) -> None:
+        """Count rows rejected by validation.
+
+        Args:
+            reason (str): Why the rows were rejected.
+            amount (int): How many rows were rejected.
+        """
+        self.__rejection_reasons[reason] = self.__rejection_reasons.get(reason, 0) + amount
+        self.increment("rows_rejected", amount)
+
+    def update(self, metrics: dict) -> None:
+        """Add the counters and rejection reasons collected elsewhere, e.g.
+        by a worker process, onto these ones. Stages are not merged.
+
+        Args:
+            metrics (dict): The dictionary returned by another PipelineMetrics' to_dict.
+        """
+        for counter, value in metrics.get("counters", {}).items():
+            self.increment(counter, value)
+        for reason, count in metrics.get("rejection_reasons", {}).items():
+            self.__rejection_reasons[reason] = self.__rejection_reasons.get(reason, 0) + count
+
+    def to_dict(self) -> dict:
+        """Get every metric, including the current peak memory.
+
+        Returns:
+            dict: The stages, counters, rejection_reasons and peak_rss_mb.
+        """
+        return {
+            "stages": self.__stages,
+            "counters": self.__counters,
+            "rejection_reasons": self.__rejection_reasons,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+    def to_prometheus(self) -> str:
+        """Format every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics, one sample per line.
+        """
+        prefix = self.PROMETHEUS_PREFIX
+        lines = []
+
+        def add(name: str, help_text: str, samples: list) -> None:
+            """Add one metric family with its samples."""
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{labels} {value}")
+
+        add("stage_wall_seconds", "Wall clock time spent in each stage.",
+            [(f'{{stage="{stage}"}}', timing["wall_seconds"]) for stage, timing in self.__stages.items()])
+        add("stage_cpu_seconds", "CPU time spent in each stage.",
+            [(f'{{stage="{stage}"}}', timing["cpu_seconds"]) for stage, timing in self.__stages.items()])
+        for counter, value in self.__counters.items():
+            add(counter, f"Number of {counter.replace('_', ' ')}.", [("", value)])
+        add("rejections", "Rows rejected by validation, by reason.",
+            [(f'{{reason="{reason}"}}', count) for reason, count in self.__rejection_reasons.items()])
+        peak = peak_rss_mb()
+        if peak is not None:
+            add("peak_rss_bytes", "Peak resident set size of the process.", [("", int(peak * 1024 * 1024))])
+        return "\n".join(lines) + "\n"
+
+    def write(self, file_path: str) -> None:
+        """Write the metrics to a file.
+
+        Files ending in .prom are written in the Prometheus text format
+        (e.g. for the node exporter's textfile collector), anything else as JSON.
+
+        Args:
+            file_path (str): The path of the metrics file.
+        """
+        with open(file_path, "w") as metrics_file:
+            if file_path.endswith(".prom"):
+                metrics_file.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), metrics_file, indent=2)
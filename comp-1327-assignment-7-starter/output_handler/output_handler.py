@@ -5,11 +5,30 @@ __author__ = "Beerdavinder Singh"
 __version__ = "3.12"
 
 import csv
+import json
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from itertools import islice
+from operator import itemgetter
+from typing import Iterable
+from input_handler.compressed import COMPRESSION_OPENERS, COMPRESSION_SUFFIXES
+from transaction.transaction import Transaction
  
 class OutputHandler:
     """
     A class to handle output operations including writing data to CSV files.
     """
+
+    # Size in bytes of the file buffer used by the bulk writers
+    WRITE_BUFFER_SIZE = 1 << 20
+
+    # Number of rows handed to csv.writer.writerows at a time by the bulk writers
+    BULK_CHUNK_SIZE = 10000
+
+    ACCOUNT_SUMMARY_HEADER = ['Account number', 'Balance', 'Total Deposits', 'Total Withdrawals']
+    SUSPICIOUS_TRANSACTION_HEADER = ['Transaction ID', 'Account number', 'Date', 'Transaction type',
+                                     'Amount', 'Currency', 'Description']
+    TRANSACTION_STATISTIC_HEADER = ['Transaction type', 'Total amount', 'Transaction count']
  
     def __init__(self, account_summaries: dict, 
                        suspicious_transactions: list, 
@@ -20,7 +39,7 @@ class OutputHandler:
  
         Args:
             account_summaries (dict): A dictionary containing account summaries.
-            suspicious_transactions (list): A list of suspicious transactions.
+            suspicious_transactions (list): A list of suspicious transactions (dictionaries or Transaction records).
             transaction_statistics (dict): A dictionary containing transaction statistics.
         """
         self.__account_summaries = account_summaries
@@ -114,4 +133,270 @@ class OutputHandler:
                     transaction_type,
                     statistic['total_amount'],
                     statistic['transaction_count']
-                ])
\ No newline at end of file
+                ])
+
+    def write_account_summaries_bulk(self, file_path: str) -> None:
+        """
+        Write account summaries to a CSV file in bulk: rows are built as tuples
+        and written in chunks through a large file buffer. The file is identical
+        to the one written by write_account_summaries_to_csv.
+ 
+        Args:
+            file_path (str): The file path where the CSV file will be saved.
+        """
+        get_columns = itemgetter('balance', 'total_deposits', 'total_withdrawals')
+        rows = ((account_number, *get_columns(summary))
+                for account_number, summary in self.__account_summaries.items())
+        self.__write_rows(file_path, self.ACCOUNT_SUMMARY_HEADER, rows)
+
+    def write_suspicious_transactions_bulk(self, file_path: str) -> None:
+        """
+        Write suspicious transactions to a CSV file in bulk, see
+        write_account_summaries_bulk.
+ 
+        Args:
+            file_path (str): The file path where the CSV file will be saved.
+        """
+        get_columns = itemgetter(*self.SUSPICIOUS_TRANSACTION_HEADER)
+        self.__write_rows(file_path, self.SUSPICIOUS_TRANSACTION_HEADER,
+                          map(get_columns, self.__suspicious_transactions))
+
+    def write_transaction_statistics_bulk(self, file_path: str) -> None:
+        """
+        Write transaction statistics to a CSV file in bulk, see
+        write_account_summaries_bulk.
+ 
+        Args:
+            file_path (str): The file path where the CSV file will be saved.
+        """
+        get_columns = itemgetter('total_amount', 'transaction_count')
+        rows = ((transaction_type, *get_columns(statistic))
+                for transaction_type, statistic in self.__transaction_statistics.items())
+        self.__write_rows(file_path, self.TRANSACTION_STATISTIC_HEADER, rows)
+
+    def write_all_to_csv(self, account_summaries_path: str,
+                         suspicious_transactions_path: str,
+                         transaction_statistics_path: str,
+                         parallel: bool = True) -> None:
+        """
+        Write the three report files with the bulk writers.
+ 
+        Args:
+            account_summaries_path (str): The file path of the account summaries.
+            suspicious_transactions_path (str): The file path of the suspicious transactions,
+                or None to skip that file, e.g. when it was already streamed by a
+                CsvSuspiciousSink.
+            transaction_statistics_path (str): The file path of the transaction statistics.
+            parallel (bool): Write the files concurrently, one thread per file, so
+                one file is formatted while another is being flushed to disk.
+ 
+        Raises:
+            OSError: If one of the files cannot be written.
+        """
+        self.__write_all([
+            (self.write_account_summaries_bulk, account_summaries_path),
+            (self.write_suspicious_transactions_bulk, suspicious_transactions_path),
+            (self.write_transaction_statistics_bulk, transaction_statistics_path)
+        ], parallel)
+
+    def write_account_summaries_to_json(self, file_path: str, lines: bool = False,
+                                        compression: str = None) -> None:
+        """
+        Write account summaries to a JSON file, one object per account with
+        account_number, balance, total_deposits and total_withdrawals.
+        Records are encoded and written a chunk at a time, so the whole
+        document is never built in memory.
+ 
+        Args:
+            file_path (str): The file path where the JSON file will be saved.
+            lines (bool): Write JSON Lines (one object per line) instead of a
+                JSON array.
+            compression (str): 'gzip', 'bz2' or 'xz' to compress the file while
+                it is written. Defaults to the file suffix (.gz, .gzip, .bz2, .xz),
+                uncompressed otherwise.
+        """
+        get_columns = itemgetter('account_number', 'balance', 'total_deposits', 'total_withdrawals')
+        records = (dict(zip(('account_number', 'balance', 'total_deposits', 'total_withdrawals'),
+                            get_columns(summary)))
+                   for summary in self.__account_summaries.values())
+        self.__write_json(file_path, records, lines, compression)
+
+    def write_suspicious_transactions_to_json(self, file_path: str, lines: bool = False,
+                                              compression: str = None) -> None:
+        """
+        Write suspicious transactions to a JSON file, one object per
+        transaction keyed by the input column names, see
+        write_account_summaries_to_json.
+ 
+        Args:
+            file_path (str): The file path where the JSON file will be saved.
+            lines (bool): Write JSON Lines instead of a JSON array.
+            compression (str): 'gzip', 'bz2' or 'xz', see
+                write_account_summaries_to_json.
+        """
+        get_columns = itemgetter(*self.SUSPICIOUS_TRANSACTION_HEADER)
+        records = (transaction.to_dict() if isinstance(transaction, Transaction)
+                   else dict(zip(self.SUSPICIOUS_TRANSACTION_HEADER, get_columns(transaction)))
+                   for transaction in self.__suspicious_transactions)
+        self.__write_json(file_path, records, lines, compression)
+
+    def write_transaction_statistics_to_json(self, file_path: str, lines: bool = False,
+                                             compression: str = None) -> None:
+        """
+        Write transaction statistics to a JSON file, one object per transaction
+        type with transaction_type, total_amount and transaction_count, see
+        write_account_summaries_to_json.
+ 
+        Args:
+            file_path (str): The file path where the JSON file will be saved.
+            lines (bool): Write JSON Lines instead of a JSON array.
+            compression (str): 'gzip', 'bz2' or 'xz', see
+                write_account_summaries_to_json.
+        """
+        records = ({'transaction_type': transaction_type,
+                    'total_amount': statistic['total_amount'],
+                    'transaction_count': statistic['transaction_count']}
+                   for transaction_type, statistic in self.__transaction_statistics.items())
+        self.__write_json(file_path, records, lines, compression)
+
+    def write_all_to_json(self, account_summaries_path: str,
+                          suspicious_transactions_path: str,
+                          transaction_statistics_path: str,
+                          lines: bool = False,
+                          compression: str = None,
+                          parallel: bool = True) -> None:
+        """
+        Write the three report files as JSON, see write_all_to_csv.
+ 
+        Args:
+            account_summaries_path (str): The file path of the account summaries.
+            suspicious_transactions_path (str): The file path of the suspicious transactions,
+                or None to skip that file.
+            transaction_statistics_path (str): The file path of the transaction statistics.
+            lines (bool): Write JSON Lines instead of JSON arrays.
+            compression (str): 'gzip', 'bz2' or 'xz', see
+                write_account_summaries_to_json.
+            parallel (bool): Write the files concurrently, one thread per file.
+                The compressors release the GIL, so compressed files gain the most.
+ 
+        Raises:
+            OSError: If one of the files cannot be written.
+            ValueError: If the compression is unknown.
+        """
+        self.__write_all([
+            (lambda file_path: self.write_account_summaries_to_json(file_path, lines, compression),
+             account_summaries_path),
+            (lambda file_path: self.write_suspicious_transactions_to_json(file_path, lines, compression),
+             suspicious_transactions_path),
+            (lambda file_path: self.write_transaction_statistics_to_json(file_path, lines, compression),
+             transaction_statistics_path)
+        ], parallel)
+
+    def __write_all(self, jobs: list, parallel: bool) -> None:
+        """
+        Run the writers of several report files, skipping the ones without a path.
+ 
+        Args:
+            jobs (list): (writer, file path) pairs.
+            parallel (bool): Run the writers concurrently, one thread per file.
+        """
+        jobs = [(write, file_path) for write, file_path in jobs if file_path is not None]
+        if not jobs:
+            return
+        if not parallel:
+            for write, file_path in jobs:
+                write(file_path)
+            return
+
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            futures = [pool.submit(write, file_path) for write, file_path in jobs]
+            # result() re-raises the first error of a writer in the calling thread
+            for future in futures:
+                future.result()
+
+    def __write_rows(self, file_path: str, header: list, rows: Iterable) -> None:
+        """
+        Write a header and rows to a CSV file through a large buffer, handing the
+        rows to writerows a chunk at a time.
+ 
+        Args:
+            file_path (str): The file path where the CSV file will be saved.
+            header (list): The column names.
+            rows (Iterable): The rows, as tuples.
+        """
+        with open(file_path, 'w', newline='', buffering=self.WRITE_BUFFER_SIZE) as output_file:
+            writer = csv.writer(output_file)
+            writer.writerow(header)
+            rows = iter(rows)
+            while True:
+                chunk = list(islice(rows, self.BULK_CHUNK_SIZE))
+                if not chunk:
+                    break
+                writer.writerows(chunk)
+
+    def __open_text(self, file_path: str, compression: str):
+        """
+        Open a file for writing text, through a compressor if asked for or if
+        the file suffix names one.
+ 
+        Args:
+            file_path (str): The file path.
+            compression (str): 'gzip', 'bz2', 'xz' or None to use the suffix.
+ 
+        Returns:
+            The open text file.
+ 
+        Raises:
+            ValueError: If the compression is unknown.
+        """
+        if compression is None:
+            # Same suffixes as the compressed inputs InputHandler reads
+            compression = COMPRESSION_SUFFIXES.get(file_path.split('.')[-1].lower())
+        if compression is None:
+            return open(file_path, 'w', encoding='utf-8', buffering=self.WRITE_BUFFER_SIZE)
+        if compression not in COMPRESSION_OPENERS:
+            raise ValueError(f"Unknown compression: {compression}, expected one of "
+                             f"{sorted(COMPRESSION_OPENERS)}")
+        return COMPRESSION_OPENERS[compression](file_path, 'wt', encoding='utf-8')
+
+    def __write_json(self, file_path: str, records: Iterable, lines: bool, compression: str) -> None:
+        """
+        Encode records to a JSON array (or JSON Lines) a chunk at a time and
+        write each chunk with a single call.
+ 
+        Args:
+            file_path (str): The file path where the JSON file will be saved.
+            records (Iterable): The records, as dictionaries.
+            lines (bool): Write JSON Lines instead of a JSON array.
+            compression (str): See __open_text.
+ 
+        Raises:
+            ValueError: If the compression is unknown.
+        """
+        encode = json.JSONEncoder(default=_to_json).encode
+        separator = '\n' if lines else ',\n'
+        records = iter(records)
+        with self.__open_text(file_path, compression) as output_file:
+            if not lines:
+                output_file.write('[')
+            first = True
+            while True:
+                chunk = list(islice(records, self.BULK_CHUNK_SIZE))
+                if not chunk:
+                    break
+                text = separator.join(map(encode, chunk))
+                if lines:
+                    output_file.write(text + '\n')
+                else:
+                    output_file.write(('\n' if first else ',\n') + text)
+                first = False
+            if not lines:
+                output_file.write('\n]\n' if not first else ']\n')
+
+
+def _to_json(value):
+    """Serialize the values json does not support natively (fixed-point Decimal
+    amounts, written as exact decimal strings)."""
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
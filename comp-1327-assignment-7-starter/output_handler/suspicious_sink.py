@@ -0,0 +1,82 @@
+"""Module with a sink that writes suspicious transactions to a CSV file as
+they are detected
+"""
+
+__author__ = "Beerdavinder Singh"
+__version__ = "3.12"
+
+import csv
+from operator import itemgetter
+from output_handler.output_handler import OutputHandler
+
+
+class CsvSuspiciousSink:
+    """
+    A callable that appends every suspicious transaction it is given to a CSV
+    file, in the same format as OutputHandler.write_suspicious_transactions_to_csv.
+    Pass it to DataProcessor as suspicious_sink so flagged transactions are
+    never held in memory.
+    """
+
+    def __init__(self, file_path: str, flush_every: int = 1) -> None:
+        """
+        Open the CSV file and write its header.
+
+        Args:
+            file_path (str): The file path where the CSV file will be saved.
+            flush_every (int): Flush the file after this many rows, so other
+                processes tailing the file see the rows during the run. Use a
+                larger value when nobody is tailing the file.
+        """
+        self.__file_path = file_path
+        self.__flush_every = max(1, int(flush_every))
+        self.__count = 0
+        self.__get_columns = itemgetter(*OutputHandler.SUSPICIOUS_TRANSACTION_HEADER)
+        self.__output_file = open(file_path, 'w', newline='')
+        self.__writer = csv.writer(self.__output_file)
+        self.__writer.writerow(OutputHandler.SUSPICIOUS_TRANSACTION_HEADER)
+        self.__output_file.flush()
+
+    @property
+    def file_path(self) -> str:
+        """
+        Get the path of the CSV file.
+
+        Returns:
+            str: The file path.
+        """
+        return self.__file_path
+
+    @property
+    def count(self) -> int:
+        """
+        Get the number of transactions written so far.
+
+        Returns:
+            int: The number of rows written, not counting the header.
+        """
+        return self.__count
+
+    def __call__(self, transaction) -> None:
+        """
+        Write one suspicious transaction.
+
+        Args:
+            transaction: A transaction dictionary or Transaction record.
+        """
+        self.__writer.writerow(self.__get_columns(transaction))
+        self.__count += 1
+        if self.__count % self.__flush_every == 0:
+            self.__output_file.flush()
+
+    def close(self) -> None:
+        """
+        Flush and close the CSV file.
+        """
+        self.__output_file.close()
+
+    def __enter__(self) -> "CsvSuspiciousSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
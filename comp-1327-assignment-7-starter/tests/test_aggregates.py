@@ -0,0 +1,168 @@
+"""Unit tests for the AccountSummaries and TransactionStatistics classes
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import json
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest import TestCase
+from data_processor.aggregates import AccountSummaries, TransactionStatistics
+from data_processor.data_processor import DataProcessor
+from input_handler.input_handler import InputHandler
+
+class TestAggregates(TestCase):
+    """Defines the unit tests for the AccountSummaries and TransactionStatistics classes."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function.
+        
+        Computes the results of three days of transactions, each processed on its own.
+        """
+        days = [
+            [{"Account number": "1001", "Transaction type": "deposit", "Amount": "1000", "Currency": "CAD"},
+             {"Account number": "1002", "Transaction type": "withdrawal", "Amount": "250.5", "Currency": "CAD"}],
+            [{"Account number": "1001", "Transaction type": "withdrawal", "Amount": "300", "Currency": "CAD"},
+             {"Account number": "1003", "Transaction type": "transfer", "Amount": "75", "Currency": "CAD"}],
+            [{"Account number": "1002", "Transaction type": "deposit", "Amount": "500", "Currency": "CAD"}]
+        ]
+        self.transactions = [transaction for day in days for transaction in day]
+        self.daily_results = [DataProcessor(day).process_data() for day in days]
+
+    #tests that merging daily account summaries matches processing every day at once
+    def test_account_summaries_merge(self):
+    #arrange
+        expected = DataProcessor(self.transactions).process_data()["account_summaries"]
+        first, second, third = [AccountSummaries(results["account_summaries"]) for results in self.daily_results]
+        
+    #act
+        left = first.merge(second).merge(third)
+        right = first.merge(second.merge(third))
+        
+    #assert
+        self.assertEqual(expected, left.entries)
+        self.assertEqual(left, right)
+
+    #tests that merge leaves both aggregates unchanged
+    def test_merge_does_not_change_inputs(self):
+    #arrange
+        first = AccountSummaries(self.daily_results[0]["account_summaries"])
+        before = first.copy()
+        
+    #act
+        first.merge(self.daily_results[1]["account_summaries"])
+        
+    #assert
+        self.assertEqual(before, first)
+
+    #tests that a tree reduction of the statistics matches processing every day at once
+    def test_transaction_statistics_merge_all(self):
+    #arrange
+        expected = DataProcessor(self.transactions).process_data()["transaction_statistics"]
+        
+    #act
+        actual = TransactionStatistics.merge_all(results["transaction_statistics"] for results in self.daily_results)
+        
+    #assert
+        self.assertEqual(expected, actual.entries)
+
+    #tests that both aggregates round trip through the binary format
+    def test_binary_round_trip(self):
+    #arrange
+        results = DataProcessor(self.transactions).process_data()
+        summaries = AccountSummaries(results["account_summaries"])
+        statistics = TransactionStatistics(results["transaction_statistics"])
+        
+    #act
+        loaded_summaries = AccountSummaries.from_bytes(summaries.to_bytes())
+        loaded_statistics = TransactionStatistics.from_bytes(statistics.to_bytes())
+        
+    #assert
+        self.assertEqual(summaries, loaded_summaries)
+        self.assertEqual(statistics, loaded_statistics)
+
+    #tests that aggregates of JSON input, whose account numbers are ints, round trip with their key types
+    def test_json_input_round_trip(self):
+    #arrange
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "input.json")
+            with open(file_path, "w") as input_file:
+                json.dump([dict(transaction, **{"Account number": int(transaction["Account number"]),
+                                                "Amount": float(transaction["Amount"])})
+                           for transaction in self.transactions], input_file)
+            results = DataProcessor(InputHandler(file_path).read_input_data()).process_data()
+        summaries = AccountSummaries(results["account_summaries"])
+
+    #act
+        loaded = AccountSummaries.from_bytes(summaries.to_bytes())
+
+    #assert
+        self.assertEqual([1001, 1002, 1003], list(loaded.entries))
+        self.assertEqual(summaries, loaded)
+
+    #tests that fixed-point amounts are saved as exact minor units, even beyond the precision of a double
+    def test_fixed_point_round_trip(self):
+    #arrange
+        transactions = self.transactions + [{"Account number": "1004", "Transaction type": "deposit",
+                                             "Amount": "90071992547409.93", "Currency": "CAD"}]
+        results = DataProcessor(transactions, amount_digits = 2).process_data()
+        summaries = AccountSummaries(results["account_summaries"])
+        statistics = TransactionStatistics(results["transaction_statistics"])
+
+    #act
+        loaded_summaries = AccountSummaries.from_bytes(summaries.to_bytes(amount_digits = 2))
+        loaded_statistics = TransactionStatistics.from_bytes(statistics.to_bytes(amount_digits = 2))
+
+    #assert
+        self.assertEqual(summaries, loaded_summaries)
+        self.assertEqual(statistics, loaded_statistics)
+        self.assertEqual(Decimal("90071992547409.93"), loaded_summaries.entries["1004"]["balance"])
+
+    #tests that a rollup saved to a file is loaded back
+    def test_save_load(self):
+    #arrange
+        summaries = AccountSummaries(self.daily_results[0]["account_summaries"])
+        
+    #act
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "2023-03-01.acctsum")
+            summaries.save(file_path)
+            actual = AccountSummaries.load(file_path)
+        
+    #assert
+        self.assertEqual(summaries, actual)
+
+    #tests that data of another type or truncated data is rejected
+    def test_from_bytes_rejects_invalid_data(self):
+    #arrange
+        data = AccountSummaries(self.daily_results[0]["account_summaries"]).to_bytes()
+        
+    #act and assert
+        with self.assertRaises(ValueError):
+            TransactionStatistics.from_bytes(data)
+        with self.assertRaises(ValueError):
+            AccountSummaries.from_bytes(data[:-4])
+
+    #tests that merge_results accepts the mergeable aggregates
+    def test_data_processor_merges_aggregates(self):
+    #arrange
+        expected = DataProcessor(self.transactions).process_data()
+        test = DataProcessor([])
+        
+    #act
+        for results in self.daily_results:
+            actual = test.merge_results({
+                "account_summaries": AccountSummaries(results["account_summaries"]),
+                "suspicious_transactions": results["suspicious_transactions"],
+                "transaction_statistics": TransactionStatistics(results["transaction_statistics"])
+            })
+        
+    #assert
+        self.assertEqual(expected, actual)
+    
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Unit tests for the fixed-point amount helpers of the transaction package
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1"
+
+import unittest
+from decimal import Decimal
+from unittest import TestCase
+from transaction.amounts import parse_minor_units, to_decimal
+
+
+class ParseMinorUnitsTests(TestCase):
+    """Defines the unit tests for the parse_minor_units function."""
+
+    def test_plain_text(self):
+        # Act
+        actual = [parse_minor_units(value) for value in ("1250", "-3.5", ".75", "0.01", b"42.10")]
+
+        # Assert
+        self.assertEqual([125000, -350, 75, 1, 4210], actual)
+
+    def test_numbers(self):
+        # Act
+        actual = [parse_minor_units(value) for value in (12, 0.1, Decimal("7.25"))]
+
+        # Assert
+        self.assertEqual([1200, 10, 725], actual)
+
+    def test_extra_digits_round_half_to_even(self):
+        # Act
+        actual = [parse_minor_units(value) for value in ("0.125", "0.135", "1e2")]
+
+        # Assert
+        self.assertEqual([12, 14, 10000], actual)
+
+    def test_other_digits(self):
+        # Act
+        actual = [parse_minor_units("1.5", 0), parse_minor_units("1.5", 3)]
+
+        # Assert
+        self.assertEqual([2, 1500], actual)
+
+    def test_invalid_amount_raises_value_error(self):
+        # Act and Assert
+        for value in ("", "abc", "1.2.3", "nan", None):
+            with self.subTest(value = value):
+                with self.assertRaises(ValueError):
+                    parse_minor_units(value)
+
+
+class ToDecimalTests(TestCase):
+    """Defines the unit tests for the to_decimal function."""
+
+    def test_round_trip(self):
+        # Act
+        actual = to_decimal(parse_minor_units("-1234.5"))
+
+        # Assert
+        self.assertEqual("-1234.50", str(actual))
+
+
+if __name__ == "__main__":
+    unittest.main()
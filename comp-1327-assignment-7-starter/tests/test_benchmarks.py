@@ -0,0 +1,81 @@
+"""Unit tests for the synthetic data generator and the benchmark harness
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1"
+
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from benchmarks.benchmark_pipeline import run_scenario
+from benchmarks.data_generator import TransactionGenerator
+from data_processor.data_processor import DataProcessor
+from input_handler.input_handler import InputHandler
+
+
+class BenchmarkTests(TestCase):
+    """Defines the unit tests for the benchmarks package."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.generator = TransactionGenerator(accounts=20, suspicious_ratio=0.2, seed=7)
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        self.directory.cleanup()
+
+    def test_generate_is_reproducible(self):
+        """Test that the same seed generates the same rows."""
+        # Act
+        first = list(self.generator.generate(50))
+        second = list(TransactionGenerator(accounts=20, suspicious_ratio=0.2, seed=7).generate(50))
+
+        # Assert
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 50)
+
+    def test_generate_respects_parameters(self):
+        """Test the account cardinality and suspicious ratio of the generated rows."""
+        # Arrange
+        rows = list(self.generator.generate(2000))
+
+        # Act
+        accounts = {row["Account number"] for row in rows}
+        suspicious = DataProcessor(rows).process_data()["suspicious_transactions"]
+
+        # Assert
+        self.assertLessEqual(len(accounts), 20)
+        self.assertAlmostEqual(len(suspicious) / len(rows), 0.2, delta=0.03)
+
+    def test_written_files_are_readable(self):
+        """Test that every supported format can be read back by the InputHandler."""
+        for extension in ("csv", "json", "ndjson"):
+            # Arrange
+            file_path = os.path.join(self.directory.name, f"synthetic.{extension}")
+
+            # Act
+            self.generator.write(file_path, 25)
+
+            # Assert
+            self.assertEqual(InputHandler(file_path).read_input_data(), list(self.generator.generate(25)))
+
+    def test_run_scenario_reports_stages(self):
+        """Test that a scenario reports its row count, stage times and throughput."""
+        # Arrange
+        file_path = os.path.join(self.directory.name, "synthetic.csv")
+        self.generator.write(file_path, 100)
+
+        # Act
+        result = run_scenario("fused", file_path, self.directory.name)
+
+        # Assert
+        self.assertEqual(result["rows"], 100)
+        self.assertEqual(set(result["stages"]), {"read+process", "write"})
+        self.assertGreater(result["rows_per_second"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""Unit tests for the CheckpointStore class
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from data_processor.checkpoint import CheckpointStore
+from data_processor.data_processor import DataProcessor
+from data_processor.rules import SuspiciousTransactionRules
+
+class TestCheckpointStore(TestCase):
+    """Defines the unit tests for the CheckpointStore class."""
+
+    HEADER = "Transaction ID,Account number,Date,Transaction type,Amount,Currency,Description\n"
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function.
+        
+        Creates a temporary directory holding the input file and the checkpoint.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "input.csv")
+        self.store = CheckpointStore(os.path.join(self.directory.name, "checkpoint.json"))
+        self.first_rows = ("1,1001,2023-03-01,deposit,1000,CAD,Salary\n"
+                           + "2,1002,2023-03-01,deposit,12000,CAD,Car Sale\n")
+        self.new_rows = ("3,1001,2023-03-02,withdrawal,200,CAD,Groceries\n"
+                         + "4,1003,2023-03-02,deposit,50,XRP,Crypto\n")
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        self.directory.cleanup()
+
+    def write(self, text: str, mode: str = "w") -> None:
+        """Writes (or appends) text to the input file."""
+        with open(self.file_path, mode) as input_file:
+            input_file.write(text)
+
+    #tests that a rerun after an append only processes the new rows and matches a full run
+    def test_resume_processes_appended_rows(self):
+    #arrange
+        self.write(self.HEADER + self.first_rows)
+        self.store.process_new_rows(self.file_path, DataProcessor([]))
+        self.write(self.new_rows, "a")
+        expected = DataProcessor([]).process_fused(
+            [dict(zip(self.HEADER.strip().split(","), line.split(",")))
+             for line in (self.first_rows + self.new_rows).splitlines()])
+        
+    #act
+        test = DataProcessor([])
+        with self.assertLogs(test.logger, "INFO") as logs:
+            actual = self.store.process_new_rows(self.file_path, test)
+        
+    #assert
+        self.assertEqual(expected, actual)
+        self.assertIn("2 transactions processed", " ".join(logs.output))
+        self.assertEqual("4", self.store.load()["last_transaction_id"])
+
+    #tests that a rerun with no new rows changes nothing
+    def test_rerun_without_new_rows(self):
+    #arrange
+        self.write(self.HEADER + self.first_rows)
+        expected = self.store.process_new_rows(self.file_path, DataProcessor([]))
+        
+    #act
+        actual = self.store.process_new_rows(self.file_path, DataProcessor([]))
+        
+    #assert
+        self.assertEqual(expected, actual)
+
+    #tests that a rewritten file is processed from the start
+    def test_rewritten_file_ignores_checkpoint(self):
+    #arrange
+        self.write(self.HEADER + self.first_rows)
+        self.store.process_new_rows(self.file_path, DataProcessor([]))
+        self.write(self.HEADER + self.new_rows + self.new_rows)
+        
+    #act
+        actual = self.store.process_new_rows(self.file_path, DataProcessor([]))
+        
+    #assert
+        self.assertEqual(["1001", "1003"], list(actual["account_summaries"]))
+        self.assertEqual(4, sum(statistic["transaction_count"] for statistic in actual["transaction_statistics"].values()))
+
+    #tests that a partially written last row is left for the run after it is completed
+    def test_partial_last_line_waits_for_next_run(self):
+    #arrange
+        self.write(self.HEADER + self.first_rows + self.new_rows[:20])
+        first_run = self.store.process_new_rows(self.file_path, DataProcessor([]))
+        first_state = self.store.load()
+        self.write(self.new_rows[20:], "a")
+        expected = DataProcessor([]).process_fused(
+            [dict(zip(self.HEADER.strip().split(","), line.split(",")))
+             for line in (self.first_rows + self.new_rows).splitlines()])
+        
+    #act
+        actual = self.store.process_new_rows(self.file_path, DataProcessor([]))
+        
+    #assert
+        self.assertEqual(["1001", "1002"], list(first_run["account_summaries"]))
+        self.assertEqual("2", first_state["last_transaction_id"])
+        self.assertEqual(len(self.HEADER + self.first_rows), first_state["offset"])
+        self.assertEqual(expected, actual)
+        self.assertEqual(os.path.getsize(self.file_path), self.store.load()["offset"])
+
+    #tests that velocity rules process the whole file again, so their daily counts cover the earlier rows
+    def test_velocity_rules_do_not_resume(self):
+    #arrange
+        rules = SuspiciousTransactionRules(max_daily_transactions = 1)
+        self.write(self.HEADER + self.first_rows)
+        self.store.process_new_rows(self.file_path, DataProcessor([], rules = rules))
+        self.write("3,1001,2023-03-01,deposit,5,CAD,Coffee\n", "a")
+
+    #act
+        test = DataProcessor([], rules = rules)
+        with self.assertLogs(test.logger, "WARNING") as logs:
+            actual = self.store.process_new_rows(self.file_path, test)
+
+    #assert
+        self.assertIn("processing the whole file", " ".join(logs.output))
+        self.assertEqual(["2", "3"], [transaction["Transaction ID"] for transaction in actual["suspicious_transactions"]])
+        self.assertEqual(3, sum(statistic["transaction_count"] for statistic in actual["transaction_statistics"].values()))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+"""Unit tests for reading compressed input files
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1"
+
+import bz2
+import gzip
+import json
+import lzma
+import mmap
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from unittest.mock import patch
+from input_handler import compressed
+from input_handler.input_handler import InputHandler
+
+
+class CompressedInputTests(TestCase):
+    """Defines the unit tests for compressed input files."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.rows = [
+            {"Transaction ID": str(index), "Account number": "1001", "Date": "2023-03-01",
+             "Transaction type": "deposit", "Amount": str(index * 10), "Currency": "CAD",
+             "Description": "Salary"}
+            for index in range(1, 201)
+        ]
+        header = ",".join(self.rows[0])
+        self.csv_text = header + "\n" + "".join(",".join(row.values()) + "\n" for row in self.rows)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name: str, data: bytes) -> str:
+        file_path = os.path.join(self.directory.name, name)
+        with open(file_path, "wb") as output_file:
+            output_file.write(data)
+        return file_path
+
+    def test_compression_suffixes(self):
+        # Arrange
+        file_paths = [
+            self.write("data.csv.gz", gzip.compress(self.csv_text.encode())),
+            self.write("data.json.xz", lzma.compress(json.dumps(self.rows).encode())),
+            self.write("data.ndjson.bz2", bz2.compress("".join(json.dumps(row) + "\n" for row in self.rows).encode()))
+        ]
+
+        for file_path in file_paths:
+            with self.subTest(file_path = os.path.basename(file_path)):
+                # Act
+                actual = InputHandler(file_path).read_input_data()
+
+                # Assert
+                self.assertEqual(self.rows, actual)
+
+    def test_magic_bytes_are_sniffed_for_unknown_suffixes(self):
+        # Arrange
+        file_path = self.write("extract.dat", gzip.compress(json.dumps(self.rows).encode()))
+        input_handler = InputHandler(file_path)
+
+        # Act
+        actual = input_handler.read_input_data()
+
+        # Assert
+        self.assertEqual(("gzip", "json"), (input_handler.get_compression(), input_handler.get_file_format()))
+        self.assertEqual(self.rows, actual)
+
+    @patch("input_handler.input_handler.sniff_compression")
+    def test_known_suffix_is_not_sniffed(self, mock_sniff):
+        # Arrange
+        file_path = self.write("data.csv", self.csv_text.encode())
+
+        # Act
+        actual = InputHandler(file_path).read_input_data()
+
+        # Assert
+        self.assertEqual(self.rows, actual)
+        mock_sniff.assert_not_called()
+
+    def test_multi_member_gzip_is_decompressed_in_parallel(self):
+        # Arrange
+        data = self.csv_text.encode()
+        members = b"".join(gzip.compress(data[index:index + 500]) for index in range(0, len(data), 500))
+        file_path = self.write("members.csv.gz", members)
+
+        # Act
+        with patch.object(compressed, "SEGMENT_SIZE", 400), patch.object(compressed, "MAX_PENDING_SIZE", 1000):
+            actual = InputHandler(file_path, decompression_workers = 3).read_input_data()
+
+        # Assert
+        self.assertEqual(self.rows, actual)
+
+    def test_false_member_starts_are_skipped(self):
+        # Arrange
+        data = self.csv_text.encode()
+        members = b"".join(gzip.compress(data[index:index + 2000]) for index in range(0, len(data), 2000))
+        second_member = members.index(compressed.GZIP_MEMBER_HEADER, 1)
+        file_path = self.write("members.gz", members)
+
+        # Act
+        with open(file_path, "rb") as input_file:
+            mapped = mmap.mmap(input_file.fileno(), 0, access = mmap.ACCESS_READ)
+            chunks = compressed._iter_parallel_members(mapped, [0, 7, second_member, second_member + 50], 2)
+            actual = b"".join(chunks)
+
+        # Assert
+        self.assertEqual(data, actual)
+
+    def test_segments_in_flight_are_bounded(self):
+        # Arrange
+        data = self.csv_text.encode() * 20
+        members = b"".join(gzip.compress(data[index:index + 500]) for index in range(0, len(data), 500))
+        file_path = self.write("members.gz", members)
+        inflated = []
+        inflate = compressed._inflate_segment
+
+        def inflate_segment(data, start, end):
+            inflated.append(end - start)
+            return inflate(data, start, end)
+
+        # Act
+        with open(file_path, "rb") as input_file, \
+                patch.object(compressed, "SEGMENT_SIZE", 400), patch.object(compressed, "MAX_PENDING_SIZE", 2000):
+            mapped = mmap.mmap(input_file.fileno(), 0, access = mmap.ACCESS_READ)
+            starts = compressed._segment_starts(mapped)
+            with patch.object(compressed, "_inflate_segment", inflate_segment):
+                chunks = compressed._iter_parallel_members(mapped, starts, 4)
+                first = next(chunks)
+                inflated_before_read = sum(inflated)
+                actual = first + b"".join(chunks)
+
+        # Assert
+        self.assertEqual(data, actual)
+        self.assertGreater(len(starts), 10)
+        self.assertLessEqual(inflated_before_read, 2000 + max(inflated))
+
+    def test_member_larger_than_segment_is_streamed(self):
+        # Arrange
+        big = self.csv_text.encode() * 20
+        small = self.csv_text.encode()
+        members = gzip.compress(big) + b"".join(gzip.compress(small[index:index + 500])
+                                                for index in range(0, len(small), 500))
+        file_path = self.write("members.gz", members)
+        held = []
+        inflate = compressed._inflate_segment
+
+        def inflate_segment(data, start, end):
+            chunks, stop = inflate(data, start, end)
+            held.append(sum(map(len, chunks or ())))
+            return chunks, stop
+
+        # Act
+        with open(file_path, "rb") as input_file, patch.object(compressed, "SEGMENT_SIZE", 400), \
+                patch.object(compressed, "MAX_SEGMENT_OUTPUT", 2000), patch.object(compressed, "INFLATE_CHUNK_SIZE", 500):
+            mapped = mmap.mmap(input_file.fileno(), 0, access = mmap.ACCESS_READ)
+            starts = compressed._segment_starts(mapped)
+            with patch.object(compressed, "_inflate_segment", inflate_segment):
+                chunks = list(compressed._iter_parallel_members(mapped, starts, 4))
+
+        # Assert
+        self.assertEqual(big + small, b"".join(chunks))
+        self.assertGreater(members.index(compressed.GZIP_MEMBER_HEADER, 1), 400)
+        self.assertLessEqual(max(held), 2000)
+        self.assertLessEqual(max(map(len, chunks)), 500)
+
+    def test_compressed_file_has_no_byte_ranges(self):
+        # Arrange
+        file_path = self.write("data.csv.gz", gzip.compress(self.csv_text.encode()))
+
+        # Act and Assert
+        with self.assertRaises(ValueError):
+            InputHandler(file_path).get_mmap_scanner()
+        with self.assertRaises(ValueError):
+            InputHandler(file_path).get_csv_byte_ranges(2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,9 +4,13 @@
 __author__ = ""
 __version__ = ""
 
+import logging
+import logging.handlers
 import unittest
 from unittest import TestCase
+from decimal import Decimal
 from data_processor.data_processor import DataProcessor
+from data_processor.transaction_batch import TransactionBatch
 
 class TestDataProcessor(TestCase):
     """Defines the unit tests for the DataProcessor class."""
@@ -174,6 +178,205 @@ class TestDataProcessor(TestCase):
         
     #assert
         self.assertLogs()
+
+#test that any iterable can be processed in streaming mode
+    def test_process_transactions_generator(self):
+        self.setUp()
+        
+    #arrange
+        test = DataProcessor(transaction for transaction in self.transactions)
+        expected = {'total_amount': 18000.0, 'transaction_count': 3}
+        
+    #act
+        result = test.process_data()
+        
+    #assert
+        self.assertEqual(expected, result["transaction_statistics"]["withdrawal"])
+        self.assertEqual(2, len(result["suspicious_transactions"]))
+        self.assertEqual(-16500, result["account_summaries"]["1003"]["balance"])
+
+#test that the fused pipeline validates and aggregates raw rows in one pass
+    def test_process_fused_matches_process_data(self):
+        self.setUp()
+        
+    #arrange
+        invalid = [
+            {"Account number": "1001", "Transaction type": "refund", "Amount": 5, "Currency": "CAD"},
+            {"Account number": "1001", "Transaction type": "deposit", "Amount": -5, "Currency": "CAD"},
+            {"Account number": "1001", "Transaction type": "deposit", "Amount": "abc", "Currency": "CAD"},
+            {"Account number": "1001", "Transaction type": ["deposit"], "Amount": 5, "Currency": "CAD"}
+        ]
+        expected = DataProcessor(self.transactions).process_data()
+        
+    #act
+        actual = DataProcessor([]).process_fused(invalid + self.transactions)
+        
+    #assert
+        self.assertEqual(expected, actual)
+
+#test that per transaction info logs are sampled
+    def test_logging_sampled(self):
+        self.setUp()
+        
+    #arrange
+        test = DataProcessor(self.transactions, log_every = 2)
+        
+    #act
+        with self.assertLogs(test.logger, "INFO") as logs:
+            test.process_data()
+        account_logs = [line for line in logs.output if "Account summary updated" in line]
+        
+    #assert
+        self.assertEqual(2, len(account_logs))
+        self.assertIn("Data Processing Complete: 4 transactions processed", logs.output[-1])
+
+#test that nothing is counted or built for info logs when INFO is disabled
+    def test_logging_disabled_level(self):
+        self.setUp()
+        
+    #arrange
+        test = DataProcessor(self.transactions)
+        test.logger.setLevel(logging.WARNING)
+        
+    #act
+        with self.assertLogs(test.logger, "WARNING") as logs:
+            test.process_data()
+        test.logger.setLevel(logging.NOTSET)
+        
+    #assert
+        self.assertEqual(2, len(logs.output))
+        self.assertTrue(all("Suspicious transaction" in line for line in logs.output))
+
+#test that background logging hands records to the root handlers through a queue
+    def test_background_logging(self):
+        self.setUp()
+        
+    #arrange
+        handler = logging.handlers.BufferingHandler(100)
+        logging.getLogger().addHandler(handler)
+        test = DataProcessor(self.transactions, background_logging = True)
+        
+    #act
+        test.process_data()
+        test.close()
+        logging.getLogger().removeHandler(handler)
+        
+    #assert
+        messages = [record.getMessage() for record in handler.buffer]
+        self.assertEqual(2, len([message for message in messages if "Suspicious transaction" in message]))
+        self.assertTrue(test.logger.propagate)
+
+
+#suspicious sink unit tests
+    #tests that every mode streams the flagged transactions to the sink instead of keeping them
+    def test_suspicious_sink(self):
+        self.setUp()
+        
+    #arrange
+        expected = self.transactions[2:]
+        modes = {
+            "process_data": lambda test: test.process_data(),
+            "process_fused": lambda test: test.process_fused(self.transactions),
+            "process_columnar": lambda test: test.process_columnar()
+        }
+        
+        for mode, process in modes.items():
+            with self.subTest(mode = mode):
+                flagged = []
+                test = DataProcessor(self.transactions, suspicious_sink = flagged.append)
+                
+    #act
+                results = process(test)
+                
+    #assert
+                self.assertEqual(expected, [dict(transaction) for transaction in flagged])
+                self.assertEqual([], results["suspicious_transactions"])
+                self.assertEqual(2, test.suspicious_count)
+
+    #tests that merged partial results are streamed to the sink
+    def test_suspicious_sink_merge_results(self):
+        self.setUp()
+        
+    #arrange
+        partial_results = DataProcessor(self.transactions).process_data()
+        flagged = []
+        test = DataProcessor([], suspicious_sink = flagged.append)
+        
+    #act
+        test.merge_results(partial_results)
+        
+    #assert
+        self.assertEqual(self.transactions[2:], flagged)
+        self.assertEqual([], test.suspicious_transactions)
+        self.assertEqual(2, test.suspicious_count)
+
+
+#fixed-point amount unit tests
+    #tests that amounts summed as minor units are exact and every mode agrees
+    def test_fixed_point_totals_are_exact(self):
+        self.setUp()
+        
+    #arrange
+        transactions = [dict(self.transactions[0], **{"Transaction ID": str(index), "Amount": "0.1"})
+                        for index in range(10)]
+        modes = {
+            "process_data": lambda test: test.process_data(),
+            "process_fused": lambda test: test.process_fused(transactions),
+            "process_columnar": lambda test: test.process_columnar()
+        }
+        
+        for mode, process in modes.items():
+            with self.subTest(mode = mode):
+                test = DataProcessor(transactions, amount_digits = 2)
+                
+    #act
+                results = process(test)
+                
+    #assert
+                self.assertEqual(Decimal("1.00"), results["account_summaries"]["1001"]["balance"])
+                self.assertEqual(Decimal("1.00"), results["transaction_statistics"]["deposit"]["total_amount"])
+                self.assertEqual(Decimal("0.10"), test.get_average_transaction_amount("deposit"))
+
+    #tests that the suspicious transaction threshold is compared in minor units
+    def test_fixed_point_threshold(self):
+        self.setUp()
+        
+    #arrange
+        transactions = [dict(self.transactions[0], Amount = "10000.00"), dict(self.transactions[0], Amount = "10000.01")]
+        test = DataProcessor(transactions, amount_digits = 2)
+        
+    #act
+        results = test.process_data()
+        
+    #assert
+        self.assertEqual([transactions[1]], results["suspicious_transactions"])
+
+    #tests that fixed-point results merge into another fixed-point processor
+    def test_fixed_point_merge_results(self):
+        self.setUp()
+        
+    #arrange
+        partial_results = DataProcessor(self.transactions, amount_digits = 2).process_data()
+        test = DataProcessor(self.transactions, amount_digits = 2)
+        test.process_data()
+        
+    #act
+        results = test.merge_results(partial_results)
+        
+    #assert
+        self.assertEqual(Decimal("-33000.00"), results["account_summaries"]["1003"]["balance"])
+
+    #tests that a batch built with another amount type is refused
+    def test_fixed_point_batch_mismatch(self):
+        self.setUp()
+        
+    #arrange
+        batch = TransactionBatch.from_transactions(self.transactions)
+        test = DataProcessor([], amount_digits = 2)
+        
+    #act and assert
+        with self.assertRaises(ValueError):
+            test.process_batch(batch)
     
 if __name__ == "__main__":
     unittest.main()
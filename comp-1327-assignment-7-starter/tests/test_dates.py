@@ -0,0 +1,47 @@
+"""Unit tests for the date parser of the transaction package
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1"
+
+import unittest
+from unittest import TestCase
+from transaction.dates import parse_timestamp
+
+
+class ParseTimestampTests(TestCase):
+    """Defines the unit tests for the parse_timestamp function."""
+
+    def test_date_is_midnight_utc(self):
+        # Act
+        actual = parse_timestamp("2023-03-01")
+
+        # Assert
+        self.assertEqual(1677628800.0, actual)
+
+    def test_date_and_time(self):
+        # Act
+        actual = parse_timestamp("2023-03-01T06:30:00") - parse_timestamp("2023-03-01")
+
+        # Assert
+        self.assertEqual(6.5 * 3600, actual)
+
+    def test_repeated_dates_are_cached(self):
+        # Arrange
+        parse_timestamp.cache_clear()
+
+        # Act
+        for _ in range(3):
+            parse_timestamp("2023-03-02")
+
+        # Assert
+        self.assertEqual(2, parse_timestamp.cache_info().hits)
+
+    def test_invalid_date_raises_value_error(self):
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            parse_timestamp("03/01/2023")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+"""Unit tests for the FxRateTable class
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import csv
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest import TestCase
+from data_processor.data_processor import DataProcessor
+from data_processor.fx_rates import FxRateTable
+from data_processor.rules import SuspiciousTransactionRules
+from data_processor.transaction_batch import TransactionBatch
+from input_handler.input_handler import InputHandler
+from metrics.pipeline_metrics import PipelineMetrics
+
+class TestFxRateTable(TestCase):
+    """Defines the unit tests for the FxRateTable class."""
+
+    def setUp(self):
+        self.fx_rates = FxRateTable("CAD", [
+            ("EUR", "2023-03-01", "1.5"),
+            ("EUR", "2023-03-10", "1.25"),
+            ("USD", "2023-03-01", "1.35")
+        ])
+        self.transactions = [
+            {
+                "Transaction ID": str(index),
+                "Account number": "1001",
+                "Date": date,
+                "Transaction type": "deposit",
+                "Amount": amount,
+                "Currency": currency,
+                "Description": "Salary"
+            }
+            for index, (date, amount, currency) in enumerate([
+                ("2023-03-02", "100", "CAD"),
+                ("2023-03-02", "100", "EUR"),
+                ("2023-03-12T09:30:00", "100", "EUR"),
+                ("2023-03-05", "8000", "USD"),
+                ("2023-03-05", "9000", "CAD")
+            ])
+        ]
+
+    #tests that the rate of a date is the last one on or before it, and the first rate is used before it
+    def test_rate_by_date(self):
+    #act and assert
+        self.assertEqual(Decimal("1.5"), self.fx_rates.rate("EUR", "2023-02-01"))
+        self.assertEqual(Decimal("1.5"), self.fx_rates.rate("EUR", "2023-03-09"))
+        self.assertEqual(Decimal("1.25"), self.fx_rates.rate("EUR", "2023-03-10T23:00:00"))
+        self.assertEqual(Decimal("1.25"), self.fx_rates.rate("EUR"))
+        self.assertEqual(Decimal(1), self.fx_rates.rate("CAD", "2023-03-01"))
+        self.assertTrue(self.fx_rates.is_dated)
+
+    #tests that unknown currencies and invalid rates raise ValueError
+    def test_invalid_rates(self):
+    #act and assert
+        with self.assertRaises(ValueError):
+            self.fx_rates.convert(10.0, "XRP", "2023-03-01")
+        with self.assertRaises(ValueError):
+            self.fx_rates.add_rate("EUR", "2023-03-01", "-1")
+        with self.assertRaises(ValueError):
+            self.fx_rates.add_rate("EUR", "2023-03-01", "abc")
+
+    #tests that NaN, infinite, zero and negative rates raise ValueError
+    def test_non_finite_and_non_positive_rates(self):
+    #act and assert
+        for rate in ("NaN", "nan", "sNaN", "inf", "-Infinity", "0", "-1",
+                     float("nan"), float("inf"), 0):
+            with self.subTest(rate=rate):
+                with self.assertRaises(ValueError):
+                    self.fx_rates.add_rate("EUR", "2023-03-01", rate)
+
+    #tests that float amounts are multiplied and minor units are rounded half to even
+    def test_convert(self):
+    #act and assert
+        self.assertEqual(150.0, self.fx_rates.convert(100.0, "EUR", "2023-03-02"))
+        self.assertEqual(25.0, self.fx_rates.convert(25.0, "CAD", "2023-03-02"))
+        self.assertEqual(2, self.fx_rates.convert(1, "EUR", "2023-03-02"))
+        self.assertEqual(1, self.fx_rates.convert(1, "EUR", "2023-03-10"))
+
+    #tests that a replaced rate is used by later lookups instead of the cached one
+    def test_add_rate_clears_cache(self):
+    #arrange
+        self.fx_rates.rate("USD", "2023-03-05")
+
+    #act
+        self.fx_rates.add_rate("USD", "2023-03-01", "1.4")
+
+    #assert
+        self.assertEqual(Decimal("1.4"), self.fx_rates.rate("USD", "2023-03-05"))
+
+    #tests that the rates are loaded from a CSV file and a missing column raises ValueError
+    def test_from_csv(self):
+    #arrange
+        directory = tempfile.mkdtemp()
+        file_path = os.path.join(directory, "fx_rates.csv")
+        with open(file_path, "w") as rates_file:
+            rates_file.write("Currency,Date,Rate\nEUR,2023-03-01,1.5\nUSD,2023-03-01,1.35\n")
+        bad_file_path = os.path.join(directory, "bad_rates.csv")
+        with open(bad_file_path, "w") as rates_file:
+            rates_file.write("Currency,Rate\nEUR,1.5\n")
+
+    #act
+        fx_rates = FxRateTable.from_csv(file_path, "CAD")
+
+    #assert
+        self.assertEqual(["EUR", "USD"], fx_rates.currencies)
+        self.assertFalse(fx_rates.is_dated)
+        self.assertEqual({"reporting_currency": "CAD", "rates": {"EUR": [["2023-03-01", "1.5"]],
+                                                                 "USD": [["2023-03-01", "1.35"]]}},
+                         fx_rates.to_dict())
+        with self.assertRaises(ValueError):
+            FxRateTable.from_csv(bad_file_path, "CAD")
+
+    #tests that the batch amounts are converted and its rows keep their original amounts
+    def test_normalized_batch(self):
+    #arrange
+        batch = TransactionBatch.from_transactions(self.transactions)
+
+    #act
+        normalized = batch.normalized(self.fx_rates)
+
+    #assert
+        self.assertEqual([100.0, 150.0, 125.0, 10800.0, 9000.0], list(normalized.amounts))
+        self.assertEqual([100.0, 100.0, 100.0, 8000.0, 9000.0], list(batch.amounts))
+        self.assertEqual(self.transactions, normalized.rows(range(len(normalized))))
+
+    #tests that every processing mode sums and flags the converted amounts
+    def test_data_processor_modes_agree(self):
+    #arrange
+        rules = SuspiciousTransactionRules(threshold = 10000)
+        modes = {
+            "process_data": lambda processor: processor.process_data(),
+            "process_fused": lambda processor: processor.process_fused(self.transactions),
+            "process_columnar": lambda processor: processor.process_columnar()
+        }
+
+        for amount_digits in (None, 2):
+            for mode, process in modes.items():
+                with self.subTest(mode = mode, amount_digits = amount_digits):
+                    test = DataProcessor(self.transactions, rules = rules, amount_digits = amount_digits,
+                                         fx_rates = self.fx_rates)
+
+    #act
+                    results = process(test)
+
+    #assert
+                    self.assertEqual(20175, results["account_summaries"]["1001"]["balance"])
+                    self.assertEqual(["3"], [transaction["Transaction ID"]
+                                             for transaction in results["suspicious_transactions"]])
+                    self.assertEqual("8000", results["suspicious_transactions"][0]["Amount"])
+
+    #tests that every processing mode skips the rows whose currency has no rate and counts them the same way
+    def test_modes_reject_unknown_currency(self):
+    #arrange
+        transactions = self.transactions + [dict(self.transactions[0], **{"Transaction ID": "5", "Currency": "XRP"})]
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        file_path = os.path.join(directory.name, "input.csv")
+        with open(file_path, "w", newline = "") as input_file:
+            writer = csv.DictWriter(input_file, fieldnames = list(transactions[0]))
+            writer.writeheader()
+            writer.writerows(transactions)
+        modes = {
+            "process_data": lambda processor: processor.process_data(),
+            "process_fused": lambda processor: processor.process_fused(transactions),
+            "process_scanned": lambda processor: processor.process_scanned(
+                InputHandler(file_path).get_mmap_scanner(processor.amount_digits)),
+            "process_columnar": lambda processor: processor.process_columnar()
+        }
+
+        for amount_digits in (None, 2):
+            for mode, process in modes.items():
+                with self.subTest(mode = mode, amount_digits = amount_digits):
+                    metrics = PipelineMetrics()
+                    test = DataProcessor(transactions, amount_digits = amount_digits, fx_rates = self.fx_rates,
+                                         metrics = metrics)
+
+    #act
+                    results = process(test)
+
+    #assert
+                    self.assertEqual(5, results["transaction_statistics"]["deposit"]["transaction_count"])
+                    self.assertEqual(20175, results["account_summaries"]["1001"]["balance"])
+                    self.assertEqual({"no_fx_rate": 1}, metrics.rejection_reasons)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -203,6 +203,71 @@ class InputHandlerTests(unittest.TestCase):
         self.assertEqual(valid_transactions[0]['amount'], 100)
         self.assertEqual(valid_transactions[0]['transaction Type'], 'deposit')
 
+# Streaming input
+    @patch("builtins.open", new_callable=mock_open, read_data="Account number,Transaction type,Amount\n1001,deposit,100.00\n1002,refund,50\n1003,withdrawal,abc\n")
+    @patch("os.path.isfile", return_value=True)
+    def test_iter_input_data_yields_only_valid_rows(self, mock_isfile, mock_file):
+        """Test that iter_input_data streams the valid CSV rows and skips invalid ones."""
+        # Arrange
+        input_handler = InputHandler("test.csv")
+        expected = [
+            {"Account number": "1001", "Transaction type": "deposit", "Amount": "100.00"}
+        ]
+
+        # Act
+        actual = list(input_handler.iter_input_data())
+
+        # Assert
+        self.assertEqual(actual, expected)
+
+    @patch("builtins.open", new_callable=mock_open, read_data="Account number,Transaction type,Amount\n1001,deposit,100.00\n")
+    @patch("os.path.isfile", return_value=True)
+    def test_iter_input_data_is_lazy(self, mock_isfile, mock_file):
+        """Test that iter_input_data does not open the file until it is iterated."""
+        # Arrange
+        input_handler = InputHandler("test.csv")
+
+        # Act
+        rows = input_handler.iter_input_data()
+
+        # Assert
+        mock_file.assert_not_called()
+        self.assertEqual(next(rows)["Account number"], "1001")
+        mock_file.assert_called_once_with("test.csv", "r")
+
+    @patch("builtins.open", new_callable=mock_open, read_data='{"Account number": "1001", "Transaction type": "deposit", "Amount": "100.00"}\n{"Account number": "1002", "Transaction type": "deposit", "Amount": "-5"}\n')
+    @patch("os.path.isfile", return_value=True)
+    def test_read_input_data_json_lines(self, mock_isfile, mock_file):
+        """Test that .ndjson files are read one transaction per line and validated."""
+        # Arrange
+        input_handler = InputHandler("test.ndjson")
+        expected = [
+            {"Account number": "1001", "Transaction type": "deposit", "Amount": "100.00"}
+        ]
+
+        # Act
+        actual = input_handler.read_input_data()
+
+        # Assert
+        self.assertEqual(actual, expected)
+        mock_file.assert_called_once_with("test.ndjson", "r")
+
+    def test_is_valid_transaction_rejects_unhashable_type(self):
+        """Test that JSON rows with a list or object transaction type are rejected instead of raising."""
+        # Arrange
+        rows = [
+            {"Transaction type": ["deposit"], "Amount": "100"},
+            {"Transaction type": {"type": "deposit"}, "Amount": "100"}
+        ]
+
+        # Act
+        valid = [self.input_handler.is_valid_transaction(row) for row in rows]
+        reasons = [InputHandler.rejection_reason(row) for row in rows]
+
+        # Assert
+        self.assertEqual(valid, [False, False])
+        self.assertEqual(reasons, ["invalid_transaction_type"] * 2)
+
 
         
             
@@ -0,0 +1,127 @@
+"""Unit tests for the incremental JSON readers in input_handler.json_stream
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1"
+
+import io
+import json
+import unittest
+from unittest import TestCase
+from input_handler.json_stream import iter_json_array, iter_json_lines
+
+
+class JsonStreamTests(TestCase):
+    """Defines the unit tests for the incremental JSON readers."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function."""
+        self.transactions = [
+            {"Transaction ID": 1, "Account number": 1001, "Transaction type": "deposit",
+             "Amount": 1200, "Description": "Salary, [bonus]"},
+            {"Transaction ID": 2, "Account number": 1002, "Transaction type": "withdrawal",
+             "Amount": 10.5, "Description": "Café"},
+        ]
+
+    def test_iter_json_array_small_chunks(self):
+        """Test that items split across chunk boundaries are decoded correctly."""
+        # Arrange
+        input_file = io.StringIO(json.dumps(self.transactions, indent=2))
+
+        # Act
+        actual = list(iter_json_array(input_file, chunk_size=3))
+
+        # Assert
+        self.assertEqual(actual, self.transactions)
+
+    def test_iter_json_array_numbers_not_truncated(self):
+        """Test that a number at the end of a chunk is not cut short."""
+        # Arrange
+        input_file = io.StringIO("[12345, 678]")
+
+        # Act
+        actual = list(iter_json_array(input_file, chunk_size=4))
+
+        # Assert
+        self.assertEqual(actual, [12345, 678])
+
+    def test_iter_json_array_top_level_values_any_chunk_size(self):
+        """Test that top-level numbers and literals split at any chunk boundary are decoded whole."""
+        # Arrange
+        text = '[1, 23 ,4.5e1, "x", null, -0.25, true]'
+        expected = [1, 23, 45.0, "x", None, -0.25, True]
+
+        for chunk_size in range(1, len(text) + 1):
+            with self.subTest(chunk_size=chunk_size):
+                # Act
+                actual = list(iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+
+                # Assert
+                self.assertEqual(actual, expected)
+
+    def test_iter_json_array_empty(self):
+        """Test that an empty array yields nothing."""
+        # Arrange
+        input_file = io.StringIO("  [ ]  ")
+
+        # Act
+        actual = list(iter_json_array(input_file))
+
+        # Assert
+        self.assertEqual(actual, [])
+
+    def test_iter_json_array_not_an_array(self):
+        """Test that a non-array document raises a JSONDecodeError."""
+        # Arrange
+        input_file = io.StringIO('{"Amount": 1}')
+
+        # Act & Assert
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array(input_file))
+
+    def test_iter_json_array_malformed(self):
+        """Test that a truncated array raises a JSONDecodeError."""
+        # Arrange
+        input_file = io.StringIO('[{"Amount": 1}, {"Amount": ')
+
+        # Act & Assert
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array(input_file, chunk_size=5))
+
+    def test_iter_json_array_malformed_item_raises_early(self):
+        """Test that a malformed item raises without reading the rest of the file."""
+        # Arrange
+        text = '[{"Amount": 1}, {"Amount" 2}, ' + ", ".join(['{"Amount": 3}'] * 100000) + "]"
+        input_file = io.StringIO(text)
+
+        # Act
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array(input_file, chunk_size=64))
+
+        # Assert
+        self.assertLess(input_file.tell(), 1000)
+
+    def test_iter_json_array_item_too_large(self):
+        """Test that an item longer than max_item_size raises."""
+        # Arrange
+        input_file = io.StringIO('[{"Description": "' + "x" * 10000 + '"}]')
+
+        # Act & Assert
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array(input_file, chunk_size=64, max_item_size=1000))
+
+    def test_iter_json_lines(self):
+        """Test that each non-blank line is decoded as one item."""
+        # Arrange
+        input_file = io.StringIO("\n".join(json.dumps(t) for t in self.transactions) + "\n\n")
+
+        # Act
+        actual = list(iter_json_lines(input_file))
+
+        # Assert
+        self.assertEqual(actual, self.transactions)
+
+
+if __name__ == "__main__":
+    unittest.main()
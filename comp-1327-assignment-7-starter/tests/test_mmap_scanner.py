@@ -0,0 +1,99 @@
+"""Unit tests for the MmapCsvScanner class
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1"
+
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from data_processor.data_processor import DataProcessor
+from input_handler.input_handler import InputHandler
+from input_handler.mmap_scanner import MmapCsvScanner
+
+
+class MmapCsvScannerTests(TestCase):
+    """Defines the unit tests for the MmapCsvScanner class."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function.
+
+        Writes a CSV file with CRLF line endings, a quoted description
+        and a few invalid rows.
+        """
+        lines = [
+            "Transaction ID,Account number,Date,Transaction type,Amount,Currency,Description",
+            "1,1001,2023-03-01,deposit,1000,CAD,Salary",
+            '2,1002,2023-03-01,withdrawal,12000.50,CAD,"House, down payment"',
+            "3,1001,2023-03-02,refund,20,CAD,Invalid type",
+            "4,1001,2023-03-02,deposit,abc,CAD,Invalid amount",
+            "",
+            "5,1003,2023-03-03,transfer,250,XRP,Crypto",
+            "6,1001,2023-03-03,withdrawal,-5,CAD,Negative",
+        ]
+        handle, self.file_path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "wb") as output_file:
+            output_file.write("\r\n".join(lines).encode("utf-8"))
+        self.input_handler = InputHandler(self.file_path)
+
+    def tearDown(self):
+        """Removes the CSV file written by setUp."""
+        os.remove(self.file_path)
+
+    def test_scan_decodes_needed_columns(self):
+        """Test that scan yields the aggregation columns of the valid rows only."""
+        # Arrange
+        scanner = self.input_handler.get_mmap_scanner()
+
+        # Act
+        actual = [row[:4] for row in scanner.scan()]
+
+        # Assert
+        self.assertEqual(actual, [("1001", "deposit", 1000.0, "CAD"),
+                                  ("1002", "withdrawal", 12000.5, "CAD"),
+                                  ("1003", "transfer", 250.0, "XRP")])
+        self.assertEqual(scanner.rejected_count, 3)
+
+    def test_process_scanned_matches_process_data(self):
+        """Test that the memory-mapped mode produces the same results as reading with the csv module."""
+        # Arrange
+        expected = DataProcessor(self.input_handler.read_csv_data()).process_data()
+
+        # Act
+        actual = DataProcessor([]).process_scanned(self.input_handler.get_mmap_scanner())
+
+        # Assert
+        self.assertEqual(actual, expected)
+
+    def test_short_rows_match_csv_reader(self):
+        """Test that rows with fewer fields than the header are read like the csv module reads them."""
+        # Arrange
+        with open(self.file_path, "wb") as output_file:
+            output_file.write(b"Transaction ID,Account number,Date,Transaction type,Amount,Currency,Description\n"
+                              b"1,1001,2023-03-01,deposit,1000,CAD\n"
+                              b"2,1002,2023-03-01,deposit,20000\n"
+                              b"3,1003,2023-03-01,deposit\n"
+                              b"4,1004,2023-03-01,withdrawal,5,CAD,No newline")
+        expected = DataProcessor(self.input_handler.read_csv_data()).process_data()
+
+        # Act
+        actual = DataProcessor([]).process_scanned(self.input_handler.get_mmap_scanner())
+
+        # Assert
+        self.assertEqual(actual, expected)
+        self.assertEqual(actual["suspicious_transactions"][0]["Description"], None)
+
+    def test_file_not_found(self):
+        """Test that scanning a missing file raises a FileNotFoundError."""
+        # Arrange
+        scanner = InputHandler("non_existent_file.csv").get_mmap_scanner()
+
+        # Act & Assert
+        with self.assertRaises(FileNotFoundError):
+            list(scanner.scan())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Unit tests for the MultiFileProcessor class
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from data_processor.data_processor import DataProcessor
+from data_processor.multi_file import MultiFileProcessor
+from data_processor.rules import SuspiciousTransactionRules
+from input_handler.input_handler import InputHandler
+
+class TestMultiFileProcessor(TestCase):
+    """Defines the unit tests for the MultiFileProcessor class."""
+
+    HEADER = "Transaction ID,Account number,Date,Transaction type,Amount,Currency,Description\n"
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function.
+        
+        Writes three branch files (two CSV, one JSON Lines) and a file in an unsupported format.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.write("branch_a.csv", self.HEADER + "1,1001,2023-03-01,deposit,1000,CAD,Salary\n"
+                   + "2,1002,2023-03-01,deposit,12000,CAD,Car Sale\n")
+        self.write("branch_b.csv", self.HEADER + "3,1001,2023-03-02,withdrawal,200,CAD,Groceries\n"
+                   + "4,1003,2023-03-02,refund,50,CAD,Invalid type\n")
+        self.write("branch_c.jsonl", '{"Transaction ID": "5", "Account number": "1003", "Date": "2023-03-02", '
+                   + '"Transaction type": "deposit", "Amount": "50", "Currency": "XRP", "Description": "Crypto"}\n')
+        self.write("notes.txt", "not an input file\n")
+        self.pattern = os.path.join(self.directory.name, "*")
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        self.directory.cleanup()
+
+    def write(self, filename: str, text: str) -> None:
+        """Writes a file into the temporary directory."""
+        with open(os.path.join(self.directory.name, filename), "w") as input_file:
+            input_file.write(text)
+
+    def expected_results(self) -> dict:
+        """Processes the files one after another with a single DataProcessor."""
+        test = DataProcessor([])
+        for filename in ["branch_a.csv", "branch_b.csv", "branch_c.jsonl"]:
+            results = test.process_transactions(InputHandler(os.path.join(self.directory.name, filename)).iter_input_data())
+        return results
+
+    #tests that the glob keeps the supported files, sorted by path
+    def test_from_glob(self):
+    #act
+        actual = MultiFileProcessor.from_glob(self.pattern).file_paths
+        
+    #assert
+        self.assertEqual(["branch_a.csv", "branch_b.csv", "branch_c.jsonl"], [os.path.basename(path) for path in actual])
+
+    #tests that a pattern matching nothing raises FileNotFoundError
+    def test_from_glob_no_match(self):
+    #act and assert
+        with self.assertRaises(FileNotFoundError):
+            MultiFileProcessor.from_glob(os.path.join(self.directory.name, "*.xml"))
+
+    #tests that processing the files on worker processes matches processing them one after another
+    def test_processes_match_serial(self):
+    #arrange
+        expected = self.expected_results()
+        
+    #act
+        actual = MultiFileProcessor.from_glob(self.pattern, workers = 2).process_data(DataProcessor([]))
+        
+    #assert
+        self.assertEqual(expected, actual)
+
+    #tests that reading the files on threads matches processing them one after another
+    def test_threads_match_serial(self):
+    #arrange
+        expected = self.expected_results()
+        processor = MultiFileProcessor.from_glob(self.pattern, workers = 2, use_processes = False)
+        
+    #act
+        actual = asyncio.run(processor.process_data_async(DataProcessor([])))
+        
+    #assert
+        self.assertEqual(expected, actual)
+
+    #tests that order dependent rules see the transactions of every file, in file order
+    def test_velocity_rules_use_threads(self):
+    #arrange
+        rules = SuspiciousTransactionRules(threshold = 1000000, velocity_windows = [{"window_hours": 48, "max_count": 1}])
+        
+    #act
+        actual = MultiFileProcessor.from_glob(self.pattern).process_data(DataProcessor([], rules = rules))
+        
+    #assert
+        self.assertEqual(["3"], [transaction["Transaction ID"] for transaction in actual["suspicious_transactions"]])
+    
+if __name__ == "__main__":
+    unittest.main()
@@ -4,8 +4,17 @@
 __author__ = "Beerdavinder Singh"
 __version__ = "3.12"
 
+import bz2
+import gzip
+import json
+import lzma
+import os
+import tempfile
+from decimal import Decimal
 from unittest import TestCase, main
 from unittest.mock import patch, mock_open
+from input_handler.compressed import COMPRESSION_SUFFIXES
+from input_handler.input_handler import InputHandler
 from output_handler.output_handler import OutputHandler
 
 class TestOutputHandler(TestCase):
@@ -110,5 +119,102 @@ class TestOutputHandler(TestCase):
         handle.write.assert_any_call('deposit,300,2\n')
         handle.write.assert_any_call('withdrawal,50,1\n')
 
+    def test_bulk_writers_match_row_writers(self):
+        output_handler = OutputHandler(self.account_summaries, self.suspicious_transactions, self.transaction_statistics)
+        with tempfile.TemporaryDirectory() as directory:
+            names = ["summaries.csv", "suspicious.csv", "statistics.csv"]
+            expected_paths = [os.path.join(directory, "expected_" + name) for name in names]
+            actual_paths = [os.path.join(directory, "actual_" + name) for name in names]
+            output_handler.write_account_summaries_to_csv(expected_paths[0])
+            output_handler.write_suspicious_transactions_to_csv(expected_paths[1])
+            output_handler.write_transaction_statistics_to_csv(expected_paths[2])
+
+            output_handler.write_all_to_csv(*actual_paths)
+
+            for expected_path, actual_path in zip(expected_paths, actual_paths):
+                with open(expected_path) as expected_file, open(actual_path) as actual_file:
+                    self.assertEqual(expected_file.read(), actual_file.read())
+
+    def test_bulk_writer_writes_rows_in_chunks(self):
+        output_handler = OutputHandler(self.account_summaries, self.suspicious_transactions * 5, self.transaction_statistics)
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(OutputHandler, "BULK_CHUNK_SIZE", 2):
+            file_path = os.path.join(directory, "suspicious.csv")
+            output_handler.write_suspicious_transactions_bulk(file_path)
+
+            with open(file_path, newline='') as output_file:
+                lines = output_file.read().splitlines()
+        self.assertEqual(6, len(lines))
+        self.assertEqual('1,1001,2023-03-14,deposit,250,XRP,crypto investment', lines[-1])
+
+    def test_write_all_to_csv_raises_writer_errors(self):
+        output_handler = OutputHandler(self.account_summaries, self.suspicious_transactions, self.transaction_statistics)
+        with tempfile.TemporaryDirectory() as directory:
+            missing_directory = os.path.join(directory, "missing")
+            with self.assertRaises(OSError):
+                output_handler.write_all_to_csv(os.path.join(directory, "summaries.csv"),
+                                                os.path.join(missing_directory, "suspicious.csv"),
+                                                os.path.join(directory, "statistics.csv"))
+
+    def test_write_all_to_json_round_trips(self):
+        output_handler = OutputHandler(self.account_summaries, self.suspicious_transactions, self.transaction_statistics)
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, name) for name in
+                     ["summaries.json", "suspicious.json.gz", "statistics.json.bz2"]]
+            output_handler.write_all_to_json(*paths)
+
+            with open(paths[0]) as summaries_file, gzip.open(paths[1], "rt") as suspicious_file, \
+                    bz2.open(paths[2], "rt") as statistics_file:
+                summaries = json.load(summaries_file)
+                suspicious = json.load(suspicious_file)
+                statistics = json.load(statistics_file)
+        self.assertEqual(list(self.account_summaries.values()), summaries)
+        self.assertEqual(self.suspicious_transactions, suspicious)
+        self.assertEqual([dict(statistic, transaction_type=transaction_type)
+                          for transaction_type, statistic in self.transaction_statistics.items()], statistics)
+
+    def test_write_to_ndjson_in_chunks(self):
+        output_handler = OutputHandler(self.account_summaries, self.suspicious_transactions * 5, self.transaction_statistics)
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(OutputHandler, "BULK_CHUNK_SIZE", 2):
+            file_path = os.path.join(directory, "suspicious.ndjson")
+            output_handler.write_suspicious_transactions_to_json(file_path, lines=True, compression="xz")
+
+            with lzma.open(file_path, "rt") as output_file:
+                lines = output_file.read().splitlines()
+        self.assertEqual(5, len(lines))
+        self.assertEqual(self.suspicious_transactions[0], json.loads(lines[-1]))
+
+    def test_compression_suffixes_match_input_handler(self):
+        output_handler = OutputHandler({}, self.suspicious_transactions, {})
+        with tempfile.TemporaryDirectory() as directory:
+            for suffix in COMPRESSION_SUFFIXES:
+                file_path = os.path.join(directory, "suspicious.json." + suffix)
+                output_handler.write_suspicious_transactions_to_json(file_path)
+
+                input_handler = InputHandler(file_path)
+                self.assertEqual(COMPRESSION_SUFFIXES[suffix], input_handler.get_compression())
+                self.assertEqual(self.suspicious_transactions, input_handler.read_input_data())
+
+    def test_write_decimal_amounts_to_json_exactly(self):
+        statistics = {'deposit': {'total_amount': Decimal('90071992547409.93'), 'transaction_count': 2}}
+        output_handler = OutputHandler({}, [], statistics)
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "statistics.json")
+            output_handler.write_transaction_statistics_to_json(file_path)
+            with open(file_path) as output_file:
+                actual = json.load(output_file)
+        self.assertEqual('90071992547409.93', actual[0]['total_amount'])
+
+    def test_write_empty_json_and_unknown_compression(self):
+        output_handler = OutputHandler({}, [], {})
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "statistics.json")
+            output_handler.write_transaction_statistics_to_json(file_path)
+            with open(file_path) as output_file:
+                self.assertEqual([], json.load(output_file))
+            with self.assertRaises(ValueError):
+                output_handler.write_transaction_statistics_to_json(file_path, compression="zip")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
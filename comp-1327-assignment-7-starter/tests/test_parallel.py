@@ -0,0 +1,74 @@
+"""Unit tests for the ParallelProcessor class
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from data_processor.data_processor import DataProcessor
+from data_processor.parallel import ParallelProcessor
+from input_handler.input_handler import InputHandler
+
+class TestParallelProcessor(TestCase):
+    """Defines the unit tests for the ParallelProcessor class."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function.
+        
+        Writes a CSV file with 200 transactions spread over 7 accounts, every 10th one is suspicious.
+        """
+        lines = ["Transaction ID,Account number,Date,Transaction type,Amount,Currency,Description"]
+        transaction_types = ["deposit", "withdrawal", "transfer", "refund"]
+        for index in range(200):
+            amount = 20000 if index % 10 == 0 else index * 3
+            lines.append(f"{index},{1000 + index % 7},2023-03-01,{transaction_types[index % 4]},{amount},CAD,Row {index}")
+        
+        handle, self.file_path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w") as output_file:
+            output_file.write("\n".join(lines) + "\n")
+
+    def tearDown(self):
+        """Removes the CSV file written by setUp."""
+        os.remove(self.file_path)
+
+    #tests that the byte ranges cover every line after the header exactly once
+    def test_csv_byte_ranges_cover_file(self):
+    #arrange
+        input_handler = InputHandler(self.file_path)
+        expected = input_handler.read_csv_data()
+        
+    #act
+        ranges = input_handler.get_csv_byte_ranges(9)
+        actual = [row for start, end in ranges for row in input_handler.iter_csv_range(start, end)]
+        
+    #assert
+        self.assertGreater(len(ranges), 1)
+        self.assertEqual(expected, actual)
+
+    #tests that the parallel results match a serial run
+    def test_parallel_matches_serial(self):
+    #arrange
+        expected = DataProcessor(InputHandler(self.file_path).read_csv_data()).process_data()
+        
+    #act
+        actual = ParallelProcessor(self.file_path, workers=2).process_data(DataProcessor([]))
+        
+    #assert
+        self.assertEqual(expected, actual)
+        self.assertEqual(list(expected["account_summaries"]), list(actual["account_summaries"]))
+
+    #tests that only csv files can be processed in parallel
+    def test_parallel_rejects_json(self):
+    #arrange
+        test = ParallelProcessor("input_data.json", workers=2)
+        
+    #act & assert
+        with self.assertRaises(ValueError):
+            test.process_data(DataProcessor([]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Unit tests for the ParsedInputCache class
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1"
+
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from unittest.mock import patch
+from data_processor.data_processor import DataProcessor
+from input_handler.input_handler import InputHandler
+from input_handler.parsed_cache import ParsedInputCache
+
+
+class ParsedInputCacheTests(TestCase):
+    """Defines the unit tests for the ParsedInputCache class."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function.
+
+        Writes a small CSV file with one invalid row into a temporary
+        directory that also holds the cache.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "input.csv")
+        with open(self.file_path, "w") as input_file:
+            input_file.write("Transaction ID,Account number,Date,Transaction type,Amount,Currency,Description\n"
+                             "1,1001,2023-03-01,deposit,1000,CAD,Salary\n"
+                             "2,1002,2023-03-01,withdrawal,12000,CAD,House\n"
+                             "3,1001,2023-03-02,refund,20,CAD,Invalid type\n")
+        self.cache = ParsedInputCache(os.path.join(self.directory.name, "cache"))
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        self.directory.cleanup()
+
+    def test_load_or_build_matches_input_handler(self):
+        # Arrange
+        expected = DataProcessor(InputHandler(self.file_path).read_input_data()).process_data()
+
+        # Act
+        actual = DataProcessor([]).process_batch(self.cache.load_or_build(self.file_path))
+
+        # Assert
+        self.assertEqual(expected, actual)
+
+    def test_second_load_does_not_parse_the_file(self):
+        # Arrange
+        expected = self.cache.load_or_build(self.file_path).account_summaries()
+
+        # Act
+        with patch.object(InputHandler, "iter_input_data") as mock_iter_input_data:
+            actual = self.cache.load_or_build(self.file_path).account_summaries()
+
+        # Assert
+        mock_iter_input_data.assert_not_called()
+        self.assertEqual(expected, actual)
+
+    def test_modified_file_is_parsed_again(self):
+        # Arrange
+        self.cache.load_or_build(self.file_path)
+        with open(self.file_path, "a") as input_file:
+            input_file.write("4,1003,2023-03-03,deposit,50,CAD,Gift\n")
+
+        # Act
+        batch = self.cache.load_or_build(self.file_path)
+
+        # Assert
+        self.assertEqual(3, len(batch))
+
+    def test_modified_file_prunes_the_old_entry(self):
+        # Arrange
+        old_entry_path = self.cache.get_entry_path(self.file_path)
+        self.cache.load_or_build(self.file_path)
+        with open(self.file_path, "a") as input_file:
+            input_file.write("4,1003,2023-03-03,deposit,50,CAD,Gift\n")
+        os.utime(self.file_path, ns=(0, os.stat(self.file_path).st_mtime_ns + 1))
+
+        # Act
+        self.cache.load_or_build(self.file_path)
+
+        # Assert
+        self.assertFalse(os.path.exists(old_entry_path))
+        self.assertEqual([os.path.basename(self.cache.get_entry_path(self.file_path))],
+                         os.listdir(self.cache.cache_directory))
+
+    def test_load_without_entry_returns_none(self):
+        # Act
+        actual = self.cache.load(self.file_path)
+
+        # Assert
+        self.assertIsNone(actual)
+
+    def test_clear_removes_entries(self):
+        # Arrange
+        self.cache.load_or_build(self.file_path)
+
+        # Act
+        self.cache.clear()
+
+        # Assert
+        self.assertIsNone(self.cache.load(self.file_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+"""Unit tests for the PipelineMetrics class
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1"
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from data_processor.data_processor import DataProcessor
+from data_processor.multi_file import MultiFileProcessor
+from input_handler.input_handler import InputHandler
+from input_handler.parsed_cache import ParsedInputCache
+from metrics.pipeline_metrics import PipelineMetrics
+
+
+class PipelineMetricsTests(TestCase):
+    """Defines the unit tests for the PipelineMetrics class."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function."""
+        self.metrics = PipelineMetrics()
+        self.rows = [
+            {"Account number": "1001", "Transaction type": "deposit", "Amount": "100", "Currency": "CAD"},
+            {"Account number": "1001", "Transaction type": "refund", "Amount": "100", "Currency": "CAD"},
+            {"Account number": "1001", "Transaction type": "deposit", "Amount": "-1", "Currency": "CAD"},
+            {"Account number": "1001", "Transaction type": "deposit", "Amount": "abc", "Currency": "CAD"},
+            {"Account number": "1001", "Transaction type": "deposit", "Currency": "CAD"},
+        ]
+        self.expected_reasons = {
+            "invalid_transaction_type": 1,
+            "negative_amount": 1,
+            "non_numeric_amount": 1,
+            "missing_amount": 1,
+        }
+
+    def test_stage_accumulates_time(self):
+        """Test that running a stage twice adds up its wall and CPU time."""
+        # Act
+        with self.metrics.stage("read"):
+            sum(range(10000))
+        with self.metrics.stage("read"):
+            sum(range(10000))
+
+        # Assert
+        self.assertEqual(list(self.metrics.stages), ["read"])
+        self.assertGreater(self.metrics.stages["read"]["wall_seconds"], 0)
+        self.assertGreaterEqual(self.metrics.stages["read"]["cpu_seconds"], 0)
+
+    def test_validate_stream_counts_rejections(self):
+        """Test that InputHandler validation records the rows read and why rows were rejected."""
+        # Arrange
+        input_handler = InputHandler("test.csv", metrics=self.metrics)
+
+        # Act
+        valid = list(input_handler.validate_stream(self.rows))
+
+        # Assert
+        self.assertEqual(len(valid), 1)
+        self.assertEqual(self.metrics.counters["rows_read"], 5)
+        self.assertEqual(self.metrics.counters["rows_rejected"], 4)
+        self.assertEqual(self.metrics.rejection_reasons, self.expected_reasons)
+
+    def test_fused_pipeline_counts(self):
+        """Test that the fused pipeline records read, rejected and processed rows."""
+        # Arrange
+        data_processor = DataProcessor([], metrics=self.metrics)
+
+        # Act
+        data_processor.process_fused(self.rows)
+
+        # Assert
+        self.assertEqual(self.metrics.counters["rows_read"], 5)
+        self.assertEqual(self.metrics.counters["rows_processed"], 1)
+        self.assertEqual(self.metrics.rejection_reasons, self.expected_reasons)
+
+    def write_csv(self, directory: str, name: str) -> str:
+        """Write the rows with a complete header to a CSV file and return its path."""
+        file_path = os.path.join(directory, name)
+        with open(file_path, "w") as csv_file:
+            csv_file.write("Account number,Transaction type,Amount,Currency\n")
+            for row in self.rows:
+                csv_file.write(",".join([row["Account number"], row["Transaction type"],
+                                         row.get("Amount", ""), row["Currency"]]) + "\n")
+        return file_path
+
+    def test_cached_batch_counts(self):
+        """Test that processing a cached batch records the rows read, rejected and processed, on a miss and a hit."""
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            file_path = self.write_csv(directory, "input.csv")
+            cache = ParsedInputCache(os.path.join(directory, "cache"))
+
+            for run in ("miss", "hit"):
+                with self.subTest(run=run):
+                    metrics = PipelineMetrics()
+
+                    # Act
+                    DataProcessor([], metrics=metrics).process_batch(cache.load_or_build(file_path))
+
+                    # Assert
+                    self.assertEqual(metrics.counters["rows_read"], 5)
+                    self.assertEqual(metrics.counters["rows_processed"], 1)
+                    self.assertEqual(metrics.counters["suspicious_transactions"], 0)
+                    # The empty CSV amount is not missing but non numeric
+                    self.assertEqual(metrics.rejection_reasons, {"invalid_transaction_type": 1,
+                                                                 "negative_amount": 1, "non_numeric_amount": 2})
+
+    def test_multi_file_counts(self):
+        """Test that the counters of every file are merged, whether files are processed by processes or threads."""
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            file_paths = [self.write_csv(directory, "a.csv"), self.write_csv(directory, "b.csv")]
+
+            for use_processes in (True, False):
+                with self.subTest(use_processes=use_processes):
+                    metrics = PipelineMetrics()
+
+                    # Act
+                    MultiFileProcessor(file_paths, workers=2, use_processes=use_processes).process_data(
+                        DataProcessor([], metrics=metrics))
+
+                    # Assert
+                    self.assertEqual(metrics.counters["rows_read"], 10)
+                    self.assertEqual(metrics.counters["rows_processed"], 2)
+                    self.assertEqual(metrics.counters["rows_rejected"], 8)
+
+    def test_write_json_and_prometheus(self):
+        """Test that the metrics can be exported as JSON and in the Prometheus text format."""
+        # Arrange
+        self.metrics.increment("rows_read", 3)
+        self.metrics.record_rejection("negative_amount")
+        with self.metrics.stage("write"):
+            pass
+
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = os.path.join(directory, "metrics.json")
+            prometheus_path = os.path.join(directory, "metrics.prom")
+
+            # Act
+            self.metrics.write(json_path)
+            self.metrics.write(prometheus_path)
+
+            # Assert
+            with open(json_path) as json_file:
+                self.assertEqual(json.load(json_file)["counters"], {"rows_read": 3, "rows_rejected": 1})
+            with open(prometheus_path) as prometheus_file:
+                text = prometheus_file.read()
+            self.assertIn("transaction_pipeline_rows_read 3\n", text)
+            self.assertIn('transaction_pipeline_rejections{reason="negative_amount"} 1\n', text)
+            self.assertIn('transaction_pipeline_stage_wall_seconds{stage="write"}', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
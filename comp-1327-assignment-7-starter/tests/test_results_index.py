@@ -0,0 +1,104 @@
+"""Unit tests for the ResultsIndex class
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import unittest
+from unittest import TestCase
+from data_processor.data_processor import DataProcessor
+from data_processor.results_index import ResultsIndex
+
+class TestResultsIndex(TestCase):
+    """Defines the unit tests for the ResultsIndex class."""
+
+    def setUp(self):
+        self.account_summaries = {
+            account_number: {
+                "account_number": account_number,
+                "balance": balance,
+                "total_deposits": max(balance, 0),
+                "total_withdrawals": max(-balance, 0)
+            }
+            for account_number, balance in [("1001", 500), ("1002", -200), ("1003", 1500), ("1004", 500),
+                                            ("1005", 0)]
+        }
+        self.suspicious_transactions = [
+            {"Transaction ID": "1", "Account number": "1001", "Date": "2023-03-02", "Currency": "XRP"},
+            {"Transaction ID": "2", "Account number": "1003", "Date": "2023-03-01", "Currency": "CAD"},
+            {"Transaction ID": "3", "Account number": "1001", "Date": "2023-03-05T10:00:00", "Currency": "CAD"},
+            {"Transaction ID": "4", "Account number": "1002", "Date": "2023-03-03", "Currency": "LTC"}
+        ]
+        self.index = ResultsIndex({
+            "account_summaries": self.account_summaries,
+            "suspicious_transactions": self.suspicious_transactions,
+            "transaction_statistics": {}
+        })
+
+    #tests that accounts are looked up by account number
+    def test_get_account(self):
+    #act and assert
+        self.assertEqual(-200, self.index.get_account("1002")["balance"])
+        self.assertIsNone(self.index.get_account("9999"))
+        self.assertIn("1005", self.index)
+
+    #tests that range queries include both bounds and are sorted by value
+    def test_accounts_between(self):
+    #act
+        actual = self.index.accounts_between("balance", 0, 500)
+        
+    #assert
+        self.assertEqual(["1005", "1001", "1004"], [summary["account_number"] for summary in actual])
+        self.assertEqual(["1003"], [summary["account_number"] for summary in
+                                    self.index.accounts_between("balance", low = 501)])
+
+    #tests that top-N gives the same accounts with and without the sorted index
+    def test_top_accounts(self):
+    #act
+        from_heap = self.index.top_accounts("balance", 3)
+        lowest_from_heap = self.index.top_accounts("balance", 2, largest = False)
+        self.index.accounts_between("balance")
+        from_sorted_index = self.index.top_accounts("balance", 3)
+        
+    #assert
+        self.assertEqual(["1003", "1004", "1001"], [summary["account_number"] for summary in from_heap])
+        self.assertEqual(from_heap, from_sorted_index)
+        self.assertEqual(["1002", "1005"], [summary["account_number"] for summary in lowest_from_heap])
+
+    #tests that an unknown field raises a ValueError
+    def test_unknown_field(self):
+    #act and assert
+        with self.assertRaises(ValueError):
+            self.index.top_accounts("Currency", 1)
+
+    #tests the suspicious transaction filters, alone and combined
+    def test_suspicious_transactions(self):
+    #act
+        by_account = self.index.suspicious_transactions(account_number = "1001")
+        by_currency_and_date = self.index.suspicious_transactions(currency = "CAD", start_date = "2023-03-02")
+        by_dates = self.index.suspicious_transactions(start_date = "2023-03-02", end_date = "2023-03-05")
+        
+    #assert
+        self.assertEqual(["1", "3"], [transaction["Transaction ID"] for transaction in by_account])
+        self.assertEqual(["3"], [transaction["Transaction ID"] for transaction in by_currency_and_date])
+        self.assertEqual(["1", "3", "4"], [transaction["Transaction ID"] for transaction in by_dates])
+        self.assertEqual(4, len(self.index.suspicious_transactions()))
+
+    #tests that a DataProcessor indexes its own results
+    def test_data_processor_get_results_index(self):
+    #arrange
+        test = DataProcessor([
+            {"Transaction ID": "1", "Account number": "1001", "Date": "2023-03-01", "Transaction type": "deposit",
+             "Amount": "15000", "Currency": "CAD", "Description": "Salary"}
+        ])
+        test.process_data()
+        
+    #act
+        index = test.get_results_index()
+        
+    #assert
+        self.assertEqual(15000, index.top_accounts("total_deposits", 1)[0]["balance"])
+        self.assertEqual(1, len(index.suspicious_transactions(account_number = "1001")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,213 @@
+"""Unit tests for the SuspiciousTransactionRules class
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import json
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from unittest import TestCase
+from data_processor.data_processor import DataProcessor
+from data_processor.parallel import ParallelProcessor
+from data_processor.rules import CompiledRules, SuspiciousTransactionRules
+from input_handler.input_handler import InputHandler
+
+class TestSuspiciousTransactionRules(TestCase):
+    """Defines the unit tests for the SuspiciousTransactionRules class."""
+
+    HEADER = "Transaction ID,Account number,Date,Transaction type,Amount,Currency,Description\n"
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function.
+        
+        Writes a CSV file in which each rule flags a different transaction.
+        """
+        rows = [
+            "1,1001,2023-03-01,deposit,1000,CAD,Salary\n",
+            "2,1001,2023-03-01,deposit,12000,CAD,Car Sale\n",
+            "3,1002,2023-03-01,deposit,900000,JPY,Bonus\n",
+            "4,1002,2023-03-01,deposit,2000000,JPY,Bonus\n",
+            "5,1003,2023-03-01,withdrawal,6000,CAD,Rent\n",
+            "6,1004,2023-03-02,deposit,10,BTC,Mining\n",
+            "7,1005,2023-03-02,transfer,40,CAD,CASINO chips\n",
+            "8,1006,2023-03-02,deposit,1,CAD,Coffee\n",
+            "9,1006,2023-03-02,deposit,1,CAD,Coffee\n",
+            "10,1006,2023-03-03,deposit,1,CAD,Coffee\n"
+        ]
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "input.csv")
+        with open(self.file_path, "w") as input_file:
+            input_file.write(self.HEADER + "".join(rows))
+        
+        self.config = {
+            "threshold": 10000,
+            "flagged_currencies": ["BTC"],
+            "currency_thresholds": {"JPY": 1500000},
+            "account_limits": {"1003": 5000},
+            "description_patterns": ["casino", "lottery"],
+            "ignore_case": True,
+            "max_daily_transactions": 1
+        }
+        #the IDs of the transactions flagged by the rules above
+        self.expected_ids = ["2", "4", "5", "6", "7", "9"]
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        self.directory.cleanup()
+
+    def flagged_ids(self, results: dict) -> list:
+        """Returns the Transaction ID of every suspicious transaction."""
+        return [transaction["Transaction ID"] for transaction in results["suspicious_transactions"]]
+
+    #tests that every processing mode flags the same transactions with the configured rules
+    def test_rules_in_every_mode(self):
+    #arrange
+        rules = SuspiciousTransactionRules.from_dict(self.config)
+        input_handler = InputHandler(self.file_path)
+        modes = {
+            "process_data": lambda test: DataProcessor(input_handler.read_input_data(), rules = rules).process_data(),
+            "process_fused": lambda test: test.process_fused(input_handler.iter_raw_input_data()),
+            "process_scanned": lambda test: test.process_scanned(input_handler.get_mmap_scanner()),
+            "process_columnar": lambda test: DataProcessor(input_handler.read_input_data(), rules = rules).process_columnar()
+        }
+        
+        for mode, process in modes.items():
+            with self.subTest(mode = mode):
+    #act
+                actual = self.flagged_ids(process(DataProcessor([], rules = rules)))
+                
+    #assert
+                self.assertEqual(self.expected_ids, actual)
+
+    #tests that the same rows flag the same transactions from CSV and from JSON, where account numbers are ints
+    def test_csv_and_json_flag_the_same_rows(self):
+    #arrange
+        rules = SuspiciousTransactionRules.from_dict(self.config)
+        json_path = os.path.join(self.directory.name, "input.json")
+        with open(json_path, "w") as json_file:
+            json.dump([dict(row, **{"Transaction ID": int(row["Transaction ID"]),
+                                    "Account number": int(row["Account number"]),
+                                    "Amount": float(row["Amount"])})
+                       for row in InputHandler(self.file_path).read_input_data()], json_file)
+        modes = {
+            "process_data": lambda test, input_handler: DataProcessor(input_handler.read_input_data(),
+                                                                      rules = rules).process_data(),
+            "process_fused": lambda test, input_handler: test.process_fused(input_handler.iter_raw_input_data()),
+            "process_columnar": lambda test, input_handler: DataProcessor(input_handler.read_input_data(),
+                                                                          rules = rules).process_columnar()
+        }
+
+        for mode, process in modes.items():
+            with self.subTest(mode = mode):
+    #act
+                from_csv = self.flagged_ids(process(DataProcessor([], rules = rules), InputHandler(self.file_path)))
+                from_json = self.flagged_ids(process(DataProcessor([], rules = rules), InputHandler(json_path)))
+
+    #assert
+                self.assertEqual(self.expected_ids, from_csv)
+                self.assertEqual(self.expected_ids, [str(transaction_id) for transaction_id in from_json])
+
+    #tests that the default rules match the DataProcessor's constants
+    def test_default_rules(self):
+    #arrange
+        test = DataProcessor([])
+        
+    #act
+        rules = test.rules
+        
+    #assert
+        self.assertEqual(DataProcessor.LARGE_TRANSACTION_THRESHOLD, rules.threshold)
+        self.assertEqual(DataProcessor.UNCOMMON_CURRENCIES, rules.flagged_currencies)
+
+    #tests that rules are loaded from a JSON file and round trip through to_dict
+    def test_from_file(self):
+    #arrange
+        config_path = os.path.join(self.directory.name, "rules.json")
+        with open(config_path, "w") as config_file:
+            config_file.write('{"threshold": 500, "flagged_currencies": ["XRP"], "max_daily_transactions": 3}')
+        
+    #act
+        rules = SuspiciousTransactionRules.from_file(config_path)
+        
+    #assert
+        self.assertEqual(500, rules.to_dict()["threshold"])
+        self.assertEqual(["XRP"], rules.to_dict()["flagged_currencies"])
+        self.assertEqual(3, rules.max_daily_transactions)
+
+    #tests that an unknown setting is rejected
+    def test_unknown_setting(self):
+    #act and assert
+        with self.assertRaises(ValueError):
+            SuspiciousTransactionRules.from_dict({"treshold": 500})
+
+    #tests that every processing mode flags the same bursts with a sliding window
+    def test_velocity_window_in_every_mode(self):
+    #arrange
+        config = {"threshold": 1000000, "velocity_windows": [{"window_hours": 24, "max_count": 1,
+                                                                "transaction_types": ["deposit"]}]}
+        input_handler = InputHandler(self.file_path)
+        modes = {
+            "process_data": lambda test: test.process_transactions(input_handler.read_input_data()),
+            "process_fused": lambda test: test.process_fused(input_handler.iter_raw_input_data()),
+            "process_scanned": lambda test: test.process_scanned(input_handler.get_mmap_scanner()),
+            "process_batch": lambda test: test.process_columnar()
+        }
+        
+        for mode, process in modes.items():
+            with self.subTest(mode = mode):
+                rules = SuspiciousTransactionRules.from_dict(config)
+                test = DataProcessor(input_handler.read_input_data(), rules = rules)
+                
+    #act
+                actual = self.flagged_ids(process(test))
+                
+    #assert
+                self.assertEqual(["2", "4", "9"], actual)
+
+    #tests that the daily counts keep a bounded number of days per account however many days are processed
+    def test_daily_counts_stay_bounded(self):
+    #arrange
+        rules = SuspiciousTransactionRules(max_daily_transactions = 1).compile()
+        window = CompiledRules.DAILY_COUNT_WINDOW_DAYS
+        days = [date(2023, 1, 1) + timedelta(days = offset) for offset in range(365)]
+
+    #act
+        flagged = [rules("1001", 1, "CAD", date = day.isoformat()) for day in days for _ in range(2)]
+        late = rules("1001", 1, "CAD", date = days[-window].isoformat())
+        too_late = rules("1001", 1, "CAD", date = days[-window - 2].isoformat())
+
+    #assert
+        self.assertEqual([False, True] * len(days), flagged)
+        self.assertTrue(late)
+        self.assertFalse(too_late)
+        self.assertEqual(["1001"], list(rules.daily_counts))
+        self.assertLessEqual(len(rules.daily_counts["1001"][1]), window + 1)
+
+    #tests that the parallel workers use the parent's rules
+    def test_parallel_uses_rules(self):
+    #arrange
+        config = dict(self.config)
+        del config["max_daily_transactions"]
+        rules = SuspiciousTransactionRules.from_dict(config)
+        
+    #act
+        actual = ParallelProcessor(self.file_path, workers = 2).process_data(DataProcessor([], rules = rules))
+        
+    #assert
+        self.assertEqual(["2", "4", "5", "6", "7"], self.flagged_ids(actual))
+
+    #tests that parallel processing refuses the velocity rule
+    def test_parallel_rejects_velocity(self):
+    #arrange
+        rules = SuspiciousTransactionRules.from_dict(self.config)
+        
+    #act and assert
+        with self.assertRaises(ValueError):
+            ParallelProcessor(self.file_path, workers = 2).process_data(DataProcessor([], rules = rules))
+    
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+"""Unit tests for the QuantileSketch, DistinctCounter and TransactionSketches classes
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import json
+import random
+import unittest
+from unittest import TestCase
+from data_processor.data_processor import DataProcessor
+from data_processor.sketches import DistinctCounter, QuantileSketch, TransactionSketches
+
+class TestQuantileSketch(TestCase):
+    """Defines the unit tests for the QuantileSketch class."""
+
+    #tests that the estimated quantiles are within 2% of the rank with fixed memory
+    def test_quantile_accuracy(self):
+    #arrange
+        values = list(range(100000))
+        random.Random(1).shuffle(values)
+        sketch = QuantileSketch()
+        
+    #act
+        sketch.extend(values)
+        
+    #assert
+        for quantile in (0.01, 0.5, 0.9, 0.99):
+            self.assertAlmostEqual(quantile * 100000, sketch.quantile(quantile), delta = 2000)
+        self.assertLess(sum(len(items) for items in sketch.to_dict()["levels"]), 1000)
+        self.assertEqual((0, 99999, 100000), (sketch.min, sketch.max, len(sketch)))
+
+    #tests that merged sketches estimate the quantiles of both streams
+    def test_update(self):
+    #arrange
+        first = QuantileSketch()
+        second = QuantileSketch()
+        first.extend(range(0, 50000))
+        second.extend(range(50000, 100000))
+        
+    #act
+        first.update(second)
+        
+    #assert
+        self.assertEqual(100000, len(first))
+        self.assertAlmostEqual(50000, first.quantile(0.5), delta = 2000)
+
+    #tests that small sketches are exact and empty ones return None
+    def test_small_and_empty(self):
+    #arrange
+        sketch = QuantileSketch()
+        sketch.extend([5, 1, 3])
+        
+    #act and assert
+        self.assertEqual(3, sketch.quantile(0.5))
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+        with self.assertRaises(ValueError):
+            sketch.quantile(1.5)
+
+class TestDistinctCounter(TestCase):
+    """Defines the unit tests for the DistinctCounter class."""
+
+    #tests that repeated values are only counted once, within the expected error
+    def test_count(self):
+    #arrange
+        counter = DistinctCounter()
+        
+    #act
+        for index in range(60000):
+            counter.add(str(index % 20000))
+        
+    #assert
+        self.assertAlmostEqual(20000, counter.count(), delta = 600)
+
+    #tests that merging counts the union of the values
+    def test_update(self):
+    #arrange
+        first = DistinctCounter()
+        second = DistinctCounter()
+        for index in range(1000):
+            first.add(str(index))
+            second.add(str(index + 500))
+        
+    #act
+        first.update(second)
+        
+    #assert
+        self.assertAlmostEqual(1500, first.count(), delta = 30)
+
+    #tests that counters with another precision are not merged
+    def test_update_precision_mismatch(self):
+    #act and assert
+        with self.assertRaises(ValueError):
+            DistinctCounter(12).update(DistinctCounter(14))
+
+class TestTransactionSketches(TestCase):
+    """Defines the unit tests for the TransactionSketches class and the DataProcessor's sketches."""
+
+    def setUp(self):
+        self.transactions = [
+            {
+                "Transaction ID": str(index),
+                "Account number": str(1000 + index % 7),
+                "Date": "2023-03-01",
+                "Transaction type": ("deposit", "withdrawal")[index % 2],
+                "Amount": str(index),
+                "Currency": "CAD",
+                "Description": "Salary"
+            }
+            for index in range(1, 101)
+        ]
+
+    #tests that the sketches survive a JSON round trip (checkpoints)
+    def test_to_dict(self):
+    #arrange
+        sketches = TransactionSketches()
+        for transaction in self.transactions:
+            sketches.add(transaction["Transaction type"], transaction["Account number"], int(transaction["Amount"]))
+        
+    #act
+        actual = TransactionSketches.from_dict(json.loads(json.dumps(sketches.to_dict())))
+        
+    #assert
+        self.assertEqual(sketches.to_dict(), actual.to_dict())
+
+    #tests that every processing mode gives the same percentiles and distinct counts
+    def test_data_processor_modes_agree(self):
+    #arrange
+        modes = {
+            "process_data": lambda test: test.process_data(),
+            "process_fused": lambda test: test.process_fused(self.transactions),
+            "process_columnar": lambda test: test.process_columnar()
+        }
+        
+        for mode, process in modes.items():
+            with self.subTest(mode = mode):
+                test = DataProcessor(self.transactions, sketches = True)
+                
+    #act
+                results = process(test)
+                
+    #assert
+                self.assertIs(test.sketches, results["transaction_sketches"])
+                self.assertEqual(50, test.get_transaction_amount_quantile("deposit", 0.5))
+                self.assertEqual(99, test.get_transaction_amount_quantile("withdrawal", 1))
+                self.assertEqual(7, test.get_distinct_account_count())
+                self.assertIsNone(test.get_transaction_amount_quantile("transfer", 0.5))
+
+    #tests that merged partial results carry their sketches
+    def test_data_processor_merge_results(self):
+    #arrange
+        partial_results = DataProcessor(self.transactions[:50], sketches = True).process_data()
+        test = DataProcessor(self.transactions[50:], sketches = True)
+        test.process_data()
+        
+    #act
+        test.merge_results(partial_results, log_suspicious = False)
+        
+    #assert
+        self.assertEqual(99, test.get_transaction_amount_quantile("withdrawal", 1))
+        self.assertEqual(2, test.get_transaction_amount_quantile("deposit", 0))
+
+    #tests that asking for a percentile without sketches raises a ValueError
+    def test_data_processor_without_sketches(self):
+    #arrange
+        test = DataProcessor(self.transactions)
+        test.process_data()
+        
+    #act and assert
+        self.assertNotIn("transaction_sketches", test.results)
+        with self.assertRaises(ValueError):
+            test.get_transaction_amount_quantile("deposit", 0.5)
+
+if __name__ == "__main__":
+    unittest.main()
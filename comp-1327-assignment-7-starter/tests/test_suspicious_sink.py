@@ -0,0 +1,60 @@
+"""Unit tests for the CsvSuspiciousSink class
+"""
+
+__author__ = "Beerdavinder Singh"
+__version__ = "3.12"
+
+import os
+import tempfile
+from unittest import TestCase, main
+from data_processor.data_processor import DataProcessor
+from output_handler.output_handler import OutputHandler
+from output_handler.suspicious_sink import CsvSuspiciousSink
+
+class TestCsvSuspiciousSink(TestCase):
+    """Defines the unit tests for the CsvSuspiciousSink class."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test function."""
+        self.transactions = [
+            {"Transaction ID": "1", "Account number": "1001", "Date": "2023-03-14", "Transaction type": "deposit",
+             "Amount": "250", "Currency": "XRP", "Description": "crypto investment"},
+            {"Transaction ID": "2", "Account number": "1002", "Date": "2023-03-14", "Transaction type": "deposit",
+             "Amount": "100", "Currency": "CAD", "Description": "salary"},
+            {"Transaction ID": "3", "Account number": "1001", "Date": "2023-03-15", "Transaction type": "withdrawal",
+             "Amount": "20000", "Currency": "CAD", "Description": "house"}
+        ]
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        self.directory.cleanup()
+
+    def read(self, file_path: str) -> str:
+        with open(file_path, newline='') as output_file:
+            return output_file.read()
+
+    def test_streamed_file_matches_output_handler(self):
+        expected_path = os.path.join(self.directory.name, "expected.csv")
+        actual_path = os.path.join(self.directory.name, "actual.csv")
+        results = DataProcessor(self.transactions).process_data()
+        OutputHandler({}, results["suspicious_transactions"], {}).write_suspicious_transactions_to_csv(expected_path)
+
+        with CsvSuspiciousSink(actual_path) as sink:
+            DataProcessor(self.transactions, suspicious_sink = sink).process_data()
+
+        self.assertEqual(self.read(expected_path), self.read(actual_path))
+        self.assertEqual(2, sink.count)
+
+    def test_rows_are_visible_during_the_run(self):
+        file_path = os.path.join(self.directory.name, "suspicious.csv")
+
+        with CsvSuspiciousSink(file_path) as sink:
+            sink(self.transactions[0])
+            lines = self.read(file_path).splitlines()
+
+        self.assertEqual(['Transaction ID,Account number,Date,Transaction type,Amount,Currency,Description',
+                          '1,1001,2023-03-14,deposit,250,XRP,crypto investment'], lines)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Unit tests for the TimeBucketedStatistics class
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import json
+import unittest
+from datetime import date
+from decimal import Decimal
+from unittest import TestCase
+from data_processor.data_processor import DataProcessor
+from data_processor.time_buckets import TimeBucketedStatistics, period_start
+
+class TestTimeBucketedStatistics(TestCase):
+    """Defines the unit tests for the TimeBucketedStatistics class."""
+
+    def setUp(self):
+        self.transactions = [
+            {
+                "Transaction ID": str(index),
+                "Account number": ("1001", "1002")[index % 2],
+                "Date": date(2023, 2, 25 + index).isoformat(),
+                "Transaction type": ("deposit", "withdrawal")[index % 2],
+                "Amount": "%d.10" % (index * 100),
+                "Currency": "CAD",
+                "Description": "Salary"
+            }
+            for index in range(0, 4)
+        ] + [
+            {
+                "Transaction ID": str(index),
+                "Account number": "1001",
+                "Date": "2023-03-%02dT12:00:00" % index,
+                "Transaction type": "deposit",
+                "Amount": "10",
+                "Currency": "CAD",
+                "Description": "Salary"
+            }
+            for index in (1, 1, 6, 20)
+        ]
+
+    #tests that weeks start on monday and months on the first
+    def test_period_start(self):
+    #arrange
+        wednesday = date(2023, 3, 1).toordinal()
+        
+    #act and assert
+        self.assertEqual(date(2023, 2, 27), date.fromordinal(period_start(wednesday, "week")))
+        self.assertEqual(date(2023, 3, 1), date.fromordinal(period_start(wednesday + 5, "month")))
+        with self.assertRaises(ValueError):
+            period_start(wednesday, "year")
+
+    #tests that days added before and after the first one grow the series
+    def test_buckets_by_day(self):
+    #arrange
+        statistics = TimeBucketedStatistics()
+        
+    #act
+        statistics.add("deposit", "1001", 5, "2023-03-10")
+        statistics.add("deposit", "1001", 7, "2023-03-01T08:00:00")
+        statistics.add("deposit", "1002", 1, "2023-03-10")
+        statistics.add("deposit", "1002", 1, "not a date")
+        
+    #assert
+        self.assertEqual([(date(2023, 3, 1), 7, 1), (date(2023, 3, 10), 6, 2)], statistics.buckets())
+        self.assertEqual([(date(2023, 3, 1), 7, 1), (date(2023, 3, 10), 5, 1)],
+                         statistics.buckets(account_number = "1001"))
+        self.assertEqual(1, statistics.undated_count)
+
+    #tests that an account only keeps the days it has transactions on, however far apart they are
+    def test_accounts_keep_only_active_days(self):
+    #arrange
+        statistics = TimeBucketedStatistics()
+        
+    #act
+        statistics.add("deposit", "1001", 5, "2023-03-10")
+        statistics.add("deposit", "1002", 1, "2000-01-01")
+        statistics.add("deposit", "1002", 2, "2033-01-01")
+        state = statistics.to_dict()
+        
+    #assert
+        self.assertEqual([[date(2023, 3, 10).toordinal()], [5.0], [1]], state["accounts"]["1001"])
+        self.assertEqual(2, len(state["accounts"]["1002"][0]))
+        self.assertEqual([(date(2000, 1, 1), 1, 1), (date(2033, 1, 1), 2, 1)],
+                         statistics.buckets(account_number = "1002"))
+        self.assertEqual(statistics.buckets(granularity = "month"),
+                         TimeBucketedStatistics.from_dict(json.loads(json.dumps(state))).buckets(granularity = "month"))
+
+    #tests that merged and JSON round-tripped statistics keep every day
+    def test_update_and_to_dict(self):
+    #arrange
+        first = TimeBucketedStatistics()
+        second = TimeBucketedStatistics()
+        first.add("deposit", "1001", 5, "2023-03-10")
+        second.add("deposit", "1001", 2, "2023-02-01")
+        second.add("withdrawal", "1002", 3, "2023-03-10")
+        
+    #act
+        first.update(TimeBucketedStatistics.from_dict(json.loads(json.dumps(second.to_dict()))))
+        
+    #assert
+        self.assertEqual([(date(2023, 2, 1), 2, 1), (date(2023, 3, 1), 8, 2)], first.buckets("month"))
+        self.assertEqual([(date(2023, 3, 6), 5, 1)], first.buckets("week", transaction_type = "deposit")[1:])
+
+    #tests that every processing mode gives the same buckets
+    def test_data_processor_modes_agree(self):
+    #arrange
+        modes = {
+            "process_data": lambda test: test.process_data(),
+            "process_fused": lambda test: test.process_fused(self.transactions),
+            "process_columnar": lambda test: test.process_columnar()
+        }
+        expected = DataProcessor(self.transactions, time_buckets = True)
+        expected.process_data()
+        
+        for mode, process in modes.items():
+            with self.subTest(mode = mode):
+                test = DataProcessor(self.transactions, time_buckets = True)
+                
+    #act
+                process(test)
+                
+    #assert
+                for granularity in ("day", "week", "month"):
+                    self.assertEqual(expected.get_time_bucketed_statistics(granularity),
+                                     test.get_time_bucketed_statistics(granularity))
+                self.assertEqual([{"period": "2023-03-01", "total_amount": 40.0, "transaction_count": 4}],
+                                 test.get_time_bucketed_statistics("month", account_number = "1001")[1:])
+
+    #tests that fixed-point totals are exact
+    def test_data_processor_fixed_point(self):
+    #arrange
+        test = DataProcessor(self.transactions, amount_digits = 2, time_buckets = True)
+        
+    #act
+        test.process_columnar()
+        
+    #assert
+        self.assertEqual(Decimal("200.20"),
+                         test.get_time_bucketed_statistics("month", transaction_type = "deposit")[0]["total_amount"])
+
+    #tests that asking for buckets that are not kept raises a ValueError
+    def test_data_processor_without_time_buckets(self):
+    #act and assert
+        with self.assertRaises(ValueError):
+            DataProcessor(self.transactions).get_time_bucketed_statistics()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""Unit tests for the Transaction record type
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1"
+
+import sys
+import tempfile
+import unittest
+from os import path
+from unittest import TestCase
+from unittest.mock import patch, mock_open
+from data_processor.data_processor import DataProcessor
+from input_handler.input_handler import InputHandler
+from output_handler.output_handler import OutputHandler
+from output_handler.suspicious_sink import CsvSuspiciousSink
+from transaction.transaction import Transaction
+
+
+class TransactionTests(TestCase):
+    """Defines the unit tests for the Transaction class."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function."""
+        self.row = {
+            "Transaction ID": "11",
+            "Account number": "1001",
+            "Date": "2023-03-13",
+            "Transaction type": "deposit",
+            "Amount": "12000",
+            "Currency": "CAD",
+            "Description": "Car Sale"
+        }
+
+    def test_from_dict_parses_amount(self):
+        """Test that the amount is parsed once and columns can be read by name."""
+        # Act
+        transaction = Transaction.from_dict(self.row)
+
+        # Assert
+        self.assertEqual(transaction.amount, 12000.0)
+        self.assertEqual(transaction["Amount"], "12000")
+        self.assertEqual(transaction["Account number"], "1001")
+        self.assertIsNone(transaction.get("Unknown"))
+        with self.assertRaises(KeyError):
+            transaction["Unknown"]
+
+    def test_from_dict_parses_exact_minor_units(self):
+        """Test that the minor units come from the Amount text, not the float."""
+        # Arrange
+        row = dict(self.row, Amount = "0.29")
+
+        # Act
+        transaction = Transaction.from_dict(row)
+
+        # Assert
+        self.assertEqual(transaction.amount_minor, 29)
+
+    def test_text_fields_are_interned(self):
+        """Test that repeated account numbers share one string object."""
+        # Arrange
+        other_row = dict(self.row, **{"Account number": "".join(["10", "01"])})
+
+        # Act
+        first = Transaction.from_dict(self.row)
+        second = Transaction.from_dict(other_row)
+
+        # Assert
+        self.assertIs(first.account_number, second.account_number)
+
+    def test_smaller_than_dict(self):
+        """Test that a record takes less memory than the dictionary it replaces."""
+        # Act
+        transaction = Transaction.from_dict(self.row)
+
+        # Assert
+        self.assertFalse(hasattr(transaction, "__dict__"))
+        self.assertLess(sys.getsizeof(transaction) * 2, sys.getsizeof(self.row))
+
+    def test_data_processor_accepts_records(self):
+        """Test that DataProcessor produces the same aggregates from records as from dictionaries."""
+        # Arrange
+        rows = [self.row, dict(self.row, **{"Transaction type": "withdrawal", "Amount": "200"})]
+        expected = DataProcessor(rows).process_data()
+
+        # Act
+        actual = DataProcessor([Transaction.from_dict(row) for row in rows]).process_data()
+
+        # Assert
+        self.assertEqual(expected["account_summaries"], actual["account_summaries"])
+        self.assertEqual(expected["transaction_statistics"], actual["transaction_statistics"])
+        self.assertEqual([Transaction.from_dict(self.row)], actual["suspicious_transactions"])
+
+    @patch("builtins.open", new_callable=mock_open)
+    def test_output_handler_accepts_records(self, mock_open_file):
+        """Test that suspicious Transaction records can be written to CSV."""
+        # Arrange
+        output_handler = OutputHandler({}, [Transaction.from_dict(self.row)], {})
+
+        # Act
+        output_handler.write_suspicious_transactions_to_csv("test_transactions.csv")
+
+        # Assert
+        handle = mock_open_file()
+        handle.write.assert_any_call('11,1001,2023-03-13,deposit,12000,CAD,Car Sale\r\n')
+
+    @patch("builtins.open", new_callable=mock_open, read_data="Account number,Transaction type,Amount\n1001,deposit,100.50\n1002,refund,5\n1003,deposit,-1\n")
+    @patch("os.path.isfile", return_value=True)
+    def test_iter_transactions(self, mock_isfile, mock_file):
+        """Test that InputHandler streams only valid rows as Transaction records."""
+        # Arrange
+        input_handler = InputHandler("test.csv")
+
+        # Act
+        actual = list(input_handler.iter_transactions())
+
+        # Assert
+        self.assertEqual(actual, [Transaction(None, "1001", None, "deposit", 100.5, None, None, amount_text="100.50")])
+
+    def test_output_round_trip(self):
+        """Test that records read from a CSV file are written out with their amounts exactly as they were read."""
+        # Arrange
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        input_path = path.join(directory.name, "input.csv")
+        lines = ["Transaction ID,Account number,Date,Transaction type,Amount,Currency,Description",
+                 "11,1001,2023-03-13,deposit,12000,CAD,Car Sale",
+                 "12,1002,2023-03-14,withdrawal,15000.50,CAD,House",
+                 "13,1001,2023-03-15,deposit,12500.10,USD,Bonus"]
+        with open(input_path, "w", newline="") as input_file:
+            input_file.write("\r\n".join(lines) + "\r\n")
+        transactions = list(InputHandler(input_path).iter_transactions())
+        output_path = path.join(directory.name, "suspicious.csv")
+        sink_path = path.join(directory.name, "sink.csv")
+
+        # Act
+        OutputHandler({}, transactions, {}).write_suspicious_transactions_to_csv(output_path)
+        with CsvSuspiciousSink(sink_path) as sink:
+            for transaction in transactions:
+                sink(transaction)
+
+        # Assert
+        for file_path in (output_path, sink_path):
+            with open(file_path, newline="") as output_file:
+                self.assertEqual(lines, output_file.read().splitlines())
+
+
+if __name__ == "__main__":
+    unittest.main()
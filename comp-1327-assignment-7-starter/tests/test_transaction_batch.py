@@ -0,0 +1,181 @@
+"""Unit tests for the TransactionBatch class
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import tempfile
+import unittest
+from os import path
+from unittest import TestCase
+from unittest.mock import patch
+from data_processor import transaction_batch
+from data_processor.data_processor import DataProcessor
+from data_processor.rules import SuspiciousTransactionRules
+from data_processor.transaction_batch import StringColumn, TransactionBatch
+from input_handler.input_handler import InputHandler
+
+class TestTransactionBatch(TestCase):
+    """Defines the unit tests for the TransactionBatch class."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function."""
+        
+        self.transactions = [
+            {"Transaction ID": "1", "Account number": "1001", "Date": "2023-03-01",
+             "Transaction type": "deposit", "Amount": "1000", "Currency": "CAD", "Description": "Salary"},
+            {"Transaction ID": "2", "Account number": "1002", "Date": "2023-03-01",
+             "Transaction type": "withdrawal", "Amount": "15000", "Currency": "CAD", "Description": "House"},
+            {"Transaction ID": "3", "Account number": "1001", "Date": "2023-03-02",
+             "Transaction type": "transfer", "Amount": "250.50", "Currency": "XRP", "Description": "Crypto"},
+            {"Transaction ID": "4", "Account number": "1001", "Date": "2023-03-02",
+             "Transaction type": "withdrawal", "Amount": "200", "Currency": "CAD", "Description": "Groceries"}
+        ]
+
+    #tests that a row is rebuilt exactly as it was read
+    def test_row_round_trip(self):
+    #arrange
+        batch = TransactionBatch.from_transactions(self.transactions)
+        
+    #act
+        actual = [batch.row(index) for index in range(len(batch))]
+        
+    #assert
+        self.assertEqual(self.transactions, actual)
+
+    #tests that the columnar mode returns the same results as the per transaction mode
+    def test_process_columnar_matches_process_data(self):
+    #arrange
+        expected = DataProcessor(self.transactions).process_data()
+        
+    #act
+        actual = DataProcessor(self.transactions).process_columnar()
+        
+    #assert
+        self.assertEqual(expected, actual)
+
+    #tests that batches processed one after another are added together
+    def test_process_batch_merges(self):
+    #arrange
+        test = DataProcessor([])
+        expected = DataProcessor(self.transactions).process_data()
+        
+    #act
+        test.process_batch(TransactionBatch.from_transactions(self.transactions[:2]))
+        actual = test.process_batch(TransactionBatch.from_transactions(self.transactions[2:]))
+        
+    #assert
+        self.assertEqual(expected, actual)
+
+    #tests the columnar mode against the sample input file
+    def test_process_columnar_sample_file(self):
+    #arrange
+        transactions = InputHandler(path.join(path.dirname(__file__), "..", "input", "input_data.csv")).read_input_data()
+        expected = DataProcessor(transactions).process_data()
+        
+    #act
+        actual = DataProcessor(transactions).process_columnar()
+        
+    #assert
+        self.assertEqual(expected, actual)
+
+    #tests that a saved batch is loaded back with the same rows and results
+    def test_save_load_round_trip(self):
+    #arrange
+        batch = TransactionBatch.from_transactions(self.transactions)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        file_path = path.join(directory.name, "batch.txbatch")
+        
+    #act
+        batch.save(file_path)
+        loaded = TransactionBatch.load(file_path)
+        
+    #assert
+        self.assertEqual(self.transactions, [loaded.row(index) for index in range(len(loaded))])
+        self.assertEqual(DataProcessor([]).process_batch(batch), DataProcessor([]).process_batch(loaded))
+
+    #tests that unique string columns are saved as a blob and codes use the smallest typecode
+    def test_save_compact_columns(self):
+    #arrange
+        transactions = [dict(transaction, **{"Transaction ID": str(index)})
+                        for index, transaction in enumerate(self.transactions * 200)]
+        transactions[3]["Transaction ID"] = None
+        batch = TransactionBatch.from_transactions(transactions)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        file_path = path.join(directory.name, "batch.txbatch")
+
+    #act
+        batch.save(file_path)
+        loaded = TransactionBatch.load(file_path)
+
+    #assert
+        self.assertEqual(transactions, loaded.rows(range(len(loaded))))
+        self.assertEqual(1, loaded.account_numbers.codes.itemsize)
+        self.assertIsInstance(loaded.transaction_ids, StringColumn)
+        self.assertLess(path.getsize(file_path), 24 * len(transactions))
+
+    #tests that a CSV file read straight into a batch keeps and rejects the same rows as InputHandler
+    def test_from_file_matches_input_handler(self):
+    #arrange
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        file_path = path.join(directory.name, "input.csv")
+        with open(file_path, "w", encoding = "utf-8") as input_file:
+            input_file.write("Transaction ID,Account number,Date,Transaction type,Amount,Currency,Description\n"
+                             "1,1001,2023-03-01,deposit,1000,CAD,Café\n"
+                             "\n"
+                             "2,1002,2023-03-01,refund,20,CAD,Shop\n"
+                             "3,1001,2023-03-02,withdrawal,-5,CAD,ATM\n"
+                             "4,1002,2023-03-02,deposit\n"
+                             "5,1002,2023-03-03,withdrawal,abc,CAD,ATM\n"
+                             ",1003,2023-03-03,withdrawal,12000,USD,Car,extra\n")
+        expected = TransactionBatch.from_transactions(InputHandler(file_path).iter_input_data())
+
+    #act
+        actual = TransactionBatch.from_file(file_path)
+
+    #assert
+        self.assertEqual(expected.rows(range(len(expected))), actual.rows(range(len(actual))))
+        self.assertEqual({"invalid_transaction_type": 1, "negative_amount": 1, "non_numeric_amount": 2},
+                         actual.rejection_reasons)
+        self.assertEqual(DataProcessor([]).process_batch(expected), DataProcessor([]).process_batch(actual))
+
+    #tests that the NumPy aggregates are the same as the Python loops they replace
+    @unittest.skipIf(transaction_batch.numpy is None, "NumPy is not installed")
+    def test_numpy_matches_python_loops(self):
+    #arrange
+        rules = {"account_limits": {"1001": 900}, "description_patterns": ["crypto"], "ignore_case": True}
+        batches = [TransactionBatch.from_transactions(self.transactions, amount_digits)
+                   for amount_digits in (None, 2)]
+        with patch.object(transaction_batch, "numpy", None):
+            expected = [DataProcessor([], amount_digits = batch.amount_digits,
+                                      rules = SuspiciousTransactionRules(**rules)).process_batch(batch)
+                        for batch in batches]
+
+    #act
+        actual = [DataProcessor([], amount_digits = batch.amount_digits,
+                                rules = SuspiciousTransactionRules(**rules)).process_batch(batch)
+                  for batch in batches]
+
+    #assert
+        self.assertEqual(expected, actual)
+        self.assertEqual(3, len(actual[0]["suspicious_transactions"]))
+
+    #tests that loading a file that is not a saved batch raises a ValueError
+    def test_load_rejects_other_files(self):
+    #arrange
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        file_path = path.join(directory.name, "batch.txbatch")
+        with open(file_path, "wb") as batch_file:
+            batch_file.write(b"not a batch file")
+        
+    #act and assert
+        with self.assertRaises(ValueError):
+            TransactionBatch.load(file_path)
+    
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""Unit tests for the VelocityDetector class
+"""
+
+__author__ = "D Synkiw"
+__version__ = "1.0"
+
+import unittest
+from unittest import TestCase
+from data_processor.velocity import VelocityDetector
+
+class TestVelocityDetector(TestCase):
+    """Defines the unit tests for the VelocityDetector class."""
+
+    #tests that the transaction going over the count limit within the window is flagged
+    def test_max_count(self):
+    #arrange
+        detector = VelocityDetector(window_hours = 24, max_count = 2)
+        
+    #act
+        actual = [detector.update("1001", "withdrawal", 100, "2023-03-01T0%d:00:00" % hour) for hour in range(4)]
+        
+    #assert
+        self.assertEqual([False, False, True, True], actual)
+
+    #tests that the total of the window is checked against max_total
+    def test_max_total(self):
+    #arrange
+        detector = VelocityDetector(window_hours = 6, max_total = 10000)
+        
+    #act
+        actual = [
+            detector.update("1001", "withdrawal", 4000, "2023-03-01T00:00:00"),
+            detector.update("1001", "withdrawal", 4000, "2023-03-01T01:00:00"),
+            detector.update("1001", "withdrawal", 4000, "2023-03-01T02:00:00")
+        ]
+        
+    #assert
+        self.assertEqual([False, False, True], actual)
+
+    #tests that transactions older than the window no longer count
+    def test_window_slides(self):
+    #arrange
+        detector = VelocityDetector(window_hours = 24, max_count = 1)
+        detector.update("1001", "withdrawal", 100, "2023-03-01")
+        
+    #act
+        same_day = detector.update("1001", "withdrawal", 100, "2023-03-01T12:00:00")
+        next_week = detector.update("1001", "withdrawal", 100, "2023-03-08")
+        
+    #assert
+        self.assertTrue(same_day)
+        self.assertFalse(next_week)
+
+    #tests that out of order transactions leave the window by timestamp and older ones than the window are ignored
+    def test_out_of_order_timestamps(self):
+    #arrange
+        detector = VelocityDetector(window_hours = 6, max_count = 2)
+        hours = [10, 2, 8, 13, 15]
+
+    #act
+        actual = [detector.update("1001", "withdrawal", 100, "2023-03-01T%02d:00:00" % hour) for hour in hours]
+
+    #assert
+        self.assertEqual([False, False, False, True, True], actual)
+
+    #tests that every account has its own window and that other transaction types are ignored
+    def test_accounts_and_types(self):
+    #arrange
+        detector = VelocityDetector(max_count = 1, transaction_types = ["withdrawal"])
+        detector.update("1001", "withdrawal", 100, "2023-03-01")
+        
+    #act
+        other_account = detector.update("1002", "withdrawal", 100, "2023-03-01")
+        other_type = detector.update("1001", "deposit", 100, "2023-03-01")
+        
+    #assert
+        self.assertFalse(other_account)
+        self.assertFalse(other_type)
+
+    #tests that the least recently active account is dropped past max_accounts
+    def test_max_accounts(self):
+    #arrange
+        detector = VelocityDetector(max_count = 1, max_accounts = 2)
+        detector.update("1001", "withdrawal", 100, "2023-03-01")
+        detector.update("1002", "withdrawal", 100, "2023-03-01")
+        detector.update("1001", "withdrawal", 100, "2023-03-01")
+        
+    #act
+        detector.update("1003", "withdrawal", 100, "2023-03-01")
+        
+    #assert
+        self.assertEqual(2, detector.tracked_accounts)
+        self.assertFalse(detector.update("1002", "withdrawal", 100, "2023-03-01"))
+
+    #tests that a row with an unparseable date is ignored
+    def test_invalid_date(self):
+    #arrange
+        detector = VelocityDetector(max_count = 0)
+        
+    #act
+        actual = detector.update("1001", "withdrawal", 100, "yesterday")
+        
+    #assert
+        self.assertFalse(actual)
+        self.assertEqual(0, detector.tracked_accounts)
+
+    #tests that a window without any limit is rejected
+    def test_requires_a_limit(self):
+    #act and assert
+        with self.assertRaises(ValueError):
+            VelocityDetector.from_dict({"window_hours": 24})
+    
+if __name__ == "__main__":
+    unittest.main()
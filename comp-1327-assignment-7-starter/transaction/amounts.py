@@ -0,0 +1,63 @@
+"""Module with fixed-point amount helpers: amounts are held as integer minor
+units (e.g. cents) so totals are exact and add at integer speed
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1.0.0"
+
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+
+# Number of decimal places of the minor units used unless told otherwise
+DEFAULT_AMOUNT_DIGITS = 2
+
+
+def parse_minor_units(value, digits: int = DEFAULT_AMOUNT_DIGITS) -> int:
+    """Convert an amount to an integer number of minor units.
+
+    Plain decimal text ("1250", "-3.5", ".75") is converted with integer
+    arithmetic only, without going through float. Anything else (more
+    decimal places than digits, exponents, Decimal, float or int values) is
+    converted through Decimal and rounded half to even.
+
+    Args:
+        value: The amount, as text (str or bytes), int, float or Decimal.
+        digits (int): The number of decimal places of a minor unit.
+
+    Returns:
+        int: The amount times 10 ** digits.
+
+    Raises:
+        ValueError: If the value is not a finite number.
+    """
+    if isinstance(value, bytes):
+        value = value.decode("ascii", "replace")
+    if isinstance(value, str):
+        text = value.strip()
+        body = text[1:] if text[:1] in ("-", "+") else text
+        whole, _, fraction = body.partition(".")
+        if (whole.isdigit() or (not whole and fraction)) and (not fraction or fraction.isdigit()) \
+                and len(fraction) <= digits and body.isascii():
+            units = int(whole or "0") * 10 ** digits + (int(fraction.ljust(digits, "0")) if digits else 0)
+            return -units if text[:1] == "-" else units
+    elif isinstance(value, int) and not isinstance(value, bool):
+        return value * 10 ** digits
+    elif isinstance(value, float):
+        value = repr(value)
+
+    try:
+        return int(Decimal(value).scaleb(digits).to_integral_value(ROUND_HALF_EVEN))
+    except (InvalidOperation, OverflowError, TypeError) as error:
+        raise ValueError(f"Invalid amount: {value!r}") from error
+
+
+def to_decimal(units: int, digits: int = DEFAULT_AMOUNT_DIGITS) -> Decimal:
+    """Convert minor units back to an exact Decimal amount.
+
+    Args:
+        units (int): The amount in minor units.
+        digits (int): The number of decimal places of a minor unit.
+
+    Returns:
+        Decimal: The amount, with exactly digits decimal places.
+    """
+    return Decimal(units).scaleb(-digits)
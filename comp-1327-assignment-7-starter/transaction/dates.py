@@ -0,0 +1,57 @@
+"""Module with a cached parser for the Date field of transactions
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1.0.0"
+
+from datetime import datetime, timezone
+from functools import lru_cache
+
+# Number of distinct date strings whose parsed value is kept. Input files
+# usually hold a few thousand distinct dates at most, so nearly every call
+# is a cache hit.
+DATE_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_timestamp(value: str) -> float:
+    """Parse a transaction date to a POSIX timestamp in seconds.
+
+    Dates without a time ("2023-03-01") are midnight. Dates without a time
+    zone are read as UTC, so the result does not depend on the machine.
+
+    Args:
+        value (str): An ISO 8601 date or date and time.
+
+    Returns:
+        float: The number of seconds since the epoch.
+
+    Raises:
+        ValueError: If the value is not an ISO 8601 date.
+        TypeError: If the value is not a string.
+    """
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_day_ordinal(value: str) -> int:
+    """Parse the day of a transaction date to its proleptic Gregorian
+    ordinal (date.toordinal), the day 0001-01-01 being 1.
+
+    The day is the one written in the value, whatever its time or time zone,
+    so a transaction is bucketed under the date it was recorded on.
+
+    Args:
+        value (str): An ISO 8601 date or date and time.
+
+    Returns:
+        int: The day ordinal.
+
+    Raises:
+        ValueError: If the value is not an ISO 8601 date.
+        TypeError: If the value is not a string.
+    """
+    return datetime.fromisoformat(value).toordinal()
@@ -0,0 +1,152 @@
+"""Module with the Transaction record type, a compact alternative to the
+dictionaries produced by csv.DictReader
+"""
+
+__author__ = "Sullivan Lavoie"
+__version__ = "1.0.0"
+
+from sys import intern
+from transaction.amounts import DEFAULT_AMOUNT_DIGITS, parse_minor_units
+
+
+class Transaction:
+    """A single transaction stored in __slots__ instead of a dictionary.
+
+    The amount is parsed once, both to a float and to exact integer minor
+    units (amount_minor, in units of 10 ** -AMOUNT_DIGITS), and its original
+    text is kept (amount_text) so a record is written out with the amount
+    exactly as it was read. The
+    low-cardinality text fields
+    (account number, date, type and currency) are interned so every record
+    shares one copy of each distinct value. Records can also be read with
+    the input file's column names (transaction["Amount"]), so they can be
+    passed anywhere a transaction dictionary is accepted, including
+    DataProcessor and OutputHandler.
+    """
+
+    __slots__ = ("transaction_id", "account_number", "date", "transaction_type",
+                 "amount", "currency", "description", "amount_minor", "amount_text")
+
+    # Number of decimal places of amount_minor
+    AMOUNT_DIGITS = DEFAULT_AMOUNT_DIGITS
+
+    # Input file column name -> attribute name, in file order. The Amount
+    # column is the original text, the same value a transaction dictionary
+    # holds, the parsed float is the amount attribute
+    COLUMNS = {
+        "Transaction ID": "transaction_id",
+        "Account number": "account_number",
+        "Date": "date",
+        "Transaction type": "transaction_type",
+        "Amount": "amount_text",
+        "Currency": "currency",
+        "Description": "description",
+    }
+
+    def __init__(self, transaction_id, account_number, date: str, transaction_type: str,
+                 amount: float, currency: str, description: str, amount_minor: int = None,
+                 amount_text = None):
+        """Initialize the Transaction with its parsed fields.
+
+        Args:
+            transaction_id: The transaction ID.
+            account_number: The account number.
+            date (str): The transaction date.
+            transaction_type (str): The transaction type, e.g. 'deposit'.
+            amount (float): The transaction amount.
+            currency (str): The currency code.
+            description (str): The free text description.
+            amount_minor (int): The amount in minor units, computed from
+                amount when not given.
+            amount_text: The amount as it appeared in the input (e.g. the
+                text '12000'), amount itself when not given.
+        """
+        self.transaction_id = transaction_id
+        self.account_number = _intern(account_number)
+        self.date = _intern(date)
+        self.transaction_type = _intern(transaction_type)
+        self.amount = amount
+        self.currency = _intern(currency)
+        self.description = description
+        self.amount_minor = parse_minor_units(amount, self.AMOUNT_DIGITS) if amount_minor is None else amount_minor
+        self.amount_text = amount if amount_text is None else amount_text
+
+    @classmethod
+    def from_dict(cls, row: dict) -> "Transaction":
+        """Create a Transaction from a row read from a CSV or JSON file.
+
+        amount_minor is parsed from the Amount text itself, not from the float,
+        and the text is kept as amount_text.
+
+        Args:
+            row (dict): The row, keyed by the input file's column names.
+
+        Returns:
+            Transaction: The parsed record.
+
+        Raises:
+            KeyError: If the row has no 'Account number', 'Transaction type' or 'Amount'.
+            ValueError: If the amount is not a number.
+        """
+        amount = row["Amount"]
+        return cls(row.get("Transaction ID"),
+                   row["Account number"],
+                   row.get("Date"),
+                   row["Transaction type"],
+                   float(amount),
+                   row.get("Currency"),
+                   row.get("Description"),
+                   parse_minor_units(amount, cls.AMOUNT_DIGITS),
+                   amount)
+
+    def to_dict(self) -> dict:
+        """Convert the record back to a dictionary keyed by column name.
+
+        Returns:
+            dict: The transaction's fields, in input file order, with the
+            Amount as it was read.
+        """
+        return {column: getattr(self, attribute) for column, attribute in self.COLUMNS.items()}
+
+    def __getitem__(self, column: str):
+        """Get a field by its input file column name.
+
+        Args:
+            column (str): The column name, e.g. 'Amount'.
+
+        Returns:
+            The value of the field.
+
+        Raises:
+            KeyError: If the column does not exist.
+        """
+        return getattr(self, self.COLUMNS[column])
+
+    def get(self, column: str, default=None):
+        """Get a field by its input file column name, like dict.get.
+
+        Args:
+            column (str): The column name.
+            default: The value returned for unknown columns.
+
+        Returns:
+            The value of the field, or default.
+        """
+        attribute = self.COLUMNS.get(column)
+        return default if attribute is None else getattr(self, attribute)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Transaction):
+            return NotImplemented
+        return all(getattr(self, attribute) == getattr(other, attribute) for attribute in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{attribute}={getattr(self, attribute)!r}" for attribute in self.__slots__)
+        return f"Transaction({fields})"
+
+
+def _intern(value):
+    """Intern string values so repeated values share one object."""
+    return intern(value) if type(value) is str else value